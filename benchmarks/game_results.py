@@ -0,0 +1,62 @@
+"""
+Compare the size and parse time of game results as objects, as a table and as columns, on synthetic seasons that are bigger than a real one
+
+Usage:
+    python benchmarks/game_results.py
+    python benchmarks/game_results.py --scales 1 10 100
+"""
+
+import argparse
+import gzip
+import json
+from pathlib import Path
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from team_stats import best_ms, synthetic_box_scores
+from utils import (
+    GAME_RESULTS_SHAPES,
+    GameTable,
+    SafeEncoder,
+    from_columns,
+    from_table,
+    reshape,
+)
+
+# what a client does to get one dict per game back
+BACK_TO_OBJECTS = {
+    "objects": lambda game_results: game_results,
+    "table": from_table,
+    "columns": from_columns,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(
+        f"{'scale':>5} {'games':>7} {'shape':>8} {'KB':>8} {'gzip KB':>8} {'parse ms':>9} {'to objects ms':>14}"
+    )
+    for scale in args.scales:
+        game_results = GameTable.from_box_scores(
+            synthetic_box_scores(scale), "XBL", False
+        ).to_dicts()
+
+        number = max(1, 100 // scale)
+        for shape in GAME_RESULTS_SHAPES:
+            text = json.dumps(reshape(game_results, shape), cls=SafeEncoder)
+            back_to_objects = BACK_TO_OBJECTS[shape]
+
+            parse = best_ms(lambda: json.loads(text), number)
+            to_objects = best_ms(lambda: back_to_objects(json.loads(text)), number)
+            print(
+                f"{scale:>5} {len(game_results):>7} {shape:>8} {len(text) / 1000:>8.1f} {len(gzip.compress(text.encode(), mtime=0)) / 1000:>8.1f} {parse:>9.2f} {to_objects:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
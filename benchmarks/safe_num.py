@@ -0,0 +1,227 @@
+"""
+Time SafeNum operations against the SafeNum they replaced
+
+Usage:
+    python benchmarks/safe_num.py
+"""
+
+import numbers
+from pathlib import Path
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import SafeNum
+
+
+class OldSafeNum(numbers.Number):
+    """SafeNum before it had __slots__, a shared None and a fast path for plain numbers"""
+
+    def __init__(self, x: float | int | str | None):
+        if x is None:
+            self._x = None
+        elif isinstance(x, str):
+            try:
+                y = float(x)
+                self._x = y
+            except ValueError as e:
+                self._x = None
+        else:
+            self._x = x
+
+    def __int__(self):
+        if self._x is None:
+            return int("nan")
+
+        return int(self._x)
+
+    def __float__(self):
+        if self._x is None:
+            return float("nan")
+
+        return float(self._x)
+
+    def __repr__(self):
+        """string representation"""
+        return str(self._x)
+
+    def __eq__(self, other):
+        """=="""
+        if isinstance(other, OldSafeNum):
+            return self._x == other._x
+
+        return self._x == other
+
+    def __ne__(self, other):
+        """!="""
+        return not self._x == other
+
+    def __neg__(self):
+        """negative"""
+        if self._x is None:
+            return self
+
+        return self.__mul__(-1)
+
+    def __add__(self, other):
+        """+"""
+        if self._x is None or other is None:
+            return OldSafeNum(None)
+
+        return OldSafeNum(self._x + other)
+
+    def __iadd__(self, other):
+        """+="""
+        if other is None:
+            return OldSafeNum(None)
+
+        self._x = self._x + other
+        return self
+
+    def __radd__(self, other):
+        """right side of +"""
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """-"""
+        if self._x is None or other is None:
+            return OldSafeNum(None)
+
+        return self.__add__(-other)
+
+    def __isub__(self, other):
+        """-="""
+        if other is None:
+            return OldSafeNum(None)
+
+        self._x = self._x - other
+        return self
+
+    def __rsub__(self, other):
+        """right side of -"""
+        if other is None:
+            return OldSafeNum(None)
+
+        return other - self._x
+
+    def __mul__(self, other):
+        """*"""
+        if self._x is None or other is None:
+            return OldSafeNum(None)
+
+        return OldSafeNum(self._x * other)
+
+    def __imul__(self, other):
+        """*="""
+        if other is None:
+            return OldSafeNum(None)
+
+        self._x = self._x * other
+        return self
+
+    def __rmul__(self, other):
+        """right side of *"""
+        return self.__mul__(other)
+
+    def __floordiv__(self, other):
+        """// returns an int"""
+        if other == 0 or other is None:
+            return OldSafeNum(None)
+
+        return OldSafeNum(self._x // other)
+
+    def __ifloordiv__(self, other):
+        """//= returns an int"""
+        if other is None:
+            return OldSafeNum(None)
+
+        self._x = self._x // other
+        return self
+
+    def __rfloordiv__(self, other):
+        """// returns an int"""
+        if self is None or other is None or self._x == 0:
+            return OldSafeNum(None)
+
+        return OldSafeNum(other // self._x)
+
+    def __truediv__(self, other):
+        """/ returns a float"""
+        if self._x is None or other is None or other == 0:
+            return OldSafeNum(None)
+
+        return OldSafeNum(self._x / other)
+
+    def __itruediv__(self, other):
+        """/= returns a float"""
+        if self._x is None or other is None:
+            return OldSafeNum(None)
+
+        self._x = self._x / other
+        return self
+
+    def __rtruediv__(self, other):
+        """/ returns a float"""
+        if self._x is None or other is None or self._x == 0:
+            return OldSafeNum(None)
+
+        return OldSafeNum(other / self._x)
+
+    def __pow__(self, other):
+        """**"""
+        if other is None:
+            return OldSafeNum(None)
+
+        return OldSafeNum(self._x**other)
+
+    def __ipow__(self, other):
+        """**="""
+        if other is None:
+            return OldSafeNum(None)
+
+        self._x = self._x**other
+        return self
+
+    def __round__(self, *args, **kwargs):
+        """round"""
+        if self._x is None:
+            return self
+
+        self._x = round(self._x, *args, **kwargs)
+        return self
+
+    @property
+    def is_none(self):
+        """is the value held None"""
+        return self._x is None
+
+
+OPERATIONS = {
+    "SafeNum + SafeNum": "a + b",
+    "SafeNum + int": "a + 1",
+    "float * SafeNum": "1.4 * a",
+    "SafeNum / SafeNum": "a / b",
+    "SafeNum / 0": "a / 0",
+    "None + SafeNum": "n + a",
+    "round(SafeNum, 3)": "round(a / b, 3)",
+}
+
+
+def ns_per_op(cls, statement: str, number: int = 200_000) -> float:
+    env = {"a": cls(12), "b": cls(40), "n": cls(None)}
+    return min(timeit.repeat(statement, globals=env, number=number, repeat=5)) / (
+        number / 1e9
+    )
+
+
+def main():
+    print(f"{'operation':<20} {'old ns':>8} {'new ns':>8} {'speedup':>8}")
+    for name, statement in OPERATIONS.items():
+        old = ns_per_op(OldSafeNum, statement)
+        new = ns_per_op(SafeNum, statement)
+        print(f"{name:<20} {old:>8.0f} {new:>8.0f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Compare calc_team_stats against the per-game loop it replaced, on synthetic seasons that are bigger than a real one
+
+Usage:
+    python benchmarks/team_stats.py
+    python benchmarks/team_stats.py --scales 1 10 100
+"""
+
+import argparse
+import copy
+import math
+from pathlib import Path
+import random
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import calc_stats_from_all_games, calc_team_stats, three_digits
+from models import GameResults, TeamStats
+from utils import RAW_STATS_KEYS, GameTable, Tallies
+
+# about the size of a real regular season
+TEAMS = 12
+GAMES = 132
+
+
+def synthetic_box_scores(scale: int, seed: int = 0) -> List[List[str]]:
+    """a Box%20Scores tab with `scale' times as many games as a real season. some games are missing stats, like disconnects"""
+    rng = random.Random(seed)
+    rows = [["Week"]]
+    for i in range(GAMES * scale):
+        away, home = rng.sample(range(TEAMS), 2)
+        hitting = [str(rng.randint(0, 40)) for _ in range(14)]
+        if rng.random() < 0.05:
+            hitting = []
+        rows.append(
+            [
+                str(i // (TEAMS // 2) + 1),
+                f"Team {away}",
+                str(rng.randint(0, 12)),
+                str(rng.randint(0, 12)),
+                f"Team {home}",
+                str(rng.randint(0, 3)),
+                str(rng.randint(0, 3)),
+                rng.choice(["6", "8", "9", "9", "9", "9.5", "10"]),
+                *hitting,
+            ]
+        )
+    return rows
+
+
+def calc_team_stats_loop(game_results: List[GameResults]) -> dict[str, TeamStats]:
+    """calc_team_stats before it was vectorized"""
+    blank_team_stats_by_game: dict[str, int | float] = {
+        "innings_pitching": 0,
+        "innings_hitting": 0,
+        "wins": 0,
+        "losses": 0,
+        "wins_by_run_rule": 0,
+        "losses_by_run_rule": 0,
+        "ab": 0,
+        "r": 0,
+        "h": 0,
+        "hr": 0,
+        "rbi": 0,
+        "bb": 0,
+        "so": 0,
+        "oppab": 0,
+        "oppr": 0,
+        "opph": 0,
+        "opphr": 0,
+        "opprbi": 0,
+        "oppbb": 0,
+        "oppso": 0,
+        "games_played": 0,
+    }
+
+    raw_stats_by_team: dict[str, dict[str, int | float]] = {}
+
+    league_runs = 0
+    league_innings_hitting = 0
+
+    for game in game_results:
+        away = game["away_team"]
+        home = game["home_team"]
+        if away not in raw_stats_by_team:
+            raw_stats_by_team[away] = copy.deepcopy(blank_team_stats_by_game)
+        if home not in raw_stats_by_team:
+            raw_stats_by_team[home] = copy.deepcopy(blank_team_stats_by_game)
+
+        if game["winner"] == away:
+            raw_stats_by_team[away]["wins"] += 1
+            raw_stats_by_team[home]["losses"] += 1
+        else:
+            raw_stats_by_team[away]["losses"] += 1
+            raw_stats_by_team[home]["wins"] += 1
+
+        if game["winner"] == away and game["run_rule"]:
+            raw_stats_by_team[away]["wins_by_run_rule"] += 1
+            raw_stats_by_team[home]["losses_by_run_rule"] += 1
+        if game["winner"] == home and game["run_rule"]:
+            raw_stats_by_team[home]["wins_by_run_rule"] += 1
+            raw_stats_by_team[away]["losses_by_run_rule"] += 1
+
+        if "away_ab" not in game or game["away_ab"] is None:
+            continue
+
+        away_stats = copy.deepcopy(raw_stats_by_team[away])
+        home_stats = copy.deepcopy(raw_stats_by_team[home])
+
+        away_stats["innings_hitting"] += math.ceil(game["innings"])
+        away_stats["innings_pitching"] += math.floor(game["innings"])
+        home_stats["innings_hitting"] += math.floor(game["innings"])
+        home_stats["innings_pitching"] += math.ceil(game["innings"])
+
+        league_runs += game["away_r"]
+        league_runs += game["home_r"]
+        league_innings_hitting += away_stats["innings_hitting"]
+        league_innings_hitting += home_stats["innings_hitting"]
+
+        for stats, us, them in [
+            (away_stats, "away", "home"),
+            (home_stats, "home", "away"),
+        ]:
+            stats["games_played"] += 1
+            for key, game_key in [
+                ("ab", "ab"),
+                ("r", "r"),
+                ("h", "hits"),
+                ("hr", "hr"),
+                ("rbi", "rbi"),
+                ("bb", "bb"),
+                ("so", "so"),
+            ]:
+                stats[key] += game[f"{us}_{game_key}"]
+                stats[f"opp{key}"] += game[f"{them}_{game_key}"]
+
+        raw_stats_by_team[away] = away_stats
+        raw_stats_by_team[home] = home_stats
+
+    league_era = (
+        three_digits(9 * league_runs / league_innings_hitting)
+        if league_innings_hitting > 0
+        else 0.0
+    )
+
+    teams = list(raw_stats_by_team.keys())
+    stats = calc_stats_from_all_games(
+        [
+            Tallies([raw_stats_by_team[team][key] for key in RAW_STATS_KEYS] + [0])
+            for team in teams
+        ],
+        [league_era] * len(teams),
+        teams=teams,
+    )
+
+    return dict(zip(teams, stats))
+
+
+def best_ms(f, number: int) -> float:
+    return min(timeit.repeat(f, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(
+        f"{'scale':>5} {'games':>7} {'loop ms':>9} {'vectorized ms':>14} {'speedup':>8}"
+    )
+    for scale in args.scales:
+        table = GameTable.from_box_scores(synthetic_box_scores(scale), "XBL", False)
+        game_results = table.to_dicts()
+
+        if calc_team_stats_loop(game_results) != calc_team_stats(table):
+            raise Exception(f"Different team stats at {scale}x")
+
+        number = max(1, 100 // scale)
+        loop = best_ms(lambda: calc_team_stats_loop(game_results), number)
+        vectorized = best_ms(lambda: calc_team_stats(table), number)
+        print(
+            f"{scale:>5} {len(table):>7} {loop:>9.2f} {vectorized:>14.2f} {loop / vectorized:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
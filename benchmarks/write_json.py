@@ -0,0 +1,117 @@
+"""
+Compare peak memory and time of writing careers with json.dumps against write_json, on synthetic careers with more players than the real ones
+
+Usage:
+    python benchmarks/write_json.py
+    python benchmarks/write_json.py --players 50 200 400
+"""
+
+import argparse
+import json
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import collect_career_performances_and_head_to_head
+from utils import CareerTallies, GameTable, SafeEncoder, Symbols, write_json
+
+SEASONS = 18
+GAMES_PER_PLAYER = 30
+
+
+def synthetic_head_to_head(players: int, seed: int = 0) -> List[List[str]]:
+    """a Head to Head tab where every player plays GAMES_PER_PLAYER games a season"""
+    rng = random.Random(seed)
+    rows = [["Season"]]
+    for season in range(1, SEASONS + 1):
+        for week in range(players * GAMES_PER_PLAYER // 2):
+            away, home = rng.sample(range(players), 2)
+            rows.append(
+                [
+                    str(season),
+                    str(week // players + 1),
+                    f"player{away:04}",
+                    "x",
+                    str(rng.randint(0, 12)),
+                    str(rng.randint(0, 12)),
+                    "x",
+                    f"player{home:04}",
+                    "0",
+                    "0",
+                    rng.choice(["6", "9", "9", "9"]),
+                    *[str(rng.randint(0, 40)) for _ in range(14)],
+                ]
+            )
+    return rows
+
+
+def synthetic_careers(players: int) -> dict:
+    symbols = Symbols()
+    head_to_head = [
+        GameTable.from_head_to_head(
+            synthetic_head_to_head(players, seed), league, False, symbols
+        )
+        for (seed, league) in enumerate(["XBL", "AAA", "AA"])
+    ]
+    regular_season, regular_season_head_to_head = (
+        collect_career_performances_and_head_to_head(
+            CareerTallies.empty(symbols).fold(head_to_head)
+        )
+    )
+    return {
+        "regular_season": regular_season,
+        "regular_season_head_to_head": regular_season_head_to_head,
+    }
+
+
+def write_with_dumps(path: Path, data: dict):
+    """how careers.json was written before write_json"""
+    with open(path, "w") as f:
+        f.write(json.dumps(data, cls=SafeEncoder))
+
+
+def measure(write, path: Path, data: dict) -> tuple[float, float]:
+    """(peak MB on top of `data', seconds). tracemalloc slows everything down, so the time comes from a separate run"""
+    start = time.perf_counter()
+    write(path, data)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    write(path, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", nargs="+", type=int, default=[50, 200])
+    args = parser.parse_args()
+
+    print(
+        f"{'players':>7} {'file MB':>8} {'dumps peak MB':>14} {'streamed peak MB':>17} {'dumps s':>8} {'streamed s':>11}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        dumped = Path(tmp).joinpath("dumped.json")
+        streamed = Path(tmp).joinpath("streamed.json")
+        for players in args.players:
+            data = synthetic_careers(players)
+
+            dumps_peak, dumps_seconds = measure(write_with_dumps, dumped, data)
+            streamed_peak, streamed_seconds = measure(write_json, streamed, data)
+            if dumped.read_bytes() != streamed.read_bytes():
+                raise Exception(f"Different JSON with {players} players")
+
+            print(
+                f"{players:>7} {dumped.stat().st_size / 1e6:>8.1f} {dumps_peak:>14.1f} {streamed_peak:>17.2f} {dumps_seconds:>8.2f} {streamed_seconds:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,23 @@ import argparse
 from dotenv import load_dotenv
 import os
 from pathlib import Path
-import urllib.request
+import time
+from typing import List
+
+from utils import (
+    FORMATTED_VALUE,
+    SHEETS_API_URL,
+    UNFORMATTED_VALUE,
+    FetchScheduler,
+    SnapshotStore,
+    TabRequest,
+    fetch_tabs,
+    fetch_tabs_batched,
+    load_manifest,
+    save_changed_tabs,
+    save_manifest,
+    updated_manifest,
+)
 
 load_dotenv()
 
@@ -10,6 +26,17 @@ load_dotenv()
 class SheetsNamespace(argparse.Namespace):
     save_dir: Path
     g_sheets_api_key: str
+    g_sheets_api_url: str
+    workers: int
+    batch: bool
+    requests_per_minute: float
+    max_retries: int
+    snapshot_dir: Path
+    no_snapshot: bool
+    keep_snapshots: int | None
+    incremental: bool
+    full_refresh_every: int
+    unformatted: bool
 
 
 def arg_parser():
@@ -28,6 +55,72 @@ def arg_parser():
         default=os.getenv("G_SHEETS_API_KEY", None),
         help="A Google Sheets API key. If this argument is not set, we'll look for a `G_SHEETS_API_KEY' env var",
     )
+    parser.add_argument(
+        "--g-sheets-api-url",
+        type=str,
+        default=os.getenv("G_SHEETS_API_URL", SHEETS_API_URL),
+        help="Base URL for the Sheets API. Point this at a fake server for testing. If this argument is not set, we'll look for a `G_SHEETS_API_URL' env var",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=8,
+        help="How many tabs to download at the same time",
+    )
+    parser.add_argument(
+        "--batch",
+        "-b",
+        action="store_true",
+        help="Download every tab of a spreadsheet in one request instead of one request per tab",
+    )
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        default=300,
+        help="Budget for requests to the Sheets API, which allows 300 reads per minute. Workers wait their turn instead of going over it",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="How many times to retry a tab after a 429, a 5xx or a timeout",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        default=Path(".cache/snapshots"),
+        help="Where to keep a copy of every version of every tab, so past downloads can be rebuilt with `main.py --g-sheets-dir {snapshot-dir}/manifests/{build}.json'",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Don't save a snapshot of this download",
+    )
+    parser.add_argument(
+        "--keep-snapshots",
+        type=int,
+        default=None,
+        help="Only keep the newest N snapshots, and throw out the tabs only older ones used. Keeps every snapshot by default",
+    )
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help="Only download new rows of the Head to Head tabs, which only ever grow at the bottom",
+    )
+    parser.add_argument(
+        "--full-refresh-every",
+        type=int,
+        default=12,
+        help="With --incremental, download the whole Head to Head tabs after this many incremental downloads to pick up edits to old games",
+    )
+    parser.add_argument(
+        "--unformatted",
+        "-u",
+        action="store_true",
+        help='Save numbers as numbers instead of how they\'re displayed in the spreadsheet (eg 1234 instead of "1,234")',
+    )
 
     return parser
 
@@ -49,25 +142,24 @@ custom_headers = {
 }
 
 
-def collect_league_stats(json_dir: Path, g_sheets_api_key: str):
+def league_tab_requests() -> List[TabRequest]:
+    """the tabs we need from each league's spreadsheet"""
     tabs = ["Standings", "Hitting", "Pitching", "Playoffs", "Box%20Scores"]
 
-    for league in LEAGUES:
-        for tab in tabs:
-            print(f"requesting {league} {tab}...", end="")
-            url = f"https://sheets.googleapis.com/v4/spreadsheets/{LEAGUES[league]}/values/{tab}?key={g_sheets_api_key}"
-
-            req = urllib.request.Request(url, headers=custom_headers)
-
-            with urllib.request.urlopen(req) as res, open(
-                json_dir.joinpath(f"{league}__{tab}.json"), "wb"
-            ) as f:
-                f.write(res.read())
-
-            print(f" saved {league} {tab}")
+    return [
+        {
+            "sheet": league,
+            "spreadsheet_id": LEAGUES[league],
+            "tab": tab,
+            "append_only": False,
+        }
+        for league in LEAGUES
+        for tab in tabs
+    ]
 
 
-def collect_all_time_stats(json_dir: Path, g_sheets_api_key: str):
+def all_time_tab_requests() -> List[TabRequest]:
+    """the tabs we need from the all-time stats spreadsheets"""
     common_tab_suffixes = [
         ["Team", "Abbreviations"],
         ["Head", "to", "Head"],
@@ -83,21 +175,17 @@ def collect_all_time_stats(json_dir: Path, g_sheets_api_key: str):
         for league in ["XBL", "AAA", "AA"]
     ]
 
-    for sheet in ALL_TIME_STATS:
-        for tab in tabs:
-            print(f"requesting {sheet} {tab}...", end="")
-
-            url = f"https://sheets.googleapis.com/v4/spreadsheets/{ALL_TIME_STATS[sheet]}/values/{tab}?key={g_sheets_api_key}"
-
-            req = urllib.request.Request(url, headers=custom_headers)
-
-            data = {}
-            with urllib.request.urlopen(req) as res, open(
-                json_dir.joinpath(f"{sheet}__{tab}.json"), "wb"
-            ) as f:
-                f.write(res.read())
-
-            print(f" saved {sheet} {tab}")
+    return [
+        {
+            "sheet": sheet,
+            "spreadsheet_id": ALL_TIME_STATS[sheet],
+            "tab": tab,
+            # game logs. new games get added to the bottom
+            "append_only": tab.endswith("Head%20to%20Head"),
+        }
+        for sheet in ALL_TIME_STATS
+        for tab in tabs
+    ]
 
 
 def main(args: type[SheetsNamespace]):
@@ -107,8 +195,58 @@ def main(args: type[SheetsNamespace]):
     # make sure the json dir exists
     args.save_dir.mkdir(parents=True, exist_ok=True)
 
-    collect_league_stats(args.save_dir, args.g_sheets_api_key)
-    collect_all_time_stats(args.save_dir, args.g_sheets_api_key)
+    tab_requests = [*league_tab_requests(), *all_time_tab_requests()]
+    manifest = load_manifest(args.save_dir)
+
+    print(f"requesting {len(tab_requests)} tabs with {args.workers} workers...")
+    start = time.perf_counter()
+
+    scheduler = FetchScheduler(
+        requests_per_minute=args.requests_per_minute,
+        max_retries=args.max_retries,
+    )
+
+    fetch = fetch_tabs_batched if args.batch else fetch_tabs
+    results = fetch(
+        tab_requests,
+        args.save_dir,
+        args.g_sheets_api_key,
+        custom_headers,
+        api_url=args.g_sheets_api_url,
+        workers=args.workers,
+        manifest=manifest,
+        scheduler=scheduler,
+        full_refresh_every=args.full_refresh_every if args.incremental else 0,
+        value_render_option=UNFORMATTED_VALUE if args.unformatted else FORMATTED_VALUE,
+    )
+
+    print(
+        f"saved {len(results)} tabs in {time.perf_counter() - start:.2f}s with {scheduler.retries} retries. slowest:"
+    )
+    for result in sorted(results, key=lambda r: r["seconds"], reverse=True)[:5]:
+        print(f"  {result['sheet']} {result['tab']}: {result['seconds']:.2f}s")
+
+    save_manifest(args.save_dir, updated_manifest(results))
+    report = save_changed_tabs(
+        args.save_dir,
+        [result["path"].name for result in results if result["changed"]],
+        {result["path"].name: result["sha256"] for result in results},
+    )
+    print(f"{len(report['changed'])} tabs changed since the last download")
+
+    if not args.no_snapshot:
+        store = SnapshotStore(args.snapshot_dir)
+        for result in results:
+            # identical tabs are only stored once
+            if not store.has(result["sha256"]):
+                store.put(result["path"].read_bytes())
+
+        snapshot = store.save_manifest(report["tabs"])
+        print(f"saved snapshot {snapshot}")
+
+    if args.keep_snapshots is not None:
+        dropped, blobs = SnapshotStore(args.snapshot_dir).prune(args.keep_snapshots)
+        print(f"threw out {len(dropped)} old snapshots and {blobs} tabs only they used")
 
 
 if __name__ == "__main__":
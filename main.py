@@ -7,7 +7,7 @@ Usage:
 """
 
 import argparse
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import copy
 import json
@@ -15,11 +15,12 @@ import logging
 import math
 import os
 from pathlib import Path
-import shutil
-import traceback
-from typing import List
+from typing import Callable, List
+from urllib.parse import quote
 from zoneinfo import ZoneInfo
 
+import numpy as np
+
 from models import *
 from utils import *
 
@@ -28,6 +29,9 @@ from utils import *
 
 LEAGUES = ["XBL", "AAA", "AA"]
 
+# careers.json, one file per player in careers/, or both
+CAREER_OUTPUTS = ["single", "sharded", "both"]
+
 logger = logging.getLogger("stats/main")
 logging.basicConfig(filename="main.log", level=logging.INFO)
 
@@ -36,7 +40,14 @@ class StatsAggNamespace(argparse.Namespace):
     season: int
     g_sheets_dir: Path
     save_dir: Path
+    cache_dir: Path
+    force: bool
     query: List[str]
+    jobs: int
+    careers: str
+    gzip_level: int
+    game_results: str
+    brotli_quality: int | None
 
 
 def arg_parser():
@@ -51,7 +62,7 @@ def arg_parser():
         "-g",
         type=Path,
         default=Path("public/raw"),
-        help="Path to where JSON from Google Sheets is stored",
+        help="Path to where JSON from Google Sheets is stored. Can also be a snapshot manifest from get-sheets.py to build from a past download",
     )
     parser.add_argument(
         "--save-dir",
@@ -64,63 +75,162 @@ def arg_parser():
         "--query",
         "-Q",
         nargs="+",
-        type=List[str],
+        type=str,
         default=[],
-        help="Perform a query on the resulting data. Enter a list of keys to look up. The first key must be either 'career' or 'season'",
+        help="Perform a query on the resulting data. Enter a list of keys to look up. The first key must be either 'career' or 'season'. Or `range PLAYER SEASONS [LEAGUE]' for a player's regular season stats over a stretch of seasons and weeks, like `range alice 12-18' or `range alice 10:3- XBL'",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        "-c",
+        type=Path,
+        default=Path(".cache"),
+        help="Path to where we keep track of previous builds",
+    )
+    parser.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Rebuild everything, even if the raw data hasn't changed since the last build",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="How many processes build the leagues and careers at the same time",
+    )
+    parser.add_argument(
+        "--careers",
+        choices=CAREER_OUTPUTS,
+        default="single",
+        help="Write careers as one careers.json, as one small file per player in careers/ with an index.json, or both",
+    )
+    parser.add_argument(
+        "--game-results",
+        choices=GAME_RESULTS_SHAPES,
+        default="objects",
+        help="Write season and playoffs game results as one object per game, as a table of columns and rows, or as one list per column. Tables and columns don't repeat every key for every game",
+    )
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        choices=range(0, 10),
+        default=9,
+        help="Compression level of the .json.gz copies next to every output. 0 turns them off",
+    )
+    parser.add_argument(
+        "--brotli-quality",
+        type=int,
+        choices=range(0, 12),
+        default=None,
+        help="Also write .json.br copies with this quality. Needs `pip install brotli'",
     )
 
     return parser
 
 
-def two_digits(x: int | float | None) -> int | float:
-    if x is None:
-        return None
-    return round(x, 2)
+BUILD_STATE_FILE = "build-state.json"
 
+# parsed game tables, so we only parse tabs that changed. lives in the cache dir
+GAMES_CACHE_DIR = "games"
 
-def three_digits(x: int | float | None) -> int | float:
-    if x is None:
-        return None
-    return round(x, 3)
+# career tallies from the last build, so we only tally new games. lives in the cache dir
+CAREER_TALLIES_DIR = "careers"
 
+# running tallies for --query range, so repeated queries don't tally every game again. lives in the cache dir
+RANGE_INDEX_FILE = "range_index.npz"
 
-def maybe(row: List[str], col: int, type: callable):
-    """Do our best to get the stat. But it might be missing, in which case return None"""
-    ret = None
-    try:
-        ret = type(row[col])
-    except IndexError as e:
-        # print(f"Failed to get col {col} from {row}")
-        pass
-    return ret
+# sharded careers. lives in the save dir
+CAREER_SHARDS_DIR = "careers"
 
+CAREER_INPUTS = [
+    f"{sheet}__{league}%20{tab}.json"
+    for (sheet, tab) in [
+        ("CAREER_STATS", "Team%20Abbreviations"),
+        ("CAREER_STATS", "Head%20to%20Head"),
+        ("PLAYOFF_STATS", "Head%20to%20Head"),
+    ]
+    for league in LEAGUES
+]
 
-def sum_dict_tallies(*dicts: List[dict]):
-    """given 2+ dicts with int or set keys, return a dict with the ints summed or sets combined"""
 
-    # prune any Nones
-    dicts = [d for d in dicts if d is not None]
+def season_inputs(league: str) -> List[str]:
+    """raw files that go into a league's season stats"""
+    return [
+        f"{league}__Standings.json",
+        f"{league}__Box%20Scores.json",
+        f"{league}__Playoffs.json",
+    ]
+
+
+def code_fingerprint() -> str:
+    """changing the code has to invalidate previous builds too"""
+    root = Path(__file__).parent
+    sources = [root.joinpath("main.py"), root.joinpath("models.py")] + sorted(
+        root.joinpath("utils").glob("*.py")
+    )
+    return hash_bytes(b"".join([source.read_bytes() for source in sources]))
 
-    if len(dicts) == 0:
+
+def stage_fingerprint(
+    tab_hashes: dict[str, str] | None,
+    inputs: List[str],
+    season: int,
+    options: dict | None = None,
+) -> str | None:
+    """identifies everything that goes into a stage of the build. None if we can't tell what the inputs are. `options' are any arguments that change the stage's output"""
+    if tab_hashes is None or any([name not in tab_hashes for name in inputs]):
         return None
 
-    if len(dicts) == 1:
-        return dicts[0]
+    return hash_bytes(
+        json.dumps(
+            {
+                "code": code_fingerprint(),
+                "season": season,
+                "inputs": {name: tab_hashes[name] for name in inputs},
+                **({"options": options} if options is not None else {}),
+            },
+            sort_keys=True,
+        ).encode()
+    )
+
+
+def load_build_state(cache_dir: Path) -> dict:
+    """{"stages": {stage: fingerprint}} from the previous build"""
+    path = cache_dir.joinpath(BUILD_STATE_FILE)
+    if not path.exists():
+        return {"stages": {}}
+
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def save_build_state(cache_dir: Path, build_state: dict):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(cache_dir.joinpath(BUILD_STATE_FILE), "w") as f:
+        f.write(json.dumps(build_state, indent=2))
+
+
+def load_values(g_sheets_dir: Path, name: str) -> List[List[Cell]]:
+    """rows from a raw tab. `g_sheets_dir' is either a dir or a snapshot manifest"""
+    return json.loads(read_raw_tab(g_sheets_dir, name))["values"]
+
+
+def two_digits(x: int | float | None) -> int | float:
+    if x is None:
+        return None
+    return round(x, 2)
 
-    result = {}
-    for key in dicts[0].keys():
-        if all([key in d for d in dicts]):
-            if all([isinstance(d[key], int) for d in dicts]):
-                result[key] = sum([d[key] for d in dicts])
-            if all([isinstance(d[key], set) for d in dicts]):
-                result[key] = set.union(*[d[key] for d in dicts])
 
-    return result
+def three_digits(x: int | float | None) -> int | float:
+    if x is None:
+        return None
+    return round(x, 3)
 
 
 def collect_team_records(
     league: str,
-    standings_data: List[List[str]],
+    standings_data: List[List[Cell]],
 ):
     """cleaned up team wins and losses for the regular season"""
     team_records: dict[str, SeasonTeamRecord] = {}
@@ -129,22 +239,24 @@ def collect_team_records(
     get_row: int = lambda r: r + 2 if league == "AA" else r
 
     for row in standings_data[1:]:
-        team = row[1]
+        team = to_str(row[1])
         team_records[team] = {
             "team": team,
-            "rank": int(row[0]),
-            "ego_starting": int(row[2]) if league == "AA" else None,
-            "ego_current": int(row[3]) if league == "AA" else None,
-            "wins": int(row[get_row(2)]),
-            "losses": int(row[get_row(3)]),
-            "gb": 0.0 if row[get_row(4)] == "-" else float(row[get_row(4)]),
-            "win_pct": float(row[get_row(5)]),
-            "win_pct_vs_500": 0.0 if row[get_row(6)] == "-" else float(row[get_row(6)]),
-            "sweeps_w": int(row[get_row(7)]),
-            "splits": int(row[get_row(8)]),
-            "sweeps_l": int(row[get_row(9)]),
-            "sos": int(row[get_row(10)]),
-            "elo": int(row[get_row(19)].replace(",", "")),
+            "rank": to_int(row[0]),
+            "ego_starting": to_rounded_int(row[2]) if league == "AA" else None,
+            "ego_current": to_rounded_int(row[3]) if league == "AA" else None,
+            "wins": to_int(row[get_row(2)]),
+            "losses": to_int(row[get_row(3)]),
+            "gb": 0.0 if row[get_row(4)] == "-" else to_float(row[get_row(4)]),
+            "win_pct": to_float(row[get_row(5)]),
+            "win_pct_vs_500": (
+                0.0 if row[get_row(6)] == "-" else to_float(row[get_row(6)])
+            ),
+            "sweeps_w": to_int(row[get_row(7)]),
+            "splits": to_int(row[get_row(8)]),
+            "sweeps_l": to_int(row[get_row(9)]),
+            "sos": to_rounded_int(row[get_row(10)]),
+            "elo": to_rounded_int(row[get_row(19)], thousands=True),
         }
 
     team_count = len(team_records)
@@ -161,78 +273,29 @@ def collect_team_records(
     return team_records
 
 
-def collect_game_results(playoffs: bool, box_score_data: List[List[str]], league: str):
+def collect_game_results(
+    playoffs: bool, g_sheets_dir: Path, league: str, game_cache: GameCache
+) -> GameTable:
     """convert the Box%20Score and Playoffs spreadsheet tabs into structured data"""
-    if playoffs:
-        game_results: List[PlayoffsGameResults] = []
-    else:
-        game_results: List[SeasonGameResults] = []
-
-    # regular season has errors but playoffs do not
-    get_col = lambda c: c if playoffs else c + 2
-
-    for game in box_score_data[1:]:
-        try:
-            away_team = game[1]
-            home_team = game[4]
-            away_score = int(game[2])
-            home_score = int(game[3])
-            innings = float(game[get_col(5)])
-            results = {
-                "away_team": away_team,
-                "home_team": home_team,
-                "away_score": away_score,
-                "home_score": home_score,
-                "innings": innings,
-                "winner": away_team if away_score > home_score else home_team,
-                "run_rule": innings <= 8.0,
-                "league": league,
-            }
-            if playoffs:
-                results["round"] = game[0]
-            else:
-                results["week"] = int(game[0])
-        except ValueError as e:
-            print("Something is horribly wrong with this game:")
-            print(game)
-            continue
-
-        try:
-            extra_stats = {
-                "away_e": None if playoffs else int(game[5]),
-                "home_e": None if playoffs else int(game[6]),
-                # not all of these are always recorded. missing records are probably from disconnects
-                "away_ab": maybe(game, get_col(6), int),
-                "away_r": maybe(game, get_col(7), int),
-                "away_hits": maybe(game, get_col(8), int),
-                "away_hr": maybe(game, get_col(9), int),
-                "away_rbi": maybe(game, get_col(10), int),
-                "away_bb": maybe(game, get_col(11), int),
-                "away_so": maybe(game, get_col(12), int),
-                "home_ab": maybe(game, get_col(13), int),
-                "home_r": maybe(game, get_col(14), int),
-                "home_hits": maybe(game, get_col(15), int),
-                "home_hr": maybe(game, get_col(16), int),
-                "home_rbi": maybe(game, get_col(17), int),
-                "home_bb": maybe(game, get_col(18), int),
-                "home_so": maybe(game, get_col(19), int),
-            }
-
-            results |= extra_stats
-
-        except ValueError as e:
-            # some column is wrong in the extra stats. don't collect them
-            pass
-
-        game_results.append(results)
-
-    return game_results
+    tab = "Playoffs" if playoffs else "Box%20Scores"
+    return game_cache.games(
+        g_sheets_dir,
+        f"{league}__{tab}.json",
+        lambda box_score_data, symbols: GameTable.from_box_scores(
+            box_score_data, league, playoffs, symbols
+        ),
+    )
 
 
 def calc_stats_from_all_games(
-    raw_stats: RawStats, league_era: float, team="", player=""
-) -> TeamStats:
-    """given everything a player/team did across all games, calculate stat lines"""
+    tallies: List[Tallies],
+    league_eras: List[float | None],
+    teams: List[str] | None = None,
+    players: List[str] | None = None,
+    seasons: SymbolTable | None = None,
+) -> List[TeamStats]:
+    """given everything some players/teams did across all games, calculate all of their stat lines at once. `league_eras' has the league ERA for each one. `seasons' names the seasons in `tallies' when we keep track of them"""
+    n = len(tallies)
     per_9_hitting = lambda key, digits=3: (
         three_digits((raw_stats[key] / raw_stats["innings_hitting"]) * 9)
         if digits == 3
@@ -245,13 +308,19 @@ def calc_stats_from_all_games(
     )
 
     # use Nones as blackholes. if any stat turns to None, it stays None without raising any errors
-    for key in raw_stats.keys():
-        if raw_stats[key] is None or isinstance(raw_stats[key], int):
-            raw_stats[key] = SafeNum(raw_stats[key])
+    totals = np.array([t.totals for t in tallies], dtype=np.int64).reshape(
+        (n, len(TALLY_KEYS))
+    )
+    missing = np.array([t.missing for t in tallies], dtype=np.int64)
+    valid = (missing[:, None] >> np.arange(len(TALLY_KEYS))) & 1 == 0
+    raw_stats = {
+        key: SafeArray(totals[:, TALLY_INDEX[key]], valid[:, TALLY_INDEX[key]])
+        for key in RAW_STATS_KEYS
+    }
 
-    stats: TeamStats = {
-        "team": team,
-        "player": player,
+    columns = {
+        "team": teams if teams is not None else [""] * n,
+        "player": players if players is not None else [""] * n,
         # hitting
         "rs": raw_stats["r"],
         "rs9": per_9_hitting("r", 2),
@@ -296,10 +365,10 @@ def calc_stats_from_all_games(
             (raw_stats["opph"] + raw_stats["oppbb"] - raw_stats["oppr"])
             / (raw_stats["opph"] + raw_stats["oppbb"] - 1.4 * raw_stats["opphr"])
         ),
-        "e": None,
+        "e": [None] * n,
         # TODO is this right?
         "fip": two_digits(
-            SafeNum(league_era)
+            SafeArray(league_eras)
             - (
                 (
                     raw_stats["opphr"] * 13
@@ -325,138 +394,67 @@ def calc_stats_from_all_games(
         "losses_by_run_rule": raw_stats["losses_by_run_rule"],
     }
 
-    if "seasons" in raw_stats:
-        stats["seasons"] = sorted(list(raw_stats["seasons"]))
+    keys = list(columns.keys())
+    values = [
+        column.tolist() if isinstance(column, SafeArray) else column
+        for column in columns.values()
+    ]
+    stats: List[TeamStats] = [dict(zip(keys, row)) for row in zip(*values)]
+
+    if seasons is not None:
+        for stat_line, t in zip(stats, tallies):
+            stat_line["seasons"] = sorted([seasons.name(id) for id in t.season_ids()])
 
     return stats
 
 
-def calc_team_stats(game_results: List[GameResults]):
-    """do math to get stats about team performances over the games passed in to this function. we get a few stats that aren't in the spreadsheets"""
+def calc_league_era(tallies: Tallies) -> float | None:
+    """from the tallies for a whole league. None if there weren't any innings"""
+    if (
+        tallies["runs_with_innings"] is None
+        or tallies["innings_hitting"] is None
+        or tallies["innings_hitting"] == 0
+    ):
+        return None
 
-    stats_by_team: dict[str, TeamStats] = {}
-
-    blank_team_stats_by_game: RawStats = {
-        "innings_pitching": 0,
-        "innings_hitting": 0,
-        "wins": 0,
-        "losses": 0,
-        "wins_by_run_rule": 0,
-        "losses_by_run_rule": 0,
-        "ab": 0,
-        "r": 0,
-        "h": 0,
-        "hr": 0,
-        "rbi": 0,
-        "bb": 0,
-        "so": 0,
-        "oppab": 0,
-        "oppr": 0,
-        "opph": 0,
-        "opphr": 0,
-        "opprbi": 0,
-        "oppbb": 0,
-        "oppso": 0,
-        "games_played": 0,
-    }
+    return three_digits(9 * tallies["runs_with_innings"] / tallies["innings_hitting"])
 
-    raw_stats_by_team: dict[str, dict[str, int | float]] = {}
 
-    league_runs = 0
-    league_innings_hitting = 0
+def calc_team_stats(games: GameTable):
+    """do math to get stats about team performances over the games passed in to this function. we get a few stats that aren't in the spreadsheets"""
 
-    # collect stats by team by looking at each game
-    for game in game_results:
-        away = game["away_team"]
-        home = game["home_team"]
-        if away not in raw_stats_by_team:
-            raw_stats_by_team[away] = copy.deepcopy(blank_team_stats_by_game)
-        if home not in raw_stats_by_team:
-            raw_stats_by_team[home] = copy.deepcopy(blank_team_stats_by_game)
+    teams = games.side_symbols
 
-        if game["winner"] == away:
-            raw_stats_by_team[away]["wins"] += 1
-            raw_stats_by_team[home]["losses"] += 1
-        else:
-            raw_stats_by_team[away]["losses"] += 1
-            raw_stats_by_team[home]["wins"] += 1
-
-        if game["winner"] == away and game["run_rule"]:
-            raw_stats_by_team[away]["wins_by_run_rule"] += 1
-            raw_stats_by_team[home]["losses_by_run_rule"] += 1
-        if game["winner"] == home and game["run_rule"]:
-            raw_stats_by_team[home]["wins_by_run_rule"] += 1
-            raw_stats_by_team[away]["losses_by_run_rule"] += 1
-
-        if "away_ab" not in game or game["away_ab"] is None:
-            # we're missing stats. don't count this game
-            continue
+    team, _, tallies, missing = tally_games(games)
+    totals = group_sum(team, tallies, len(teams)).tolist()
+    totals_missing = group_any(team, missing, len(teams)).tolist()
 
-        away_stats = copy.deepcopy(raw_stats_by_team[away])
-        home_stats = copy.deepcopy(raw_stats_by_team[home])
-
-        away_stats["innings_hitting"] += math.ceil(game["innings"])
-        away_stats["innings_pitching"] += math.floor(game["innings"])
-        home_stats["innings_hitting"] += math.floor(game["innings"])
-        home_stats["innings_pitching"] += math.ceil(game["innings"])
-
-        league_runs += game["away_r"]
-        league_runs += game["home_r"]
-        league_innings_hitting += away_stats["innings_hitting"]
-        league_innings_hitting += home_stats["innings_hitting"]
-
-        # capture away team stats
-        away_stats["games_played"] += 1
-        away_stats["ab"] += game["away_ab"]
-        away_stats["r"] += game["away_r"]
-        away_stats["h"] += game["away_hits"]
-        away_stats["hr"] += game["away_hr"]
-        away_stats["rbi"] += game["away_rbi"]
-        away_stats["bb"] += game["away_bb"]
-        away_stats["so"] += game["away_so"]
-        away_stats["oppab"] += game["home_ab"]
-        away_stats["oppr"] += game["home_r"]
-        away_stats["opph"] += game["home_hits"]
-        away_stats["opphr"] += game["home_hr"]
-        away_stats["opprbi"] += game["home_rbi"]
-        away_stats["oppbb"] += game["home_bb"]
-        away_stats["oppso"] += game["home_so"]
-
-        # capture home team stats
-        home_stats["games_played"] += 1
-        home_stats["ab"] += game["home_ab"]
-        home_stats["r"] += game["home_r"]
-        home_stats["h"] += game["home_hits"]
-        home_stats["hr"] += game["home_hr"]
-        home_stats["rbi"] += game["home_rbi"]
-        home_stats["bb"] += game["home_bb"]
-        home_stats["so"] += game["home_so"]
-        home_stats["oppab"] += game["away_ab"]
-        home_stats["oppr"] += game["away_r"]
-        home_stats["opph"] += game["away_hits"]
-        home_stats["opphr"] += game["away_hr"]
-        home_stats["opprbi"] += game["away_rbi"]
-        home_stats["oppbb"] += game["away_bb"]
-        home_stats["oppso"] += game["away_so"]
-
-        raw_stats_by_team[away] = away_stats
-        raw_stats_by_team[home] = home_stats
+    # the league adds up each team's innings hitting so far after every game, not the innings in each game
+    innings_hitting = TALLY_INDEX["innings_hitting"]
+    running_innings_hitting = group_cumsum(team, tallies[:, innings_hitting])
+    played = tallies[:, TALLY_INDEX["games_played"]] > 0
+    league_totals = tallies.sum(axis=0)
+    league_totals[innings_hitting] = running_innings_hitting[played].sum()
 
     league_era = (
-        three_digits(9 * league_runs / league_innings_hitting)
+        calc_league_era(
+            Tallies.from_row(league_totals.tolist(), missing.any(axis=0).tolist())
+        )
         # before the season starts, we have no innings hitting
-        if league_innings_hitting > 0
+        if league_totals[innings_hitting] > 0
         else 0.0
     )
 
-    # do math to get aggregate stats
-    for team in raw_stats_by_team.keys():
-        raw_stats = raw_stats_by_team[team]
-        stats_by_team[team] = calc_stats_from_all_games(
-            raw_stats, league_era, team=team
-        )
+    # do math to get aggregate stats. teams are in the order they first played
+    ids = first_seen(team).tolist()
+    names = [teams.name(id) for id in ids]
+    stats = calc_stats_from_all_games(
+        [Tallies.from_row(totals[id], totals_missing[id]) for id in ids],
+        [league_era] * len(ids),
+        teams=names,
+    )
 
-    return stats_by_team
+    return dict(zip(names, stats))
 
 
 def collect_playoffs_team_records(results: List[PlayoffsGameResults]):
@@ -514,7 +512,9 @@ def collect_playoffs_team_records(results: List[PlayoffsGameResults]):
     return records_by_team
 
 
-def build_season_stats(league: str, g_sheets_dir: Path, season: int) -> SeasonStats:
+def build_season_stats(
+    league: str, g_sheets_dir: Path, season: int, game_cache: GameCache
+) -> SeasonStats:
     """parse JSONs from g sheets and collect season stats"""
 
     print(f"Running season {season} {league}...")
@@ -528,51 +528,40 @@ def build_season_stats(league: str, g_sheets_dir: Path, season: int) -> SeasonSt
         "playoffs_game_results": [],
     }
 
-    standings_data: List[List[str]] = None
-    with open(g_sheets_dir.joinpath(f"{league}__Standings.json")) as f:
-        raw_data = json.loads(f.read())
-        standings_data = raw_data["values"]
+    standings_data = load_values(g_sheets_dir, f"{league}__Standings.json")
 
     season_team_records = collect_team_records(league, standings_data)
     data["season_team_records"] = season_team_records
 
-    season_scores_data = None
-    with open(g_sheets_dir.joinpath(f"{league}__Box%20Scores.json")) as f:
-        raw_data = json.loads(f.read())
-        season_scores_data = raw_data["values"]
-
-    season_game_results = collect_game_results(False, season_scores_data, league)
+    season_games = collect_game_results(False, g_sheets_dir, league, game_cache)
+    season_game_results = season_games.to_dicts()
     data["season_game_results"] = season_game_results
-    data["season_team_stats"] = calc_team_stats(season_game_results)
-
-    playoffs_scores_data = None
-    with open(g_sheets_dir.joinpath(f"{league}__Playoffs.json")) as f:
-        raw_data = json.loads(f.read())
-        playoffs_scores_data = raw_data["values"]
+    data["season_team_stats"] = calc_team_stats(season_games)
 
-    playoffs_game_results = collect_game_results(True, playoffs_scores_data, league)
+    playoffs_games = collect_game_results(True, g_sheets_dir, league, game_cache)
+    playoffs_game_results = playoffs_games.to_dicts()
     data["playoffs_game_results"] = playoffs_game_results
     data["playoffs_team_records"] = collect_playoffs_team_records(playoffs_game_results)
 
     # no spreadsheet has these. we have to run the numbers ourselves
-    data["playoffs_team_stats"] = calc_team_stats(playoffs_game_results)
+    data["playoffs_team_stats"] = calc_team_stats(playoffs_games)
 
     return data
 
 
 def collect_players(
-    xbl_abbrev_data: List[List[str]],
-    aaa_abbrev_data: List[List[str]],
-    aa_abbrev_data: List[List[str]],
+    xbl_abbrev_data: List[List[Cell]],
+    aaa_abbrev_data: List[List[Cell]],
+    aa_abbrev_data: List[List[Cell]],
 ) -> dict[str, Player]:
     """Find everyone who ever played in any league and when they played"""
     players: dict[str, Player] = {}
 
     for row in xbl_abbrev_data[1:]:
-        season = int(row[0])
-        team_name = row[1]
-        team_abbrev = row[2]
-        player = row[3]
+        season = to_int(row[0])
+        team_name = to_str(row[1])
+        team_abbrev = to_str(row[2])
+        player = to_str(row[3])
 
         if player not in players:
             players[player] = {"player": player, "teams": []}
@@ -588,10 +577,10 @@ def collect_players(
         )
 
     for row in aaa_abbrev_data[1:]:
-        season = int(row[0])
-        team_name = row[1]
-        team_abbrev = row[2]
-        player = row[3]
+        season = to_int(row[0])
+        team_name = to_str(row[1])
+        team_abbrev = to_str(row[2])
+        player = to_str(row[3])
 
         if player not in players:
             players[player] = {"player": player, "teams": []}
@@ -607,10 +596,10 @@ def collect_players(
         )
 
     for row in aa_abbrev_data[1:]:
-        season = int(row[0])
-        team_name = row[1]
-        team_abbrev = row[2]
-        player = row[3]
+        season = to_int(row[0])
+        team_name = to_str(row[1])
+        team_abbrev = to_str(row[2])
+        player = to_str(row[3])
 
         if player not in players:
             players[player] = {"player": player, "teams": []}
@@ -649,486 +638,186 @@ def get_active_players(
     return active_players
 
 
-def get_career_games_results(
-    game: List[str], playoffs: bool, league: str
-) -> GameResults:
-    away_player = game[2]
-    home_player = game[7]
-
-    try:
-        season = game[0]
-        week_or_round = game[1]
-        away_score = int(game[4])
-        home_score = int(game[5])
-        innings = maybe(game, 10, float)
-        results: GameResults = {
-            "season": season,
-            "league": league,
-            "away_player": away_player,
-            "home_player": home_player,
-            "away_score": away_score,
-            "home_score": home_score,
-            "innings": innings,
-            "winner": away_player if away_score > home_score else home_player,
-            "run_rule": True if innings is not None and innings <= 8.0 else False,
-        }
-        if playoffs:
-            results["round"] = week_or_round
-        else:
-            results["week"] = int(week_or_round)
-    except ValueError as e:
-        # something went horribly wrong. don't count this game
-        logger.warning(
-            f"Missing critical information from the following game. It could not be recorded. {', '.join(game)}"
+def collect_head_to_head_games(
+    playoffs: bool, g_sheets_dir: Path, game_cache: GameCache
+) -> List[GameTable]:
+    """every league's Head to Head tab, sharing one set of symbols"""
+    sheet = "PLAYOFF_STATS" if playoffs else "CAREER_STATS"
+    symbols = Symbols()
+    return [
+        game_cache.games(
+            g_sheets_dir,
+            f"{sheet}__{league}%20Head%20to%20Head.json",
+            lambda head_to_head_data, symbols: GameTable.from_head_to_head(
+                head_to_head_data, league, playoffs, symbols
+            ),
+            symbols,
         )
-        return None
-
-    try:
-        extra_stats = {
-            "away_e": None if playoffs else maybe(game, 8, int),
-            "home_e": None if playoffs else maybe(game, 9, int),
-            # not all of these are always recorded. missing records are probably from disconnects
-            "away_ab": maybe(game, 11, int),
-            "away_r": maybe(game, 12, int),
-            "away_hits": maybe(game, 13, int),
-            "away_hr": maybe(game, 14, int),
-            "away_rbi": maybe(game, 15, int),
-            "away_bb": maybe(game, 16, int),
-            "away_so": maybe(game, 17, int),
-            "home_ab": maybe(game, 18, int),
-            "home_r": maybe(game, 19, int),
-            "home_hits": maybe(game, 20, int),
-            "home_hr": maybe(game, 21, int),
-            "home_rbi": maybe(game, 22, int),
-            "home_bb": maybe(game, 23, int),
-            "home_so": maybe(game, 24, int),
-        }
-
-        results |= extra_stats
-
-    except ValueError as e:
-        # some column is wrong in the extra stats. don't collect them
-        pass
-
-    return results
+        for league in LEAGUES
+    ]
 
 
 def collect_career_performances_and_head_to_head(
-    playoffs: bool,
-    xbl_head_to_head_data: List[List[str]],
-    aaa_head_to_head_data: List[List[str]],
-    aa_head_to_head_data: List[List[str]],
+    career_tallies: CareerTallies,
+    frozen_seasons: FrozenSeasons | None = None,
 ) -> List[HeadToHead]:
-    """get career stats and head to head stats"""
+    """get career stats and head to head stats. stats by season come from `frozen_seasons' for seasons that are over, and seasons that are over but not frozen yet get frozen"""
     regular_season: dict[str, CareerSeasonPerformance] = {}
     regular_season_head_to_head: dict[str, dict[str, HeadToHead]] = {}
 
-    # get nicely formatted results
-    all_xbl_games = [
-        results
-        for game in xbl_head_to_head_data[1:]
-        if (results := get_career_games_results(game, playoffs, "XBL")) is not None
-    ]
-    all_aaa_games = [
-        results
-        for game in aaa_head_to_head_data[1:]
-        if (results := get_career_games_results(game, playoffs, "AAA")) is not None
-    ]
-    all_aa_games = [
-        results
-        for game in aa_head_to_head_data[1:]
-        if (results := get_career_games_results(game, playoffs, "AA")) is not None
-    ]
-
-    all_game_results = [*all_xbl_games, *all_aaa_games, *all_aa_games]
-
-    blank_team_stats_by_game: TeamStats = {
-        "innings_pitching": 0,
-        "innings_hitting": 0,
-        "wins": 0,
-        "losses": 0,
-        "wins_by_run_rule": 0,
-        "losses_by_run_rule": 0,
-        "ab": 0,
-        "r": 0,
-        "h": 0,
-        "hr": 0,
-        "rbi": 0,
-        "bb": 0,
-        "so": 0,
-        "oppab": 0,
-        "oppr": 0,
-        "opph": 0,
-        "opphr": 0,
-        "opprbi": 0,
-        "oppbb": 0,
-        "oppso": 0,
-        "games_played": 0,
-        # not in TeamStats. only used temporarily
-        "seasons": set(),
-    }
-
-    xbl_league_runs = 0
-    aaa_league_runs = 0
-    aa_league_runs = 0
-    xbl_league_innings_hitting = 0
-    aaa_league_innings_hitting = 0
-    aa_league_innings_hitting = 0
-    runs_by_league_by_season = {
-        "XBL": defaultdict(int),
-        "AAA": defaultdict(int),
-        "AA": defaultdict(int),
-    }
-    innings_hitting_by_league_by_season = {
-        "XBL": defaultdict(int),
-        "AAA": defaultdict(int),
-        "AA": defaultdict(int),
-    }
-
-    # {player: {season_X: league, season_Y: league}}
-    league_for_season_by_player: dict[str, dict[str, str]] = {}
-
-    # {player: {season_X: stats, season_y: stats}}
-    raw_stats_for_season_by_player: dict[str, dict[str, RawStats]] = {}
-
-    # keyed on player names
-    xbl_raw_stats_by_player: dict[str, RawStats] = {}
-    aaa_raw_stats_by_player: dict[str, RawStats] = {}
-    aa_raw_stats_by_player: dict[str, RawStats] = {}
-
-    # keyed on player names in alphabetical order
-    head_to_head_by_players = {}
-
-    # sum per games stats to get all-time stats per player and head-to-head stats per matchup in the same loop. we have to:
-    #   * translate game home/away to each player
-    #   * sort stats by league
-    #   * sort stats by matchups
-    #   * collect league ERAs to calculate FIP
-    #
-    # we also skip any games for players who are inactive, or matchups when 1 or both players are inactive
-    for game in all_game_results:
-        away_player = game["away_player"]
-        home_player = game["home_player"]
-        season = game["season"]
-        # this will eventually be turned into JSON, and TS/lodash is weird about dict keys that are numbers
-        season_key = f"season_{season}"
-        league = game["league"]
-
-        is_xbl_game = league == "XBL"
-        is_aaa_game = league == "AAA"
-        is_aa_game = league == "AA"
-
-        # track who played which season when
-        if away_player not in league_for_season_by_player:
-            league_for_season_by_player[away_player] = {}
-        if home_player not in league_for_season_by_player:
-            league_for_season_by_player[home_player] = {}
-
-        league_for_season_by_player[away_player][season_key] = league
-        league_for_season_by_player[home_player][season_key] = league
-
-        # prep to track stats by season for each player
-        if away_player not in raw_stats_for_season_by_player:
-            raw_stats_for_season_by_player[away_player] = {}
-        if home_player not in raw_stats_for_season_by_player:
-            raw_stats_for_season_by_player[home_player] = {}
-
-        if season_key not in raw_stats_for_season_by_player[away_player]:
-            raw_stats_for_season_by_player[away_player][season_key] = copy.deepcopy(
-                blank_team_stats_by_game
-            )
-        if season_key not in raw_stats_for_season_by_player[home_player]:
-            raw_stats_for_season_by_player[home_player][season_key] = copy.deepcopy(
-                blank_team_stats_by_game
-            )
+    # players, leagues and seasons are IDs until the very end
+    symbols = career_tallies.symbols
+    players = symbols.players
+    season_names = symbols.seasons.names
+    xbl = symbols.leagues.ids["XBL"]
+    aaa = symbols.leagues.ids["AAA"]
+    aa = symbols.leagues.ids["AA"]
+
+    # every tally for every (player, league, season, opponent). every other total adds these up
+    totals = career_tallies.totals
+    totals_missing = career_tallies.missing
+    key_player, key_league, key_season, key_opponent = career_tallies.keys.T
+
+    if frozen_seasons is None:
+        frozen_seasons = FrozenSeasons({})
+    frozen = [frozen_seasons.get(name) for name in season_names]
+    live = ~np.isin(
+        key_season,
+        [season_id for (season_id, season) in enumerate(frozen) if season is not None],
+    )
 
-        # prep for tracking stats by league for each player
-        if is_xbl_game and away_player not in xbl_raw_stats_by_player:
-            xbl_raw_stats_by_player[away_player] = copy.deepcopy(
-                blank_team_stats_by_game
-            )
-        elif is_aaa_game and away_player not in aaa_raw_stats_by_player:
-            aaa_raw_stats_by_player[away_player] = copy.deepcopy(
-                blank_team_stats_by_game
-            )
-        elif is_aa_game and away_player not in aa_raw_stats_by_player:
-            aa_raw_stats_by_player[away_player] = copy.deepcopy(
-                blank_team_stats_by_game
+    def regroup(*columns: np.ndarray, rows=slice(None)) -> dict[tuple, Tallies]:
+        """add up the totals by some of the keys, keeping track of the seasons that went into them. keyed on tuples of IDs, in the order they were first played. `rows' picks which totals to add up"""
+        ids, regrouped = group_ids(*[column[rows] for column in columns])
+        tallies = [
+            Tallies.from_row(group_totals, group_missing)
+            for (group_totals, group_missing) in zip(
+                group_sum(ids, totals[rows], len(regrouped)).tolist(),
+                group_any(ids, totals_missing[rows], len(regrouped)).tolist(),
             )
+        ]
+        for id, season_id in group_ids(ids, key_season[rows])[1].tolist():
+            tallies[id].add_season(season_id)
+
+        return dict(zip([tuple(key) for key in regrouped.tolist()], tallies))
+
+    # all-time is every league put together
+    by_player = regroup(key_player)
+    by_player_league = regroup(key_player, key_league)
+    by_player_season = regroup(key_player, key_season, rows=live)
+    by_matchup = regroup(key_player, key_opponent)
+
+    # use these to calculate FIP
+    league_tallies = [
+        Tallies.from_row(league_totals, league_missing)
+        for (league_totals, league_missing) in zip(
+            group_sum(key_league, totals, len(symbols.leagues)).tolist(),
+            group_any(key_league, totals_missing, len(symbols.leagues)).tolist(),
+        )
+    ]
+    xbl_league_era = calc_league_era(league_tallies[xbl])
+    aaa_league_era = calc_league_era(league_tallies[aaa])
+    aa_league_era = calc_league_era(league_tallies[aa])
 
-        if is_xbl_game and home_player not in xbl_raw_stats_by_player:
-            xbl_raw_stats_by_player[home_player] = copy.deepcopy(
-                blank_team_stats_by_game
-            )
-        elif is_aaa_game and home_player not in aaa_raw_stats_by_player:
-            aaa_raw_stats_by_player[home_player] = copy.deepcopy(
-                blank_team_stats_by_game
-            )
-        elif is_aa_game and home_player not in aa_raw_stats_by_player:
-            aa_raw_stats_by_player[home_player] = copy.deepcopy(
-                blank_team_stats_by_game
+    all_time_league_tallies = Tallies.merge(
+        league_tallies[xbl], league_tallies[aaa], league_tallies[aa]
+    )
+    all_time_league_tallies.totals[TALLY_INDEX["innings_hitting"]] = sum(
+        [
+            league_tallies[league_id].totals[TALLY_INDEX["innings_hitting"]]
+            for league_id in [xbl, aaa, aaa]
+        ]
+    )
+    all_time_league_era = calc_league_era(all_time_league_tallies)
+
+    # only seasons with innings have an ERA
+    era_by_league_by_season = [{} for _ in symbols.leagues.names]
+    live_league_seasons = regroup(key_league, key_season, rows=live)
+    for league_id, season_id in group_ids(key_league, key_season)[1].tolist():
+        if frozen[season_id] is not None:
+            league_name = symbols.leagues.name(league_id)
+            if league_name in frozen[season_id]["eras"]:
+                era_by_league_by_season[league_id][season_id] = frozen[season_id][
+                    "eras"
+                ][league_name]
+        elif live_league_seasons[(league_id, season_id)]["innings_hitting"] > 0:
+            era_by_league_by_season[league_id][season_id] = calc_league_era(
+                live_league_seasons[(league_id, season_id)]
             )
 
-        # alphabetical tuple of player names
-        h2h_key = tuple(sorted((home_player, away_player)))
-        (player_a, player_z) = h2h_key
-
-        # use this to figure out how players in raw_stats and h2h_stats translate
-        player_a_is_away = player_a == away_player
-
-        # where we'll store h2h stats
-        if player_a not in head_to_head_by_players:
-            head_to_head_by_players[player_a] = {}
-        if player_z not in head_to_head_by_players[player_a]:
-            head_to_head_by_players[player_a][player_z] = {
-                "player_a": player_a,
-                "player_z": player_z,
-                "player_a_raw_stats": copy.deepcopy(blank_team_stats_by_game),
-                "player_z_raw_stats": copy.deepcopy(blank_team_stats_by_game),
-            }
-
-        def add_to_player_season(player: str, key: str, value: int):
-            raw_stats_for_season_by_player[player][season_key][key] += value
-
-        def add_to_player_h2h(away: bool, key: str, value: int):
-            """if we need h2h for this matchup, translate home and away into player_a and player_z and record the stat"""
-            if (away and player_a_is_away) or (not away and not player_a_is_away):
-                head_to_head_by_players[player_a][player_z]["player_a_raw_stats"][
-                    key
-                ] += value
-            else:
-                head_to_head_by_players[player_a][player_z]["player_z_raw_stats"][
-                    key
-                ] += value
-
-        def add_to_away(key: str, value: int):
-            """record an away team stat if the away player is currently playing"""
-            if is_xbl_game:
-                xbl_raw_stats_by_player[away_player][key] += value
-            elif is_aaa_game:
-                aaa_raw_stats_by_player[away_player][key] += value
-            elif is_aa_game:
-                aa_raw_stats_by_player[away_player][key] += value
-            add_to_player_h2h(True, key, value)
-            add_to_player_season(away_player, key, value)
-
-        def add_to_home(key: str, value: int):
-            """record a home team stat if the home player is currently playing"""
-            if is_xbl_game:
-                xbl_raw_stats_by_player[home_player][key] += value
-            elif is_aaa_game:
-                aaa_raw_stats_by_player[home_player][key] += value
-            elif is_aa_game:
-                aa_raw_stats_by_player[home_player][key] += value
-            add_to_player_h2h(False, key, value)
-            add_to_player_season(home_player, key, value)
-
-        if game["winner"] == away_player:
-            add_to_away("wins", 1)
-            add_to_home("losses", 1)
-        else:
-            add_to_home("wins", 1)
-            add_to_away("losses", 1)
-
-        if game["run_rule"]:
-            if game["winner"] == away_player:
-                add_to_away("wins_by_run_rule", 1)
-                add_to_home("losses_by_run_rule", 1)
-            if game["winner"] == home_player:
-                add_to_home("wins_by_run_rule", 1)
-                add_to_away("losses_by_run_rule", 1)
-
-        # record which seasons were played
-        if is_xbl_game:
-            xbl_raw_stats_by_player[home_player]["seasons"].add(season)
-            xbl_raw_stats_by_player[away_player]["seasons"].add(season)
-        if is_aaa_game:
-            aaa_raw_stats_by_player[home_player]["seasons"].add(season)
-            aaa_raw_stats_by_player[away_player]["seasons"].add(season)
-        if is_aa_game:
-            aa_raw_stats_by_player[home_player]["seasons"].add(season)
-            aa_raw_stats_by_player[away_player]["seasons"].add(season)
-        head_to_head_by_players[player_a][player_z]["player_a_raw_stats"][
-            "seasons"
-        ].add(season)
-        head_to_head_by_players[player_a][player_z]["player_z_raw_stats"][
-            "seasons"
-        ].add(season)
-        raw_stats_for_season_by_player[away_player][season_key]["seasons"].add(season)
-        raw_stats_for_season_by_player[home_player][season_key]["seasons"].add(season)
-
-        if "away_ab" not in game or game["away_ab"] is None:
-            # we're missing stats. don't count this game
-            continue
-
-        if game["innings"] is not None:
-            add_to_away("innings_hitting", math.ceil(game["innings"]))
-            add_to_away("innings_pitching", math.floor(game["innings"]))
-            add_to_home("innings_hitting", math.floor(game["innings"]))
-            add_to_home("innings_pitching", math.ceil(game["innings"]))
+    # the league someone played in last in each season
+    player_season, player_seasons = group_ids(key_player, key_season)
+    latest = (
+        career_tallies.last
+        == group_max(player_season, career_tallies.last, len(player_seasons))[
+            player_season
+        ]
+    )
+    league_for_season_by_player = dict(
+        zip(
+            [tuple(key) for key in player_seasons[player_season[latest]].tolist()],
+            key_league[latest].tolist(),
+        )
+    )
 
-            runs_by_league_by_season[league][season_key] += game["away_r"]
-            runs_by_league_by_season[league][season_key] += game["home_r"]
-            innings_hitting_by_league_by_season[league][season_key] += math.ceil(
-                game["innings"]
-            )
-            innings_hitting_by_league_by_season[league][season_key] += math.floor(
-                game["innings"]
+    def calc_stats(
+        by_key: dict[tuple, Tallies], league_eras: List[float | None]
+    ) -> dict[tuple, TeamStats]:
+        """stat lines for every key at once. the player is the first ID in every key"""
+        return dict(
+            zip(
+                by_key.keys(),
+                calc_stats_from_all_games(
+                    list(by_key.values()),
+                    league_eras,
+                    players=[players.name(key[0]) for key in by_key.keys()],
+                    seasons=symbols.seasons,
+                ),
             )
-
-            # use these to calculate the league ERA
-            if is_xbl_game:
-                xbl_league_runs += game["away_r"]
-                xbl_league_runs += game["home_r"]
-                xbl_league_innings_hitting += math.ceil(game["innings"])
-                xbl_league_innings_hitting += math.floor(game["innings"])
-            if is_aaa_game:
-                aaa_league_runs += game["away_r"]
-                aaa_league_runs += game["home_r"]
-                aaa_league_innings_hitting += math.ceil(game["innings"])
-                aaa_league_innings_hitting += math.floor(game["innings"])
-            if is_aa_game:
-                aa_league_runs += game["away_r"]
-                aa_league_runs += game["home_r"]
-                aa_league_innings_hitting += math.ceil(game["innings"])
-                aa_league_innings_hitting += math.floor(game["innings"])
-
-        # capture away team stats
-        add_to_away("games_played", 1)
-        add_to_away("ab", game["away_ab"])
-        add_to_away("r", game["away_r"])
-        add_to_away("h", game["away_hits"])
-        add_to_away("hr", game["away_hr"])
-        add_to_away("rbi", game["away_rbi"])
-        add_to_away("bb", game["away_bb"])
-        add_to_away("so", game["away_so"])
-        add_to_away("oppab", game["home_ab"])
-        add_to_away("oppr", game["home_r"])
-        add_to_away("opph", game["home_hits"])
-        add_to_away("opphr", game["home_hr"])
-        add_to_away("opprbi", game["home_rbi"])
-        add_to_away("oppbb", game["home_bb"])
-        add_to_away("oppso", game["home_so"])
-
-        # capture home team stats
-        add_to_home("games_played", 1)
-        add_to_home("ab", game["home_ab"])
-        add_to_home("r", game["home_r"])
-        add_to_home("h", game["home_hits"])
-        add_to_home("hr", game["home_hr"])
-        add_to_home("rbi", game["home_rbi"])
-        add_to_home("bb", game["home_bb"])
-        add_to_home("so", game["home_so"])
-        add_to_home("oppab", game["away_ab"])
-        add_to_home("oppr", game["away_r"])
-        add_to_home("opph", game["away_hits"])
-        add_to_home("opphr", game["away_hr"])
-        add_to_home("opprbi", game["away_rbi"])
-        add_to_home("oppbb", game["away_bb"])
-        add_to_home("oppso", game["away_so"])
-
-    xbl_league_era = three_digits(9 * xbl_league_runs / xbl_league_innings_hitting)
-    aaa_league_era = three_digits(9 * aaa_league_runs / aaa_league_innings_hitting)
-    aa_league_era = three_digits(9 * aa_league_runs / aa_league_innings_hitting)
-    all_time_league_era = three_digits(
-        9
-        * sum([xbl_league_runs, aaa_league_runs, aa_league_runs])
-        / sum(
-            [
-                xbl_league_innings_hitting,
-                aaa_league_innings_hitting,
-                aaa_league_innings_hitting,
-            ],
         )
+
+    era_by_league = {xbl: xbl_league_era, aaa: aaa_league_era, aa: aa_league_era}
+    all_time_stats = calc_stats(by_player, [all_time_league_era] * len(by_player))
+    by_league_stats = calc_stats(
+        by_player_league,
+        [era_by_league[league_id] for (_, league_id) in by_player_league.keys()],
     )
-    era_by_league_by_season = {
-        "XBL": dict(
-            [
-                (
-                    season_key,
-                    three_digits(
-                        9
-                        * runs_by_league_by_season["XBL"][season_key]
-                        / innings_hitting_by_league_by_season["XBL"][season_key]
-                    ),
-                )
-                for season_key in runs_by_league_by_season["XBL"].keys()
-            ]
-        ),
-        "AAA": dict(
-            [
-                (
-                    season_key,
-                    three_digits(
-                        9
-                        * runs_by_league_by_season["AAA"][season_key]
-                        / innings_hitting_by_league_by_season["AAA"][season_key]
-                    ),
-                )
-                for season_key in runs_by_league_by_season["AAA"].keys()
-            ]
-        ),
-        "AA": dict(
-            [
-                (
-                    season_key,
-                    three_digits(
-                        9
-                        * runs_by_league_by_season["AA"][season_key]
-                        / innings_hitting_by_league_by_season["AA"][season_key]
-                    ),
-                )
-                for season_key in runs_by_league_by_season["AA"].keys()
-            ]
-        ),
-    }
+    matchup_stats = calc_stats(by_matchup, [all_time_league_era] * len(by_matchup))
 
-    all_time_raw_stats_by_player = {
-        player: sum_dict_tallies(
-            xbl_raw_stats_by_player.get(player, None),
-            aaa_raw_stats_by_player.get(player, None),
-            aa_raw_stats_by_player.get(player, None),
-        )
-        for player in list(
-            set(
-                [
-                    *xbl_raw_stats_by_player.keys(),
-                    *aaa_raw_stats_by_player.keys(),
-                    *aa_raw_stats_by_player.keys(),
-                ]
+    # player name: stat line, for every season. only the live seasons need calculating
+    by_season_stats = [
+        season["stats"] if season is not None else {} for season in frozen
+    ]
+    for (player_id, season_id), stats in calc_stats(
+        by_player_season,
+        [
+            era_by_league_by_season[league_for_season_by_player[key]].get(key[1], None)
+            for key in by_player_season.keys()
+        ],
+    ).items():
+        by_season_stats[season_id][players.name(player_id)] = stats
+
+    for season_id, season_name in enumerate(season_names):
+        if frozen_seasons.can_freeze(season_name):
+            frozen_seasons.freeze(
+                season_name,
+                {
+                    league_name: era_by_league_by_season[league_id][season_id]
+                    for (league_id, league_name) in enumerate(symbols.leagues.names)
+                    if season_id in era_by_league_by_season[league_id]
+                },
+                by_season_stats[season_id],
             )
-        )
-    }
 
     # do math to get career performance stats
-    for player in all_time_raw_stats_by_player.keys():
-        regular_season[player] = {
-            "player": player,
-            "all_time": calc_stats_from_all_games(
-                all_time_raw_stats_by_player[player], all_time_league_era, player=player
-            ),
+    for (player_id,) in by_player.keys():
+        player_name = players.name(player_id)
+        regular_season[player_name] = {
+            "player": player_name,
+            "all_time": all_time_stats[(player_id,)],
             "by_league": {
-                "XBL": (
-                    calc_stats_from_all_games(
-                        xbl_raw_stats_by_player[player], xbl_league_era, player=player
-                    )
-                    if player in xbl_raw_stats_by_player
-                    else None
-                ),
-                "AAA": (
-                    calc_stats_from_all_games(
-                        aaa_raw_stats_by_player[player], aaa_league_era, player=player
-                    )
-                    if player in aaa_raw_stats_by_player
-                    else None
-                ),
-                "AA": (
-                    calc_stats_from_all_games(
-                        aa_raw_stats_by_player[player], aa_league_era, player=player
-                    )
-                    if player in aa_raw_stats_by_player
-                    else None
-                ),
+                name: by_league_stats.get((player_id, league_id), None)
+                for (name, league_id) in [("XBL", xbl), ("AAA", aaa), ("AA", aa)]
             },
             # dict of {season_1: [list of games in that season]}
             # but only if the player played in that season
@@ -1136,62 +825,158 @@ def collect_career_performances_and_head_to_head(
                 [
                     (
                         # use keys that don't start with numbers because javascript (and lodash) gets weird about keying a dict with numbers
-                        sk,
-                        calc_stats_from_all_games(
-                            raw_stats_for_season_by_player[player][sk],
-                            era_by_league_by_season[
-                                league_for_season_by_player[player][sk]
-                            ][sk],
-                            player=player,
-                        ),
+                        f"season_{season_names[season_id]}",
+                        by_season_stats[season_id][player_name],
                     )
                     # use XBL as a key because XBL has been played every season
-                    for sk in era_by_league_by_season["XBL"].keys()
+                    for season_id in era_by_league_by_season[xbl].keys()
                     # don't include seasons where someone didn't play
-                    if sk in raw_stats_for_season_by_player[player]
+                    if player_name in by_season_stats[season_id]
                 ]
             ),
         }
 
-    # do math to get head to head stats
-    for player_a in head_to_head_by_players.keys():
-        for player_z in head_to_head_by_players[player_a]:
-            if player_a not in regular_season_head_to_head:
-                regular_season_head_to_head[player_a] = {}
+    # head to head matchups are keyed on player names in alphabetical order, in the order they first played
+    player_order = players.sort_order().tolist()
+    matchups = list(by_matchup.keys())
+    first_played = {matchup: i for (i, matchup) in enumerate(matchups)}
+    head_to_head_keys = sorted(
+        [(a, z) for (a, z) in matchups if player_order[a] <= player_order[z]],
+        key=lambda matchup: min(first_played[matchup], first_played[matchup[::-1]]),
+    )
 
-            raw_stats_a = head_to_head_by_players[player_a][player_z][
-                "player_a_raw_stats"
-            ]
-            raw_stats_z = head_to_head_by_players[player_a][player_z][
-                "player_z_raw_stats"
-            ]
+    for player_a, player_z in head_to_head_keys:
+        name_a, name_z = (players.name(player_a), players.name(player_z))
+        if name_a not in regular_season_head_to_head:
+            regular_season_head_to_head[name_a] = {}
 
-            try:
-                regular_season_head_to_head[player_a][player_z] = {
-                    "player_a": player_a,
-                    "player_z": player_z,
-                    "player_a_stats": calc_stats_from_all_games(
-                        raw_stats_a,
-                        all_time_league_era,
-                        player=player_a,
-                    ),
-                    "player_z_stats": calc_stats_from_all_games(
-                        raw_stats_z,
-                        all_time_league_era,
-                        player=player_z,
-                    ),
-                }
-            except Exception as e:
-                print(player_a, player_z)
-                print(e)
-                traceback.print_exc()
+        regular_season_head_to_head[name_a][name_z] = {
+            "player_a": name_a,
+            "player_z": name_z,
+            "player_a_stats": matchup_stats[(player_a, player_z)],
+            "player_z_stats": matchup_stats[(player_z, player_a)],
+        }
 
     # TODO still need to get playoffs player series wins, losses, championships, etc
 
     return regular_season, regular_season_head_to_head
 
 
-def build_career_stats(g_sheets_dir: Path, season: int):
+def build_career_performances(
+    playoffs: bool,
+    g_sheets_dir: Path,
+    game_cache: GameCache,
+    tallies_path: Path | None = None,
+    start_over: bool = False,
+    season: int | None = None,
+    frozen_seasons_path: Path | None = None,
+):
+    """career stats and head to head stats for the regular season or the playoffs. tallies are saved to `tallies_path' so the next build only has to tally new games. stats for seasons before `season' are saved to `frozen_seasons_path' so the next build doesn't have to calculate them again"""
+    head_to_head = collect_head_to_head_games(playoffs, g_sheets_dir, game_cache)
+    symbols = head_to_head[0].symbols
+
+    # anything saved by different code could have been counted or calculated differently
+    code = code_fingerprint()
+    career_tallies = (
+        CareerTallies.load(tallies_path, symbols, code)
+        if tallies_path is not None and not start_over
+        else None
+    )
+    if career_tallies is None:
+        career_tallies = CareerTallies.empty(symbols)
+    career_tallies = career_tallies.fold(head_to_head)
+    if tallies_path is not None:
+        career_tallies.save(tallies_path, code)
+
+    frozen_seasons = None
+    if season is not None and frozen_seasons_path is not None:
+        frozen_seasons = FrozenSeasons.past(
+            head_to_head, career_tallies.row_hashes, season
+        )
+        if not start_over:
+            frozen_seasons = frozen_seasons.load(frozen_seasons_path, code)
+
+    if playoffs:
+        print("Tabulating career playoffs stats and head to head performances...")
+    else:
+        print(
+            "Tabulating career regular season stats, stats by season, stats by league, and head to head performances..."
+        )
+
+    performances = collect_career_performances_and_head_to_head(
+        career_tallies, frozen_seasons
+    )
+    if frozen_seasons is not None:
+        frozen_seasons.save(frozen_seasons_path, code)
+
+    return performances
+
+
+def load_range_index(
+    g_sheets_dir: Path, game_cache: GameCache, index_path: Path | None = None
+) -> RangeIndex:
+    """the range index of every regular season Head to Head game. it's saved to `index_path' and only built again when a Head to Head tab, the parser or the code changes"""
+    if index_path is None:
+        return RangeIndex.from_games(
+            collect_head_to_head_games(False, g_sheets_dir, game_cache)
+        )
+
+    key = hash_bytes(
+        json.dumps(
+            {
+                "parser": PARSER_VERSION,
+                "code": code_fingerprint(),
+                "inputs": [
+                    hash_bytes(
+                        read_raw_tab(
+                            g_sheets_dir,
+                            f"CAREER_STATS__{league}%20Head%20to%20Head.json",
+                        )
+                    )
+                    for league in LEAGUES
+                ],
+            }
+        ).encode()
+    )
+    index = RangeIndex.load(index_path, key)
+    if index is None:
+        index = RangeIndex.from_games(
+            collect_head_to_head_games(False, g_sheets_dir, game_cache)
+        )
+        index.save(index_path, key)
+
+    return index
+
+
+def query_range(
+    g_sheets_dir: Path,
+    game_cache: GameCache,
+    player: str,
+    first: Week | None,
+    last: Week | None,
+    league: str | None = None,
+    index_path: Path | None = None,
+) -> TeamStats | None:
+    """a player's regular season stats from week `first' through week `last', in one league or every league. None if they didn't play. see load_range_index for `index_path'"""
+    index = load_range_index(g_sheets_dir, game_cache, index_path)
+    tallies = index.tallies(player, first, last, league)
+    if tallies is None:
+        return None
+
+    # FIP compares against the same stretch of the same league
+    league_era = calc_league_era(index.tallies(None, first, last, league))
+    return calc_stats_from_all_games(
+        [tallies], [league_era], players=[player], seasons=index.symbols.seasons
+    )[0]
+
+
+def build_career_stats(
+    g_sheets_dir: Path,
+    season: int,
+    regular_season_performances: Callable[[], tuple],
+    playoffs_performances: Callable[[], tuple],
+):
+    """`regular_season_performances' and `playoffs_performances' wait for build_career_performances"""
     print(f"Running career stats...")
     data: CareerStats = {
         "all_players": {},
@@ -1205,26 +990,17 @@ def build_career_stats(g_sheets_dir: Path, season: int):
         ),
     }
 
-    xbl_abbrev_data = None
-    with open(
-        g_sheets_dir.joinpath("CAREER_STATS__XBL%20Team%20Abbreviations.json")
-    ) as f:
-        raw_data = json.loads(f.read())
-        xbl_abbrev_data = raw_data["values"]
-
-    aaa_abbrev_data = None
-    with open(
-        g_sheets_dir.joinpath("CAREER_STATS__AAA%20Team%20Abbreviations.json")
-    ) as f:
-        raw_data = json.loads(f.read())
-        aaa_abbrev_data = raw_data["values"]
-
-    aa_abbrev_data = None
-    with open(
-        g_sheets_dir.joinpath(f"CAREER_STATS__AA%20Team%20Abbreviations.json")
-    ) as f:
-        raw_data = json.loads(f.read())
-        aa_abbrev_data = raw_data["values"]
+    xbl_abbrev_data = load_values(
+        g_sheets_dir, "CAREER_STATS__XBL%20Team%20Abbreviations.json"
+    )
+
+    aaa_abbrev_data = load_values(
+        g_sheets_dir, "CAREER_STATS__AAA%20Team%20Abbreviations.json"
+    )
+
+    aa_abbrev_data = load_values(
+        g_sheets_dir, "CAREER_STATS__AA%20Team%20Abbreviations.json"
+    )
 
     print("Finding who played which season...")
     all_players = collect_players(xbl_abbrev_data, aaa_abbrev_data, aa_abbrev_data)
@@ -1233,58 +1009,12 @@ def build_career_stats(g_sheets_dir: Path, season: int):
     active_players = get_active_players(all_players, season)
     data["active_players"] = active_players
 
-    xbl_head_to_head_data = None
-    with open(g_sheets_dir.joinpath("CAREER_STATS__XBL%20Head%20to%20Head.json")) as f:
-        raw_data = json.loads(f.read())
-        xbl_head_to_head_data = raw_data["values"]
-
-    aaa_head_to_head_data = None
-    with open(g_sheets_dir.joinpath("CAREER_STATS__AAA%20Head%20to%20Head.json")) as f:
-        raw_data = json.loads(f.read())
-        aaa_head_to_head_data = raw_data["values"]
-
-    aa_head_to_head_data = None
-    with open(g_sheets_dir.joinpath("CAREER_STATS__AA%20Head%20to%20Head.json")) as f:
-        raw_data = json.loads(f.read())
-        aa_head_to_head_data = raw_data["values"]
-
-    print(
-        "Tabulating career regular season stats, stats by season, stats by league, and head to head performances..."
-    )
-    regular_season, regular_season_head_to_head = (
-        collect_career_performances_and_head_to_head(
-            False,
-            xbl_head_to_head_data,
-            aaa_head_to_head_data,
-            aa_head_to_head_data,
-        )
-    )
+    regular_season, regular_season_head_to_head = regular_season_performances()
 
     data["regular_season"] = regular_season
     data["regular_season_head_to_head"] = regular_season_head_to_head
 
-    xbl_playoffs_head_to_head_data = None
-    with open(g_sheets_dir.joinpath("PLAYOFF_STATS__XBL%20Head%20to%20Head.json")) as f:
-        raw_data = json.loads(f.read())
-        xbl_playoffs_head_to_head_data = raw_data["values"]
-
-    aaa_playoffs_head_to_head_data = None
-    with open(g_sheets_dir.joinpath("PLAYOFF_STATS__AAA%20Head%20to%20Head.json")) as f:
-        raw_data = json.loads(f.read())
-        aaa_playoffs_head_to_head_data = raw_data["values"]
-
-    aa_playoffs_head_to_head_data = None
-    with open(g_sheets_dir.joinpath("PLAYOFF_STATS__AA%20Head%20to%20Head.json")) as f:
-        raw_data = json.loads(f.read())
-        aa_playoffs_head_to_head_data = raw_data["values"]
-
-    print("Tabulating career playoffs stats and head to head performances...")
-    playoffs, playoffs_head_to_head = collect_career_performances_and_head_to_head(
-        True,
-        xbl_playoffs_head_to_head_data,
-        aaa_playoffs_head_to_head_data,
-        aa_playoffs_head_to_head_data,
-    )
+    playoffs, playoffs_head_to_head = playoffs_performances()
 
     data["playoffs"] = playoffs
     data["playoffs_head_to_head"] = playoffs_head_to_head
@@ -1292,34 +1022,319 @@ def build_career_stats(g_sheets_dir: Path, season: int):
     return data
 
 
+def player_shard_path(player: str) -> str:
+    """where a player's careers file goes, relative to CAREER_SHARDS_DIR. names are quoted so they're safe to use as file names"""
+    return f"players/{quote(player, safe='')}.json"
+
+
+def shard_career_stats(
+    career_data: CareerStats,
+) -> tuple[CareerIndex, dict[str, PlayerCareerStats]]:
+    """split careers into an index and one set of stats per player. each player gets every head to head matchup they played in, keyed on their opponent"""
+
+    def by_player(
+        head_to_head: dict[str, dict[str, HeadToHead]],
+    ) -> dict[str, dict[str, HeadToHead]]:
+        matchups = {}
+        for name_a, opponents in head_to_head.items():
+            for name_z, matchup in opponents.items():
+                matchups.setdefault(name_a, {})[name_z] = matchup
+                matchups.setdefault(name_z, {})[name_a] = matchup
+        return matchups
+
+    regular_season_head_to_head = by_player(career_data["regular_season_head_to_head"])
+    playoffs_head_to_head = by_player(career_data["playoffs_head_to_head"])
+
+    # everyone who shows up anywhere, in the order they show up
+    players = dict.fromkeys(
+        [
+            *career_data["all_players"].keys(),
+            *career_data["regular_season"].keys(),
+            *career_data["playoffs"].keys(),
+        ]
+    )
+
+    index: CareerIndex = {
+        "players": {player: player_shard_path(player) for player in players},
+        "active_players": career_data["active_players"],
+        "last_updated_at": career_data["last_updated_at"],
+    }
+    shards: dict[str, PlayerCareerStats] = {
+        player: {
+            "player": player,
+            "teams": (
+                career_data["all_players"][player]["teams"]
+                if player in career_data["all_players"]
+                else []
+            ),
+            "regular_season": career_data["regular_season"].get(player, None),
+            "regular_season_head_to_head": regular_season_head_to_head.get(player, {}),
+            "playoffs": career_data["playoffs"].get(player, None),
+            "playoffs_head_to_head": playoffs_head_to_head.get(player, {}),
+            "last_updated_at": career_data["last_updated_at"],
+        }
+        for player in players
+    }
+
+    return index, shards
+
+
+def write_career_shards(outputs: Outputs, career_data: CareerStats):
+    """write careers as one file per player plus an index.json. files for players that aren't in the index anymore are removed, and files that didn't change are left alone"""
+    index, shards = shard_career_stats(career_data)
+    shards_dir = outputs.save_dir.joinpath(CAREER_SHARDS_DIR)
+    index_json = shards_dir.joinpath("index.json")
+
+    if index_json.exists():
+        with open(index_json) as f:
+            previous_index: CareerIndex = json.loads(f.read())
+        for player, path in previous_index["players"].items():
+            if path != index["players"].get(player, None):
+                shards_dir.joinpath(path).unlink(missing_ok=True)
+
+    shards_dir.joinpath("players").mkdir(parents=True, exist_ok=True)
+    written = 0
+    for player, shard in shards.items():
+        written += outputs.write_json(
+            f"{CAREER_SHARDS_DIR}/{index['players'][player]}", shard
+        )
+
+    # the index goes last, so it never points at a file that hasn't been written yet
+    outputs.write_json(f"{CAREER_SHARDS_DIR}/index.json", index)
+
+    print(f"Wrote {written} of {len(shards)} player careers to {shards_dir}")
+
+
+def output_names(args: StatsAggNamespace) -> List[str]:
+    """every output in `--save-dir', relative to it, whether or not this build wrote it"""
+    names = [
+        name
+        for league in LEAGUES
+        for name in [f"{league}__s{args.season}.json", f"{league}.json"]
+    ]
+    names.append("careers.json")
+
+    index_json = args.save_dir.joinpath(CAREER_SHARDS_DIR, "index.json")
+    if args.careers != "single" and index_json.exists():
+        with open(index_json) as f:
+            index: CareerIndex = json.loads(f.read())
+        names.append(f"{CAREER_SHARDS_DIR}/index.json")
+        names.extend(
+            [f"{CAREER_SHARDS_DIR}/{path}" for path in index["players"].values()]
+        )
+
+    return [name for name in names if args.save_dir.joinpath(name).exists()]
+
+
+def start(pool: ProcessPoolExecutor | None, fn: Callable, *args) -> Callable:
+    """start `fn(*args)' in `pool'. returns a function that waits for the result. without a pool, `fn' runs when the result is asked for"""
+    if pool is None:
+        return lambda: fn(*args)
+
+    return pool.submit(fn, *args).result
+
+
 def main(args: StatsAggNamespace):
     if not args.g_sheets_dir.exists():
         raise Exception(
             f"Missing data from Google Sheets. Cannot find {args.g_sheets_dir}. Plesae double check `--g-sheets-dir' or run `get-sheets.py' first"
         )
 
-    season_data = {
-        league: build_season_stats(league, args.g_sheets_dir, args.season)
-        for league in LEAGUES
-    }
+    if len(args.query) > 0 and args.query[0] == "range":
+        # ranges come straight from the games. nothing needs building
+        if len(args.query) not in [3, 4]:
+            return f"`--query range' takes a player, a range of seasons like 12-18, and optionally a league"
+        try:
+            first, last = parse_week_range(args.query[2])
+        except ValueError as e:
+            return f"`--query range' can't read `{args.query[2]}'. {e}"
+
+        stats = query_range(
+            args.g_sheets_dir,
+            GameCache(args.cache_dir.joinpath(GAMES_CACHE_DIR)),
+            args.query[1],
+            first,
+            last,
+            args.query[3] if len(args.query) == 4 else None,
+            args.cache_dir.joinpath(RANGE_INDEX_FILE),
+        )
+        if stats is None:
+            return f"--query `{', '.join(args.query)}' cannot be found."
+        print(json.dumps(stats, cls=SafeEncoder, indent=2))
+        return None
 
+    if args.brotli_quality is not None and not has_brotli():
+        return "`--brotli-quality' needs brotli. Run `pip install brotli' first"
+
+    # skip anything that would come out exactly the same as last time
+    tab_hashes = raw_tab_hashes(args.g_sheets_dir)
+    build_state = load_build_state(args.cache_dir)
+    outputs = Outputs(args.save_dir)
+    game_cache = GameCache(args.cache_dir.joinpath(GAMES_CACHE_DIR))
+    can_skip = not args.force and len(args.query) == 0
+
+    if is_snapshot_manifest(args.g_sheets_dir):
+        print(f"Building from snapshot {args.g_sheets_dir}")
+    elif (changed_tabs := load_changed_tabs(args.g_sheets_dir)) is not None:
+        print(f"{len(changed_tabs['changed'])} raw tabs changed in the latest download")
+
+    def is_fresh(stage: str, fingerprint: str | None, outputs: List[Path]) -> bool:
+        return (
+            can_skip
+            and fingerprint is not None
+            and build_state["stages"].get(stage, None) == fingerprint
+            and all([output.exists() for output in outputs])
+        )
+
+    def record(stage: str, fingerprint: str | None):
+        if fingerprint is None:
+            build_state["stages"].pop(stage, None)
+        else:
+            build_state["stages"][stage] = fingerprint
+
+    season_stages = {}
     for league in LEAGUES:
+        stage = f"season:{league}"
+        fingerprint = stage_fingerprint(
+            tab_hashes,
+            season_inputs(league),
+            args.season,
+            {"game_results": args.game_results},
+        )
         season_json = args.save_dir.joinpath(f"{league}__s{args.season}.json")
-        print(f"Writing {season_json}...")
-        with open(season_json, "w") as f:
-            f.write(json.dumps(season_data[league], cls=SafeEncoder))
+        league_json = args.save_dir.joinpath(f"{league}.json")
 
-        shutil.copy(season_json, args.save_dir.joinpath(f"{league}.json"))
+        if is_fresh(stage, fingerprint, [season_json, league_json]):
+            print(f"Skipping season {args.season} {league}. Nothing changed")
+            continue
 
-    career_data = build_career_stats(args.g_sheets_dir, args.season)
+        season_stages[league] = (stage, fingerprint, season_json, league_json)
 
     career_json = args.save_dir.joinpath("careers.json")
-    print(f"Writing {career_json}...")
-    with open(career_json, "w") as f:
-        f.write(json.dumps(career_data, cls=SafeEncoder))
+    career_shards_dir = args.save_dir.joinpath(CAREER_SHARDS_DIR)
+    career_outputs = []
+    if args.careers != "sharded":
+        career_outputs.append(career_json)
+    if args.careers != "single":
+        career_outputs.append(career_shards_dir.joinpath("index.json"))
+    # careers.json isn't written in sharded mode, so switching modes has to build careers again
+    career_fingerprint = stage_fingerprint(
+        tab_hashes, CAREER_INPUTS, args.season, {"careers": args.careers}
+    )
+    build_careers = not is_fresh("careers", career_fingerprint, career_outputs)
+
+    # leagues and the two halves of careers don't depend on each other. a pool builds them at the same time, and we write them in the same order either way
+    job_count = len(season_stages) + (2 if build_careers else 0)
+    pool = (
+        ProcessPoolExecutor(max_workers=min(args.jobs, job_count))
+        if args.jobs > 1 and job_count > 1
+        else None
+    )
+
+    try:
+        season_results = {
+            league: start(
+                pool,
+                build_season_stats,
+                league,
+                args.g_sheets_dir,
+                args.season,
+                game_cache,
+            )
+            for league in season_stages.keys()
+        }
+        if build_careers:
+            career_results = [
+                start(
+                    pool,
+                    build_career_performances,
+                    playoffs,
+                    args.g_sheets_dir,
+                    game_cache,
+                    args.cache_dir.joinpath(
+                        CAREER_TALLIES_DIR,
+                        "playoffs.npz" if playoffs else "regular_season.npz",
+                    ),
+                    args.force,
+                    args.season,
+                    args.cache_dir.joinpath(
+                        CAREER_TALLIES_DIR,
+                        (
+                            "playoffs_seasons.json"
+                            if playoffs
+                            else "regular_season_seasons.json"
+                        ),
+                    ),
+                )
+                for playoffs in [False, True]
+            ]
+
+        season_data = {}
+        for league, (
+            stage,
+            fingerprint,
+            season_json,
+            league_json,
+        ) in season_stages.items():
+            season_data[league] = season_results[league]()
+
+            print(f"Writing {season_json}...")
+            if not outputs.write_json(
+                season_json.name,
+                {
+                    **season_data[league],
+                    "season_game_results": reshape(
+                        season_data[league]["season_game_results"], args.game_results
+                    ),
+                    "playoffs_game_results": reshape(
+                        season_data[league]["playoffs_game_results"],
+                        args.game_results,
+                    ),
+                },
+            ):
+                print(f"{season_json} didn't change")
+
+            outputs.alias(league_json.name, season_json.name)
+            record(stage, fingerprint)
+
+        career_data = None
+        if not build_careers:
+            print("Skipping career stats. Nothing changed")
+        else:
+            career_data = build_career_stats(
+                args.g_sheets_dir, args.season, *career_results
+            )
 
-    career_file_size = os.path.getsize(career_json)
-    print(f"careers.json filesize: {math.floor(career_file_size / 1000000)}MB")
+            if args.careers != "sharded":
+                print(f"Writing {career_json}...")
+                if not outputs.write_json(career_json.name, career_data):
+                    print(f"{career_json} didn't change")
+
+                career_file_size = os.path.getsize(career_json)
+                print(
+                    f"careers.json filesize: {math.floor(career_file_size / 1000000)}MB"
+                )
+
+            if args.careers != "single":
+                print(f"Writing {career_shards_dir}...")
+                write_career_shards(outputs, career_data)
+
+            record("careers", career_fingerprint)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    save_build_state(args.cache_dir, build_state)
+
+    levels = {}
+    if args.gzip_level > 0:
+        levels["gzip"] = args.gzip_level
+    if args.brotli_quality is not None:
+        levels["br"] = args.brotli_quality
+    manifest = outputs.finish(output_names(args), levels, args.jobs)
+    print(
+        f"{len(manifest['changed'])} of {len(manifest['outputs'])} outputs changed. Sizes and hashes are in {args.save_dir.joinpath(OUTPUT_MANIFEST_FILE)}"
+    )
 
     if len(args.query) > 0:
         try:
@@ -1333,7 +1348,7 @@ def main(args: StatsAggNamespace):
 
             for part in args.query[1:]:
                 current = current.get(part, {})
-            return current
+            print(json.dumps(current, cls=SafeEncoder, indent=2))
         except (KeyError, TypeError, IndexError) as e:
             return f"--query `{', '.join(args.query)}' cannot be found."
 
@@ -3,7 +3,7 @@ import json
 from pathlib import Path
 import pydantic
 from typing_extensions import TypedDict
-from typing import List, TypeAlias
+from typing import List, TypeAlias, get_type_hints
 
 League: TypeAlias = str
 
@@ -147,30 +147,6 @@ class PlayoffsGameResults(GameResults):
     round: str
 
 
-class RawStats(TypedDict):
-    """Used to aggregate stats across games"""
-
-    innings_pitching: int
-    innings_hitting: int
-    wins_by_run_rule: int
-    losses_by_run_rule: int
-    ab: int
-    r: int
-    h: int
-    hr: int
-    rbi: int
-    bb: int
-    so: int
-    oppab: int
-    oppr: int
-    opph: int
-    opphr: int
-    opprbi: int
-    oppbb: int
-    oppso: int
-    games_played: int
-
-
 class SeasonStats(TypedDict):
     """every high-level stat you could want to know about a season"""
 
@@ -183,6 +159,46 @@ class SeasonStats(TypedDict):
     playoffs_game_results: List[PlayoffsGameResults]
 
 
+class GameResultsTable(TypedDict):
+    """game results as a table, from `main.py --game-results table'. every row has a value for every column, null where a game doesn't have that stat"""
+
+    """keys of SeasonGameResults or PlayoffsGameResults"""
+    columns: List[str]
+    rows: List[List[str | int | float | bool | None]]
+
+
+def columns_of(name: str, game_results: type) -> type:
+    """one list per key of `game_results', from `main.py --game-results columns'. null where a game doesn't have that stat"""
+    return TypedDict(
+        name,
+        {
+            key: List[value | None]
+            for (key, value) in get_type_hints(game_results).items()
+        },
+        total=False,
+    )
+
+
+SeasonGameResultsColumns = columns_of("SeasonGameResultsColumns", SeasonGameResults)
+PlayoffsGameResultsColumns = columns_of(
+    "PlayoffsGameResultsColumns", PlayoffsGameResults
+)
+
+
+class SeasonStatsTable(SeasonStats):
+    """SeasonStats with game results as tables"""
+
+    season_game_results: GameResultsTable
+    playoffs_game_results: GameResultsTable
+
+
+class SeasonStatsColumns(SeasonStats):
+    """SeasonStats with game results as one list per key"""
+
+    season_game_results: SeasonGameResultsColumns
+    playoffs_game_results: PlayoffsGameResultsColumns
+
+
 class TeamSeason(TypedDict):
     """pairing between a person and a season in XBL"""
 
@@ -258,6 +274,32 @@ class CareerStats(TypedDict):
     last_updated_at: str
 
 
+class PlayerCareerStats(TypedDict):
+    """all-time stats for one player. careers/players/{url-quoted player}.json when careers are sharded"""
+
+    player: str
+    teams: List[TeamSeason]
+    """None if they never played in the regular season"""
+    regular_season: CareerSeasonPerformance | None
+    """look ups should look like: [opponent] = head_to_head. player_a and player_z are still in alphabetical order"""
+    regular_season_head_to_head: dict[str, HeadToHead]
+    """None if they never played in the playoffs"""
+    playoffs: CareerPlayoffsPerformance | None
+    playoffs_head_to_head: dict[str, HeadToHead]
+    """the last time we collected stats. in eastern time"""
+    last_updated_at: str
+
+
+class CareerIndex(TypedDict):
+    """careers/index.json when careers are sharded. everything else is in one file per player"""
+
+    """player name: the player's file, relative to careers/"""
+    players: dict[str, str]
+    active_players: dict[League, List[TeamSeason]]
+    """the last time we collected stats. in eastern time"""
+    last_updated_at: str
+
+
 class ModelArgs(argparse.Namespace):
     out_dir: Path
 
@@ -283,6 +325,28 @@ def get_schemas():
     return (season_stats_adapter.json_schema(), career_stats_adapter.json_schema())
 
 
+def get_career_shard_schemas():
+    """for careers split into one file per player"""
+    player_career_stats_adapter = pydantic.TypeAdapter(PlayerCareerStats)
+    career_index_adapter = pydantic.TypeAdapter(CareerIndex)
+
+    return (
+        player_career_stats_adapter.json_schema(),
+        career_index_adapter.json_schema(),
+    )
+
+
+def get_game_results_shape_schemas():
+    """for season stats with game results as tables or columns"""
+    season_stats_table_adapter = pydantic.TypeAdapter(SeasonStatsTable)
+    season_stats_columns_adapter = pydantic.TypeAdapter(SeasonStatsColumns)
+
+    return (
+        season_stats_table_adapter.json_schema(),
+        season_stats_columns_adapter.json_schema(),
+    )
+
+
 def main(args: ModelArgs):
     (season_schema, career_schema) = get_schemas()
 
@@ -303,6 +367,34 @@ def main(args: ModelArgs):
 
     print(f"Wrote {career_path}")
 
+    player_career_schema, career_index_schema = get_career_shard_schemas()
+
+    player_career_path = args.out_dir.joinpath("player-career-schema.json")
+    with open(player_career_path, "w") as f:
+        f.write(json.dumps(player_career_schema))
+
+    print(f"Wrote {player_career_path}")
+
+    career_index_path = args.out_dir.joinpath("careers-index-schema.json")
+    with open(career_index_path, "w") as f:
+        f.write(json.dumps(career_index_schema))
+
+    print(f"Wrote {career_index_path}")
+
+    season_table_schema, season_columns_schema = get_game_results_shape_schemas()
+
+    season_table_path = args.out_dir.joinpath("season-table-schema.json")
+    with open(season_table_path, "w") as f:
+        f.write(json.dumps(season_table_schema))
+
+    print(f"Wrote {season_table_path}")
+
+    season_columns_path = args.out_dir.joinpath("season-columns-schema.json")
+    with open(season_columns_path, "w") as f:
+        f.write(json.dumps(season_columns_schema))
+
+    print(f"Wrote {season_columns_path}")
+
     print("Done!")
 
     return None
@@ -0,0 +1,214 @@
+"""A stand-in for the Google Sheets API that runs on localhost"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients that time out hang up on us. that's expected
+        pass
+
+
+class FakeSheetsServer:
+    """
+    Serves `spreadsheets/{id}/values/{tab}' and `spreadsheets/{id}/values:batchGet' from `sheets', which looks like {spreadsheet_id: {tab name: rows}}. Tab names are not url-encoded. Ranges can be a tab name or `'{tab}'!A{row}:ZZ' for every row from `row' on. Cells should be formatted strings, like the real API sends by default. With `valueRenderOption=UNFORMATTED_VALUE', anything that looks like a number is sent as one.
+
+    Use it as a context manager. `api_url' is what to pass in place of the real Sheets API URL. With `etags', single tab responses have an ETag and honor If-None-Match
+
+    Faults are keyed on tab name, or `{id}:batchGet'. Each request for that key takes the next status out of `errors' and responds with it (with `retry_after' as the Retry-After header), and takes the next number of seconds out of `stalls' and waits that long before responding
+    """
+
+    def __init__(
+        self,
+        sheets: dict[str, dict[str, list]],
+        delay: float = 0.0,
+        etags: bool = False,
+        errors: dict[str, list[int]] | None = None,
+        stalls: dict[str, list[float]] | None = None,
+        retry_after: str | None = None,
+    ):
+        self.sheets = sheets
+        self.delay = delay
+        self.etags = etags
+        self.errors = errors if errors is not None else {}
+        self.stalls = stalls if stalls is not None else {}
+        self.retry_after = retry_after
+        self.not_modified = 0
+        self.requests: list[str] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = QuietServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v4/spreadsheets"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def parse_range(a1: str) -> tuple[str, int]:
+        """tab name and first row (starting at 1)"""
+        match = re.fullmatch(r"'(.+)'!A(\d+):ZZ", a1)
+        if match is None:
+            return a1, 1
+        return match.group(1), int(match.group(2))
+
+    @staticmethod
+    def unformat(cell: str) -> str | int | float:
+        """what the API sends for a cell with UNFORMATTED_VALUE"""
+        if re.fullmatch(r"-?\d[\d,]*", cell):
+            return int(cell.replace(",", ""))
+        if re.fullmatch(r"-?\d*\.\d+", cell):
+            return float(cell)
+        return cell
+
+    def value_range(
+        self, spreadsheet_id: str, a1: str, unformatted: bool = False
+    ) -> dict | None:
+        tab, first_row = self.parse_range(a1)
+        if tab not in self.sheets.get(spreadsheet_id, {}):
+            return None
+
+        rows = self.sheets[spreadsheet_id][tab]
+        if unformatted:
+            rows = [[self.unformat(cell) for cell in row] for row in rows]
+        return {
+            "range": f"'{tab}'!A{first_row}:Z{max(len(rows), first_row)}",
+            "majorDimension": "ROWS",
+            "values": rows[first_row - 1 :],
+        }
+
+    def next_fault(self, path: str) -> tuple[int | None, float]:
+        """the error status and stall for this request, if any"""
+        parts = path.split("/")
+        if len(parts) == 5:
+            key = parts[3] + ":" + parts[4].split(":")[-1]
+        else:
+            key = self.parse_range(urllib.parse.unquote(parts[-1]))[0]
+
+        with self._lock:
+            errors = self.errors.get(key, [])
+            stalls = self.stalls.get(key, [])
+            return (
+                errors.pop(0) if len(errors) > 0 else None,
+                stalls.pop(0) if len(stalls) > 0 else 0.0,
+            )
+
+    def respond(
+        self, path: str, query: dict[str, list[str]]
+    ) -> tuple[int, dict | None]:
+        """figure out what the real API would say"""
+        parts = path.split("/")
+
+        if query.get("key", [""])[0] == "":
+            return 403, {"error": {"code": 403, "message": "missing key"}}
+
+        unformatted = query.get("valueRenderOption", [""])[0] == "UNFORMATTED_VALUE"
+
+        # ['', 'v4', 'spreadsheets', id, 'values:batchGet']
+        if len(parts) == 5 and parts[4] == "values:batchGet":
+            spreadsheet_id = parts[3]
+            value_ranges = []
+            for tab in query.get("ranges", []):
+                value_range = self.value_range(spreadsheet_id, tab, unformatted)
+                if value_range is None:
+                    return 400, {
+                        "error": {
+                            "code": 400,
+                            "message": f"Unable to parse range: {tab}",
+                        }
+                    }
+                value_ranges.append(value_range)
+
+            return 200, {"spreadsheetId": spreadsheet_id, "valueRanges": value_ranges}
+
+        # ['', 'v4', 'spreadsheets', id, 'values', tab]
+        if len(parts) == 6 and parts[4] == "values":
+            spreadsheet_id = parts[3]
+            tab = urllib.parse.unquote(parts[5])
+            value_range = self.value_range(spreadsheet_id, tab, unformatted)
+            if value_range is None:
+                return 400, {
+                    "error": {"code": 400, "message": f"Unable to parse range: {tab}"}
+                }
+
+            return 200, value_range
+
+        return 404, {"error": {"code": 404, "message": "not found"}}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+
+                with server._lock:
+                    server.requests.append(self.path)
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+
+                try:
+                    error, stall = server.next_fault(url.path)
+                    time.sleep(server.delay + stall)
+                    if error is None:
+                        status, body = server.respond(
+                            url.path, urllib.parse.parse_qs(url.query)
+                        )
+                    else:
+                        status, body = error, {
+                            "error": {"code": error, "message": "injected"}
+                        }
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+                # the real API pretty-prints its responses
+                payload = json.dumps(body, indent=2).encode()
+                etag = None
+                if server.etags and status == 200 and "batchGet" not in url.path:
+                    etag = f'"{hashlib.sha256(payload).hexdigest()}"'
+
+                if etag is not None and self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status != 200 and server.retry_after is not None:
+                    self.send_header("Retry-After", server.retry_after)
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,117 @@
+import contextlib
+import io
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from test_career_tallies import PLAYERS, head_to_head
+
+from main import LEAGUES, arg_parser, main
+from utils import hash_bytes, save_changed_tabs
+
+TEAMS = ["Dragons", "Knights"]
+
+# a side's line in a box score
+LINE = ["30", "4", "8", "1", "3", "2", "7"]
+
+
+def write_raw(raw_dir: Path, games: int):
+    """every tab a build reads, with `games' Head to Head games in each league, and the changed-tabs.json get-sheets.py would write"""
+    tabs = {}
+
+    def write(name: str, values: list):
+        body = json.dumps({"values": values}).encode()
+        raw_dir.joinpath(name).write_bytes(body)
+        tabs[name] = hash_bytes(body)
+
+    for league in LEAGUES:
+        ego = ["5", "6"] if league == "AA" else []
+        write(
+            f"{league}__Standings.json",
+            [["Rank", "Team"]]
+            + [
+                [str(rank), team, *ego, "1", "1", "-", ".500", ".500", "0", "2", "0"]
+                + ["12", *["x"] * 8, "1,500"]
+                for (rank, team) in enumerate(TEAMS, 1)
+            ],
+        )
+        write(
+            f"{league}__Box%20Scores.json",
+            [
+                ["Week"],
+                ["1", "Dragons", "3", "2", "Knights", "0", "0", "9", *LINE, *LINE],
+                ["2", "Knights", "5", "1", "Dragons", "0", "0", "9", *LINE, *LINE],
+            ],
+        )
+        write(
+            f"{league}__Playoffs.json",
+            [["Round"], ["Final", "Dragons", "3", "2", "Knights", "9", *LINE, *LINE]],
+        )
+
+    for sheet in ["CAREER_STATS", "PLAYOFF_STATS"]:
+        for seed, league in enumerate(LEAGUES):
+            write(
+                f"{sheet}__{league}%20Team%20Abbreviations.json",
+                [["Season"]]
+                + [
+                    ["1", team, team[:3], player]
+                    for (team, player) in zip(TEAMS, PLAYERS)
+                ],
+            )
+            write(
+                f"{sheet}__{league}%20Head%20to%20Head.json", head_to_head(games, seed)
+            )
+
+    save_changed_tabs(raw_dir, list(tabs.keys()), tabs)
+
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.raw_dir = self.dir.joinpath("raw")
+        self.raw_dir.mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, name: str, *options: str) -> Path:
+        """build into save dir `name' with the cache that every build shares"""
+        save_dir = self.dir.joinpath(name)
+        save_dir.mkdir(exist_ok=True)
+        args = arg_parser().parse_args(
+            [
+                "--season",
+                "2",
+                "--g-sheets-dir",
+                str(self.raw_dir),
+                "--save-dir",
+                str(save_dir),
+                "--cache-dir",
+                str(self.dir.joinpath("cache", name)),
+                *options,
+            ]
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(main(args))
+        return save_dir
+
+    def careers(self, save_dir: Path) -> dict:
+        with open(save_dir.joinpath("careers.json")) as f:
+            careers = json.load(f)
+        careers.pop("last_updated_at")
+        return careers
+
+    def test_switch_careers(self):
+        write_raw(self.raw_dir, 20)
+        self.build("out", "--careers", "single")
+        write_raw(self.raw_dir, 30)
+        self.build("out", "--careers", "sharded")
+        switched = self.build("out", "--careers", "single")
+
+        self.assertEqual(
+            self.careers(switched),
+            self.careers(self.build("fresh", "--careers", "single")),
+            "careers.json is built again from the new games",
+        )
@@ -0,0 +1,145 @@
+from pathlib import Path
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import CareerTallies, GameTable, Symbols, tally_games
+
+PLAYERS = ["alice", "bob", "carol", "dave"]
+
+
+def head_to_head(games: int, seed: int) -> list:
+    """a Head to Head tab with `games' random games"""
+    rng = random.Random(seed)
+    rows = [["Season"]]
+    for i in range(games):
+        away, home = rng.sample(PLAYERS, 2)
+        rows.append(
+            [
+                str(1 + i // 10),
+                "1",
+                away,
+                "x",
+                str(rng.randint(0, 9)),
+                str(rng.randint(0, 9)),
+                "x",
+                home,
+                "0",
+                "0",
+                rng.choice(["6", "9"]),
+                *[str(rng.randint(0, 30)) for _ in range(14)],
+            ]
+        )
+    return rows
+
+
+def tables(tabs: list, symbols: Symbols | None = None) -> list:
+    symbols = symbols if symbols is not None else Symbols()
+    return [
+        GameTable.from_head_to_head(rows, league, False, symbols)
+        for (rows, league) in zip(tabs, ["XBL", "AAA", "AA"])
+    ]
+
+
+def tally_everything(tabs: list) -> CareerTallies:
+    head_to_head = tables(tabs)
+    return CareerTallies.empty(head_to_head[0].symbols).fold(head_to_head)
+
+
+class TestCareerTallies(unittest.TestCase):
+    def setUp(self):
+        self.tabs = [head_to_head(40, seed) for seed in range(3)]
+
+    def assert_same(self, a: CareerTallies, b: CareerTallies):
+        names = lambda t: [
+            (
+                t.symbols.players.name(player),
+                t.symbols.leagues.name(league),
+                t.symbols.seasons.name(season),
+                t.symbols.players.name(opponent),
+            )
+            for (player, league, season, opponent) in t.keys.tolist()
+        ]
+        self.assertEqual(names(a), names(b), "same groups in the same order")
+        self.assertEqual(a.totals.tolist(), b.totals.tolist())
+        self.assertEqual(a.missing.tolist(), b.missing.tolist())
+        self.assertEqual(a.first.tolist(), b.first.tolist())
+        self.assertEqual(a.last.tolist(), b.last.tolist())
+
+    def fold_again(self, before: CareerTallies, tabs: list) -> CareerTallies:
+        """fold `tabs' into tallies loaded like they would be in the next build"""
+        symbols = Symbols()
+        loaded = CareerTallies.from_arrays(before.to_arrays(), symbols)
+        return loaded.fold(tables(tabs, symbols))
+
+    def test_fold(self):
+        career_tallies = tally_everything(self.tabs)
+
+        self.assertEqual(
+            career_tallies.totals[:, 0].sum() + career_tallies.totals[:, 1].sum(),
+            4 * sum([int(row[10]) for tab in self.tabs for row in tab[1:]]),
+            "every inning pitched and hit by both players",
+        )
+        self.assertEqual(
+            career_tallies.first.tolist(),
+            sorted(career_tallies.first.tolist()),
+            "in the order they were first played",
+        )
+        self.assertEqual(
+            [len(hashes) for hashes in career_tallies.row_hashes], [40, 40, 40]
+        )
+
+    def test_new_games(self):
+        before = tally_everything([tab[:31] for tab in self.tabs])
+        after = self.fold_again(before, self.tabs)
+
+        self.assert_same(after, tally_everything(self.tabs))
+
+    def test_only_tallies_new_games(self):
+        before = tally_everything(self.tabs)
+        with mock.patch(
+            "utils.career_tallies.tally_games", wraps=tally_games
+        ) as tallied:
+            self.fold_again(before, [*self.tabs[:2], self.tabs[2] + self.tabs[0][1:3]])
+
+        self.assertEqual(len(tallied.call_args.args[0]), 2, "just the 2 new games")
+
+    def test_changed_game(self):
+        before = tally_everything(self.tabs)
+        changed = [[row.copy() for row in tab] for tab in self.tabs]
+        changed[1][5][4] = "99"
+        changed[1][6][2] = "erin"
+
+        self.assert_same(self.fold_again(before, changed), tally_everything(changed))
+
+    def test_removed_game(self):
+        before = tally_everything(self.tabs)
+        removed = [self.tabs[0][:10] + self.tabs[0][11:], *self.tabs[1:]]
+
+        self.assert_same(self.fold_again(before, removed), tally_everything(removed))
+
+    def test_different_symbols(self):
+        with self.assertRaises(ValueError):
+            CareerTallies.empty(Symbols()).fold(tables(self.tabs))
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("careers", "regular_season.npz")
+            career_tallies = tally_everything(self.tabs)
+            career_tallies.save(path, "code")
+
+            symbols = Symbols()
+            self.assert_same(CareerTallies.load(path, symbols, "code"), career_tallies)
+
+            self.assertIsNone(
+                CareerTallies.load(path, Symbols(), "changed code"),
+                "counted by different code",
+            )
+
+            with open(path, "wb") as f:
+                f.write(b"not an npz")
+            self.assertIsNone(CareerTallies.load(path, Symbols(), "code"))
+            self.assertIsNone(
+                CareerTallies.load(Path(tmp).joinpath("nope.npz"), Symbols(), "code")
+            )
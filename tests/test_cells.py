@@ -0,0 +1,74 @@
+import unittest
+
+from main import collect_team_records
+from utils import to_float, to_int, to_rounded_int, to_str
+
+
+class TestToInt(unittest.TestCase):
+    def test_formatted(self):
+        self.assertEqual(to_int("12"), 12)
+        self.assertEqual(to_int("1,234", thousands=True), 1234)
+        with self.assertRaises(ValueError):
+            to_int("1,234")
+        with self.assertRaises(ValueError):
+            to_int("")
+
+    def test_unformatted(self):
+        self.assertEqual(to_int(12), 12)
+        self.assertEqual(to_int(12.0), 12)
+        with self.assertRaises(ValueError):
+            to_int(9.5)
+        with self.assertRaises(ValueError):
+            to_int(True)
+
+
+class TestToRoundedInt(unittest.TestCase):
+    def test_rounded(self):
+        self.assertEqual(to_rounded_int("1,365", thousands=True), 1365)
+        self.assertEqual(to_rounded_int(1365), 1365)
+        self.assertEqual(to_rounded_int(1364.6), 1365)
+        self.assertEqual(to_rounded_int(12.5), 13, "not to even")
+        self.assertEqual(to_rounded_int(-12.5), -13)
+        with self.assertRaises(ValueError):
+            to_rounded_int("-")
+
+
+class TestCollectTeamRecords(unittest.TestCase):
+    def row(self, sos: str | float, elo: str | float) -> list:
+        return [1, "Dragons", 12, 13, "-", 0.48, 0.42, 3, 4, 5, sos, *["x"] * 8, elo]
+
+    def test_unformatted(self):
+        records = collect_team_records(
+            "XBL", [["Rank", "Team"], self.row(11.6, 1364.5)]
+        )
+        self.assertEqual(records["Dragons"]["sos"], 12)
+        self.assertEqual(records["Dragons"]["elo"], 1365)
+
+    def test_same_as_formatted(self):
+        formatted = collect_team_records(
+            "XBL", [["Rank", "Team"], self.row("12", "1,365")]
+        )
+        unformatted = collect_team_records(
+            "XBL", [["Rank", "Team"], self.row(11.6, 1364.5)]
+        )
+        self.assertEqual(formatted, unformatted)
+
+
+class TestToFloat(unittest.TestCase):
+    def test_formatted(self):
+        self.assertEqual(to_float(".500"), 0.5)
+        with self.assertRaises(ValueError):
+            to_float("-")
+
+    def test_unformatted(self):
+        self.assertEqual(to_float(0.5), 0.5)
+        self.assertIsInstance(to_float(9), float)
+        with self.assertRaises(ValueError):
+            to_float(False)
+
+
+class TestToStr(unittest.TestCase):
+    def test_to_str(self):
+        self.assertEqual(to_str("Dragons"), "Dragons")
+        self.assertEqual(to_str(18), "18", "same as the formatted season")
+        self.assertEqual(to_str(True), "TRUE")
@@ -0,0 +1,61 @@
+import unittest
+
+from test_game_table import BOX_SCORES
+
+from utils import (
+    GameTable,
+    from_columns,
+    from_table,
+    keys_of,
+    reshape,
+    to_columns,
+    to_table,
+)
+
+ITEMS = [{"a": 1, "b": None}, {"a": 2, "c": "x"}, {}]
+
+
+class TestColumnar(unittest.TestCase):
+    def test_keys(self):
+        self.assertEqual(keys_of(ITEMS), ["a", "b", "c"])
+
+    def test_table(self):
+        table = to_table(ITEMS)
+        self.assertEqual(table["columns"], ["a", "b", "c"])
+        self.assertEqual(
+            table["rows"], [[1, None, None], [2, None, "x"], [None, None, None]]
+        )
+        self.assertEqual(
+            from_table(table),
+            [
+                {"a": 1, "b": None, "c": None},
+                {"a": 2, "b": None, "c": "x"},
+                {"a": None, "b": None, "c": None},
+            ],
+            "missing keys come back as None",
+        )
+
+    def test_columns(self):
+        columns = to_columns(ITEMS)
+        self.assertEqual(
+            columns,
+            {"a": [1, 2, None], "b": [None, None, None], "c": [None, "x", None]},
+        )
+        self.assertEqual(from_columns(columns), from_table(to_table(ITEMS)))
+
+    def test_empty(self):
+        self.assertEqual(to_table([]), {"columns": [], "rows": []})
+        self.assertEqual(from_table(to_table([])), [])
+        self.assertEqual(from_columns(to_columns([])), [])
+
+    def test_game_results(self):
+        games = GameTable.from_box_scores(BOX_SCORES, "XBL", playoffs=False).to_dicts()
+        with_every_key = [
+            {key: game.get(key, None) for key in keys_of(games)} for game in games
+        ]
+
+        self.assertIs(reshape(games, "objects"), games)
+        self.assertEqual(from_table(reshape(games, "table")), with_every_key)
+        self.assertEqual(from_columns(reshape(games, "columns")), with_every_key)
+        with self.assertRaises(ValueError):
+            reshape(games, "rows")
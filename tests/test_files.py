@@ -0,0 +1,144 @@
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from utils import (
+    atomic_open,
+    atomic_write,
+    load_keyed_json,
+    load_npz,
+    save_keyed_json,
+    save_npz,
+    write_temp,
+)
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write(self):
+        path = self.dir.joinpath("a.json")
+        atomic_write(path, "{}")
+        self.assertEqual(path.read_text(), "{}")
+
+        atomic_write(path, b"[]")
+        self.assertEqual(path.read_text(), "[]", "overwrites")
+
+        self.assertEqual(list(self.dir.iterdir()), [path], "no temp files left over")
+
+    def test_temp(self):
+        path = self.dir.joinpath("a.json")
+        path.write_text("old")
+
+        temp = write_temp(path, b"new")
+
+        self.assertEqual(path.read_text(), "old", "didn't touch the real file")
+        self.assertEqual(temp.parent, path.parent, "same dir so renames are atomic")
+        self.assertEqual(temp.read_bytes(), b"new")
+
+    def test_temp_raises(self):
+        path = self.dir.joinpath("a.json")
+        mkstemp = tempfile.mkstemp
+        fds = []
+
+        def remember_fd(*args, **kwargs):
+            fd, temp = mkstemp(*args, **kwargs)
+            fds.append(fd)
+            return fd, temp
+
+        with mock.patch("tempfile.mkstemp", remember_fd), mock.patch(
+            "os.chmod", side_effect=PermissionError("no")
+        ):
+            with self.assertRaises(PermissionError):
+                write_temp(path, b"new")
+
+        with self.assertRaises(OSError, msg="fd closed"):
+            os.fstat(fds[0])
+        self.assertEqual(list(self.dir.iterdir()), [], "temp file thrown out")
+
+    def test_open_chmod_raises(self):
+        path = self.dir.joinpath("a.json")
+        with mock.patch("os.chmod", side_effect=PermissionError("no")):
+            with self.assertRaises(PermissionError):
+                with atomic_open(path) as f:
+                    f.write("new")
+
+        self.assertEqual(list(self.dir.iterdir()), [], "temp file thrown out")
+
+    def test_open(self):
+        path = self.dir.joinpath("a.json")
+        path.write_text("old")
+
+        with atomic_open(path) as f:
+            f.write("n")
+            self.assertEqual(path.read_text(), "old", "not until the block finishes")
+            f.write("ew")
+
+        self.assertEqual(path.read_text(), "new")
+        self.assertEqual(path.stat().st_mode & 0o777, 0o644, "readable like open()")
+        self.assertEqual(list(self.dir.iterdir()), [path], "no temp files left over")
+
+    def test_open_replace_if(self):
+        path = self.dir.joinpath("a.json")
+        path.write_text("old")
+
+        with atomic_open(path, lambda: False) as f:
+            f.write("new")
+
+        self.assertEqual(path.read_text(), "old")
+        self.assertEqual(list(self.dir.iterdir()), [path], "temp file thrown out")
+
+    def test_open_raises(self):
+        path = self.dir.joinpath("a.json")
+        path.write_text("old")
+
+        with self.assertRaises(ValueError):
+            with atomic_open(path) as f:
+                f.write("half of")
+                raise ValueError("broke halfway")
+
+        self.assertEqual(path.read_text(), "old")
+        self.assertEqual(list(self.dir.iterdir()), [path], "temp file thrown out")
+
+
+class TestKeyed(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_npz(self):
+        path = self.dir.joinpath("cache", "a.npz")
+        save_npz(path, "key", {"a": np.arange(3)})
+
+        arrays = load_npz(path, "key", "test arrays")
+        self.assertEqual(list(arrays.keys()), ["a"], "without the key")
+        self.assertEqual(arrays["a"].tolist(), [0, 1, 2])
+        self.assertIsNone(load_npz(path, "other key", "test arrays"))
+        self.assertIsNone(load_npz(self.dir.joinpath("nope.npz"), "key", "test arrays"))
+
+        path.write_bytes(b"not an npz")
+        with self.assertLogs("stats/files", "WARNING"):
+            self.assertIsNone(load_npz(path, "key", "test arrays"))
+
+    def test_json(self):
+        path = self.dir.joinpath("cache", "a.json")
+        save_keyed_json(path, "key", {"seasons": {"1": 2}})
+
+        self.assertEqual(load_keyed_json(path, "key", "test"), {"seasons": {"1": 2}})
+        self.assertIsNone(load_keyed_json(path, "other key", "test"))
+
+        path.write_text("[]")
+        with self.assertLogs("stats/files", "WARNING"):
+            self.assertIsNone(load_keyed_json(path, "key", "test"))
@@ -0,0 +1,123 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from test_career_tallies import head_to_head, tables
+
+from utils import FrozenSeasons, is_past_season, season_fingerprints
+
+
+def fingerprints(tabs: list) -> dict[str, str]:
+    head_to_head = tables(tabs)
+    return season_fingerprints(
+        head_to_head, [table.row_hashes() for table in head_to_head]
+    )
+
+
+def past(tabs: list, season: int) -> FrozenSeasons:
+    head_to_head = tables(tabs)
+    return FrozenSeasons.past(
+        head_to_head, [table.row_hashes() for table in head_to_head], season
+    )
+
+
+class TestSeasonFingerprints(unittest.TestCase):
+    def setUp(self):
+        # 10 games a season, so seasons 1 through 4
+        self.tabs = [head_to_head(40, seed) for seed in range(3)]
+
+    def test_every_season(self):
+        self.assertEqual(list(fingerprints(self.tabs).keys()), ["1", "2", "3", "4"])
+
+    def test_changed_game(self):
+        changed = [[row.copy() for row in tab] for tab in self.tabs]
+        changed[1][15][4] = "99"
+        before, after = fingerprints(self.tabs), fingerprints(changed)
+
+        self.assertNotEqual(before["2"], after["2"])
+        self.assertEqual(
+            [before[season] for season in ["1", "3", "4"]],
+            [after[season] for season in ["1", "3", "4"]],
+            "other seasons are untouched",
+        )
+
+    def test_new_games(self):
+        before = fingerprints([tab[:35] for tab in self.tabs])
+        after = fingerprints(self.tabs)
+
+        self.assertEqual(
+            [before[season] for season in ["1", "2", "3"]],
+            [after[season] for season in ["1", "2", "3"]],
+        )
+        self.assertNotEqual(before["4"], after["4"])
+
+    def test_moved_game(self):
+        moved = [self.tabs[0], self.tabs[1] + [self.tabs[2][1]], self.tabs[2][:1]]
+        moved[2] += self.tabs[2][2:]
+
+        self.assertNotEqual(fingerprints(self.tabs)["1"], fingerprints(moved)["1"])
+
+
+class TestFrozenSeasons(unittest.TestCase):
+    def setUp(self):
+        self.tabs = [head_to_head(40, seed) for seed in range(3)]
+
+    def freeze_everything(self, frozen_seasons: FrozenSeasons):
+        for season in frozen_seasons.fingerprints.keys():
+            if frozen_seasons.can_freeze(season):
+                frozen_seasons.freeze(
+                    season, {"XBL": 4.5}, {"alice": {"player": "alice"}}
+                )
+
+    def test_past_seasons(self):
+        self.assertTrue(is_past_season("3", 4))
+        self.assertFalse(is_past_season("4", 4))
+        self.assertFalse(is_past_season("preseason", 4))
+
+        frozen_seasons = past(self.tabs, 4)
+        self.assertEqual(list(frozen_seasons.fingerprints.keys()), ["1", "2", "3"])
+        self.assertTrue(frozen_seasons.can_freeze("3"))
+        self.assertFalse(frozen_seasons.can_freeze("4"), "the live season")
+        with self.assertRaises(ValueError):
+            frozen_seasons.freeze("4", {}, {})
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("careers", "regular_season_seasons.json")
+            frozen_seasons = past(self.tabs, 4)
+            self.freeze_everything(frozen_seasons)
+            frozen_seasons.save(path, "code")
+
+            loaded = past(self.tabs, 4).load(path, "code")
+            self.assertEqual(loaded.seasons, frozen_seasons.seasons)
+            self.assertFalse(loaded.can_freeze("1"), "already frozen")
+
+            self.assertEqual(
+                past(self.tabs, 4).load(path, "changed code").seasons,
+                {},
+                "calculated by different code",
+            )
+
+            with open(path, "w") as f:
+                f.write("not json")
+            self.assertEqual(past(self.tabs, 4).load(path, "code").seasons, {})
+            self.assertEqual(
+                past(self.tabs, 4)
+                .load(Path(tmp).joinpath("nope.json"), "code")
+                .seasons,
+                {},
+            )
+
+    def test_thaw_changed_season(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("regular_season_seasons.json")
+            frozen_seasons = past(self.tabs, 4)
+            self.freeze_everything(frozen_seasons)
+            frozen_seasons.save(path, "code")
+
+            changed = [[row.copy() for row in tab] for tab in self.tabs]
+            changed[0][25][5] = "99"
+            loaded = past(changed, 4).load(path, "code")
+
+            self.assertEqual(list(loaded.seasons.keys()), ["1", "2"])
+            self.assertTrue(loaded.can_freeze("3"), "has to be calculated again")
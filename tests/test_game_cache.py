@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from utils import GameCache, GameTable, Symbols
+
+from test_game_table import BOX_SCORES, HEAD_TO_HEAD
+
+NAME = "CAREER_STATS__XBL%20Head%20to%20Head.json"
+
+
+class TestArrays(unittest.TestCase):
+    def assert_round_trip(self, table: GameTable):
+        arrays = table.to_arrays()
+        self.assertNotIn(
+            np.dtype(object), [a.dtype for a in arrays.values()], "no pickles"
+        )
+
+        loaded = GameTable.from_arrays(arrays, Symbols())
+        self.assertEqual(loaded.to_dicts(), table.to_dicts())
+
+    def test_box_scores(self):
+        self.assert_round_trip(GameTable.from_box_scores(BOX_SCORES, "XBL", False))
+
+    def test_playoffs(self):
+        rows = [["Round"], ["Final", "Dragons", "3", "2", "Knights", "7", "1", "2"]]
+        self.assert_round_trip(GameTable.from_box_scores(rows, "AAA", True))
+
+    def test_head_to_head(self):
+        self.assert_round_trip(GameTable.from_head_to_head(HEAD_TO_HEAD, "AA", False))
+
+    def test_empty(self):
+        self.assert_round_trip(GameTable.from_head_to_head([["Season"]], "AA", False))
+
+    def test_shared_symbols(self):
+        symbols = Symbols()
+        symbols.players.intern("carol")
+        arrays = GameTable.from_head_to_head(HEAD_TO_HEAD, "AA", False).to_arrays()
+        loaded = GameTable.from_arrays(arrays, symbols)
+
+        self.assertEqual(loaded.away.tolist(), [1, 2], "IDs from the shared symbols")
+        self.assertEqual(symbols.players.names, ["carol", "alice", "bob"])
+
+
+class TestGameCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.raw_dir = Path(self.tmp.name).joinpath("raw")
+        self.raw_dir.mkdir()
+        self.cache = GameCache(Path(self.tmp.name).joinpath("games"))
+        self.write_tab(HEAD_TO_HEAD)
+        self.parses = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_tab(self, rows: list):
+        with open(self.raw_dir.joinpath(NAME), "w") as f:
+            f.write(json.dumps({"values": rows}))
+
+    def parse(self, rows: list, symbols: Symbols) -> GameTable:
+        self.parses += 1
+        return GameTable.from_head_to_head(rows, "XBL", False, symbols)
+
+    def games(self) -> GameTable:
+        return self.cache.games(self.raw_dir, NAME, self.parse)
+
+    def test_unchanged(self):
+        parsed = self.games()
+        cached = self.games()
+
+        self.assertEqual(self.parses, 1, "only parsed the first time")
+        self.assertEqual(cached.to_dicts(), parsed.to_dicts())
+
+    def test_changed_tab(self):
+        self.games()
+        self.write_tab(HEAD_TO_HEAD[:2])
+
+        self.assertEqual(len(self.games()), 1)
+        self.assertEqual(self.parses, 2)
+
+    def test_parser_version(self):
+        self.games()
+        with mock.patch("utils.game_cache.PARSER_VERSION", -1):
+            self.games()
+
+        self.assertEqual(self.parses, 2)
+
+    def test_unreadable(self):
+        self.games()
+        with open(self.cache.path(NAME), "wb") as f:
+            f.write(b"not an npz")
+
+        self.assertEqual(len(self.games()), 2)
+        self.assertEqual(self.parses, 2)
+
+    def test_no_cache(self):
+        cache = GameCache(None)
+        cache.games(self.raw_dir, NAME, self.parse)
+        cache.games(self.raw_dir, NAME, self.parse)
+
+        self.assertEqual(self.parses, 2)
+        self.assertFalse(Path(self.tmp.name).joinpath("games").exists())
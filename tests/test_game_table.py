@@ -0,0 +1,175 @@
+import unittest
+
+import numpy as np
+
+from utils import EXTRA_KEYS, GameTable, Symbols
+
+BOX_SCORES = [
+    ["Week"],
+    # week, away, away score, home score, home, away e, home e, innings, then 7 hitting stats per team
+    ["1", "Dragons", "3", "2", "Knights", "0", "1", "9", *map(str, range(14))],
+    # disconnect: missing the home team's stats
+    ["1", "Knights", "10", "0", "Dragons", "0", "0", "6", "30", "10", "12"],
+    # a typo in the extra stats
+    ["2", "Dragons", "1", "4", "Knights", "0", "0", "9", "x"],
+    # not a game
+    ["2", "Dragons", "forfeit", "4", "Knights", "0", "0", "9"],
+]
+
+HEAD_TO_HEAD = [
+    ["Season"],
+    # season, week, away, _, away score, home score, _, home, away e, home e, innings, then stats
+    [
+        "18",
+        "1",
+        "alice",
+        "x",
+        "3",
+        "2",
+        "x",
+        "bob",
+        "0",
+        "1",
+        "9",
+        *map(str, range(14)),
+    ],
+    # no innings
+    ["18", "2", "bob", "x", "5", "4", "x", "alice", "0", "0"],
+    ["18", "3", "bob", "x", "?", "4", "x", "alice", "0", "0", "9"],
+]
+
+
+class TestFromBoxScores(unittest.TestCase):
+    def test_columns(self):
+        table = GameTable.from_box_scores(BOX_SCORES, "XBL", playoffs=False)
+
+        self.assertEqual(len(table), 3, "skipped the forfeit")
+        self.assertEqual(table.away.tolist(), [0, 1, 0], "team IDs")
+        self.assertEqual(table.symbols.teams.names, ["Dragons", "Knights"])
+        self.assertEqual(table.away_won.tolist(), [True, True, False])
+        self.assertEqual(table.run_rule.tolist(), [False, True, False])
+        self.assertEqual(table.has_extras.tolist(), [True, True, False])
+        self.assertEqual(table.stat("away_ab").tolist()[:2], [0, 30])
+        self.assertEqual(
+            table.missing[1].tolist(),
+            [False] * 5 + [True] * 4 + [True] * 7,
+            "missing everything after the home team's hits",
+        )
+
+    def test_to_dicts(self):
+        games = GameTable.from_box_scores(BOX_SCORES, "XBL", playoffs=False).to_dicts()
+
+        self.assertEqual(
+            list(games[0].keys())[:9],
+            [
+                "away_team",
+                "home_team",
+                "away_score",
+                "home_score",
+                "innings",
+                "winner",
+                "run_rule",
+                "league",
+                "week",
+            ],
+        )
+        self.assertEqual(list(games[0].keys())[9:], EXTRA_KEYS)
+        self.assertEqual(games[0]["home_so"], 13)
+        self.assertIsNone(games[1]["home_ab"])
+        self.assertNotIn("away_ab", games[2], "no extra stats when they're wrong")
+        self.assertIsInstance(games[0]["week"], int)
+        self.assertIsInstance(games[0]["innings"], float)
+
+    def test_playoffs(self):
+        rows = [["Round"], ["Final", "Dragons", "3", "2", "Knights", "7", "1", "2"]]
+        games = GameTable.from_box_scores(rows, "AAA", playoffs=True).to_dicts()
+
+        self.assertEqual(games[0]["round"], "Final")
+        self.assertIsNone(games[0]["away_e"], "no errors in the playoffs")
+        self.assertEqual(games[0]["away_ab"], 1)
+        self.assertTrue(games[0]["run_rule"])
+
+    def test_unformatted(self):
+        rows = [["Week"], [1, "Dragons", 3, 2, "Knights", 0, 1, 9, *range(14)]]
+        unformatted = GameTable.from_box_scores(rows, "XBL", playoffs=False)
+        formatted = GameTable.from_box_scores(BOX_SCORES[:2], "XBL", playoffs=False)
+
+        self.assertEqual(unformatted.to_dicts(), formatted.to_dicts())
+
+    def test_empty(self):
+        table = GameTable.from_box_scores([["Week"]], "AA", playoffs=False)
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.to_dicts(), [])
+
+
+class TestFromHeadToHead(unittest.TestCase):
+    def test_to_dicts(self):
+        games = GameTable.from_head_to_head(HEAD_TO_HEAD, "AAA", False).to_dicts()
+
+        self.assertEqual(len(games), 2, "skipped the game without a score")
+        self.assertEqual(
+            list(games[0].keys())[:4],
+            ["season", "league", "away_player", "home_player"],
+        )
+        self.assertEqual(games[0]["season"], "18", "seasons stay strings")
+        self.assertEqual(games[0]["league"], "AAA")
+        self.assertEqual(games[0]["away_e"], 0)
+        self.assertIsNone(games[1]["innings"])
+        self.assertFalse(games[1]["run_rule"])
+        self.assertIsNone(games[1]["away_ab"])
+
+    def test_concat(self):
+        symbols = Symbols()
+        table = GameTable.concat(
+            [
+                GameTable.from_head_to_head(HEAD_TO_HEAD, "XBL", False, symbols),
+                GameTable.from_head_to_head(HEAD_TO_HEAD, "AA", False, symbols),
+            ]
+        )
+
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.league.tolist(), [0, 0, 1, 1])
+        self.assertEqual(table.away.tolist(), [0, 1, 0, 1], "same IDs in every league")
+        self.assertEqual(table.to_dicts()[2]["league"], "AA")
+        self.assertTrue(np.array_equal(table.stats[:2], table.stats[2:]))
+
+    def test_take(self):
+        table = GameTable.from_head_to_head(HEAD_TO_HEAD, "AAA", False)
+
+        self.assertEqual(
+            table.take(slice(1, None)).to_dicts(), table.to_dicts()[1:], "just game 2"
+        )
+
+    def test_row_hashes(self):
+        table = GameTable.from_head_to_head(HEAD_TO_HEAD, "AAA", False)
+        symbols = Symbols()
+        symbols.players.intern("carol")
+        other_ids = GameTable.from_head_to_head(HEAD_TO_HEAD, "AAA", False, symbols)
+
+        self.assertEqual(len(set(table.row_hashes().tolist())), 2)
+        self.assertEqual(
+            other_ids.row_hashes().tolist(),
+            table.row_hashes().tolist(),
+            "names are hashed, not IDs",
+        )
+
+        changed = [row.copy() for row in HEAD_TO_HEAD]
+        changed[1][12] = "2"
+        self.assertNotEqual(
+            GameTable.from_head_to_head(changed, "AAA", False).row_hashes()[0],
+            table.row_hashes()[0],
+        )
+        self.assertNotEqual(
+            GameTable.from_head_to_head(HEAD_TO_HEAD, "AA", False).row_hashes()[0],
+            table.row_hashes()[0],
+            "different league",
+        )
+
+    def test_concat_different_symbols(self):
+        with self.assertRaises(ValueError):
+            GameTable.concat(
+                [
+                    GameTable.from_head_to_head(HEAD_TO_HEAD, "XBL", False),
+                    GameTable.from_head_to_head(HEAD_TO_HEAD, "AA", False),
+                ]
+            )
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from utils import (
+    first_seen,
+    group_any,
+    group_cumsum,
+    group_ids,
+    group_last,
+    group_max,
+    group_min,
+    group_sum,
+)
+
+GROUPS = np.array([2, 0, 2, 1, 0])
+
+
+class TestGroupBy(unittest.TestCase):
+    def test_first_seen(self):
+        self.assertEqual(first_seen(GROUPS).tolist(), [2, 0, 1])
+
+    def test_group_ids(self):
+        ids, keys = group_ids(np.array([1, 0, 1, 1]), np.array([5, 5, 5, 0]))
+
+        self.assertEqual(
+            ids.tolist(), [0, 1, 0, 2], "numbered in the order they show up"
+        )
+        self.assertEqual(keys.tolist(), [[1, 5], [0, 5], [1, 0]])
+
+    def test_group_last(self):
+        self.assertEqual(group_last(GROUPS, 4).tolist(), [4, 3, 2, -1])
+
+    def test_group_min_max(self):
+        values = np.array([5, 1, 3, 4, 2])
+        self.assertEqual(group_min(GROUPS, values, 3).tolist(), [1, 4, 3])
+        self.assertEqual(group_max(GROUPS, values, 3).tolist(), [2, 4, 5])
+
+    def test_group_sum(self):
+        values = np.array([1, 2, 3, 4, 5])
+        self.assertEqual(group_sum(GROUPS, values, 4).tolist(), [7, 4, 4, 0])
+
+    def test_group_sum_columns(self):
+        values = np.array([[1, 10], [2, 20], [3, 30], [4, 40], [5, 50]])
+        self.assertEqual(
+            group_sum(GROUPS, values, 3).tolist(), [[7, 70], [4, 40], [4, 40]]
+        )
+
+    def test_group_any(self):
+        mask = np.array(
+            [[False, True], [False, False], [False, False]] + [[True] * 2] * 2
+        )
+        self.assertEqual(
+            group_any(GROUPS, mask, 3).tolist(),
+            [[True, True], [True, True], [False, True]],
+        )
+
+    def test_group_cumsum(self):
+        values = np.array([1, 2, 3, 4, 5])
+        self.assertEqual(group_cumsum(GROUPS, values).tolist(), [1, 2, 4, 4, 7])
+
+    def test_empty(self):
+        empty = np.zeros(0, dtype=np.int64)
+        self.assertEqual(first_seen(empty).tolist(), [])
+        self.assertEqual(group_sum(empty, empty, 2).tolist(), [0, 0])
+        self.assertEqual(group_cumsum(empty, empty).tolist(), [])
+        self.assertEqual(group_ids(empty, empty)[1].shape, (0, 2))
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import unittest
+
+from utils import SafeArray, SafeEncoder, SafeNum, hash_json, iter_json, write_json
+
+DATA = {
+    "regular_season": {
+        "alice": {"player": "alice", "era": 3.25, "by_league": {"XBL": None}},
+        "bob": {"player": "bob", "era": float("nan"), "by_season": {}},
+    },
+    "head_to_head": [{"a": [1, 2.5, None]}, [], {}],
+    "safe": {"num": SafeNum(4), "none": SafeNum(None), "array": SafeArray([1, None])},
+    "keys": {1: "not a string", None: True},
+    "unicode": "ñ",
+    "last_updated_at": "2025-01-01 09:00:00",
+}
+
+
+class TestJsonWriter(unittest.TestCase):
+    def test_same_as_dumps(self):
+        for depth in range(5):
+            with self.subTest(depth=depth):
+                self.assertEqual(
+                    "".join(iter_json(DATA, depth)), json.dumps(DATA, cls=SafeEncoder)
+                )
+
+        for data in [SafeNum(2.5), [], {}, "x", None]:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    "".join(iter_json(data)), json.dumps(data, cls=SafeEncoder)
+                )
+
+    def test_pieces(self):
+        pieces = list(iter_json(DATA["regular_season"], 1))
+        self.assertEqual(len(pieces), 5, "a key and a player at a time")
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("careers.json")
+            write_json(path, DATA)
+
+            self.assertEqual(path.read_text(), json.dumps(DATA, cls=SafeEncoder))
+            self.assertEqual(list(Path(tmp).iterdir()), [path])
+
+    def test_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("careers.json")
+            digest = write_json(path, DATA)
+            self.assertEqual(digest, hashlib.sha256(path.read_bytes()).hexdigest())
+            self.assertEqual(digest, hash_json(DATA))
+
+            unhashed = write_json(path, DATA, 1, unhashed=["last_updated_at"])
+            self.assertEqual(unhashed, hash_json(DATA, ["last_updated_at"]))
+            without = {k: v for (k, v) in DATA.items() if k != "last_updated_at"}
+            self.assertEqual(unhashed, hash_json(without), "same as leaving it out")
+
+    def test_unless(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("careers.json")
+            digest = write_json(path, DATA)
+            os.utime(path, (0, 0))
+
+            self.assertEqual(
+                write_json(path, {**DATA, "x": 1}, unless=digest),
+                hash_json({**DATA, "x": 1}),
+            )
+            self.assertNotEqual(path.stat().st_mtime, 0, "changed, so written")
+
+            os.utime(path, (0, 0))
+            write_json(path, {**DATA, "x": 1}, unless=hash_json({**DATA, "x": 1}))
+            self.assertEqual(path.stat().st_mtime, 0, "left alone")
+            self.assertEqual(list(Path(tmp).iterdir()), [path], "new file thrown out")
@@ -0,0 +1,170 @@
+import gzip
+import json
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import (
+    Outputs,
+    compress,
+    compress_outputs,
+    content_hash,
+    has_brotli,
+    iter_keyed_json,
+    load_output_manifest,
+)
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.dir.joinpath("XBL.json").write_text('{"teams": []}' * 100)
+        self.dir.joinpath("careers").mkdir()
+        self.dir.joinpath("careers", "alice.json").write_text('{"player": "alice"}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compress(self):
+        manifest = compress_outputs(
+            self.dir, ["XBL.json", "careers/alice.json"], {"gzip": 9}, jobs=2
+        )
+
+        xbl = manifest["outputs"]["XBL.json"]
+        self.assertEqual(xbl["size"], 1300)
+        self.assertEqual(xbl["compressed"]["gzip"]["path"], "XBL.json.gz")
+        self.assertLess(xbl["compressed"]["gzip"]["size"], xbl["size"])
+        self.assertEqual(
+            gzip.decompress(self.dir.joinpath("XBL.json.gz").read_bytes()),
+            self.dir.joinpath("XBL.json").read_bytes(),
+        )
+        self.assertTrue(self.dir.joinpath("careers", "alice.json.gz").exists())
+        self.assertEqual(load_output_manifest(self.dir), manifest, "saved")
+
+    def test_same_bytes(self):
+        first = compress_outputs(self.dir, ["XBL.json"], {"gzip": 9})
+        self.dir.joinpath("XBL.json.gz").unlink()
+        second = compress_outputs(self.dir, ["XBL.json"], {"gzip": 9})
+
+        self.assertEqual(first, second, "compressed again to the same bytes")
+
+    def test_only_compress_changes(self):
+        compress_outputs(self.dir, ["XBL.json", "careers/alice.json"], {"gzip": 9})
+        self.dir.joinpath("XBL.json").write_text('{"teams": [1]}')
+
+        with mock.patch("utils.outputs.compress", wraps=compress) as compressed:
+            manifest = compress_outputs(
+                self.dir, ["XBL.json", "careers/alice.json"], {"gzip": 9}
+            )
+
+        self.assertEqual(compressed.call_count, 1, "just XBL.json")
+        self.assertEqual(manifest["outputs"]["XBL.json"]["size"], 14)
+
+        compress_outputs(self.dir, ["XBL.json", "careers/alice.json"], {"gzip": 1})
+        self.assertEqual(
+            load_output_manifest(self.dir)["outputs"]["XBL.json"]["compressed"]["gzip"][
+                "level"
+            ],
+            1,
+            "compressed again at the new level",
+        )
+
+    def test_remove_stale(self):
+        compress_outputs(self.dir, ["XBL.json", "careers/alice.json"], {"gzip": 9})
+
+        self.dir.joinpath("careers", "alice.json").unlink()
+        compress_outputs(self.dir, ["XBL.json"], {"gzip": 9})
+        self.assertFalse(
+            self.dir.joinpath("careers", "alice.json.gz").exists(), "output is gone"
+        )
+
+        compress_outputs(self.dir, ["XBL.json"], {})
+        self.assertFalse(self.dir.joinpath("XBL.json.gz").exists(), "gzip turned off")
+        self.assertEqual(
+            load_output_manifest(self.dir)["outputs"]["XBL.json"]["compressed"], {}
+        )
+
+    @unittest.skipIf(has_brotli(), "brotli is installed")
+    def test_no_brotli(self):
+        with self.assertRaises(Exception):
+            compress_outputs(self.dir, ["XBL.json"], {"br": 11})
+
+
+class TestOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, data: dict, last_updated_at: str) -> Outputs:
+        outputs = Outputs(self.dir)
+        outputs.write_json("XBL__s18.json", data)
+        outputs.alias("XBL.json", "XBL__s18.json")
+        outputs.write_json(
+            "careers.json", {"players": ["alice"], "last_updated_at": last_updated_at}
+        )
+        outputs.finish(["XBL__s18.json", "XBL.json", "careers.json"], {"gzip": 9})
+        return outputs
+
+    def test_unchanged(self):
+        self.build({"teams": []}, "2025-01-01 09:00:00")
+        careers = self.dir.joinpath("careers.json")
+        os.utime(careers, (0, 0))
+
+        outputs = self.build({"teams": []}, "2025-01-02 09:00:00")
+
+        self.assertEqual(outputs.changed, [])
+        self.assertEqual(load_output_manifest(self.dir)["changed"], [])
+        self.assertEqual(careers.stat().st_mtime, 0, "left alone")
+        self.assertIn("2025-01-01", careers.read_text(), "only the time is different")
+
+    def test_changed(self):
+        self.build({"teams": []}, "2025-01-01 09:00:00")
+        outputs = self.build({"teams": ["dragons"]}, "2025-01-01 09:00:00")
+
+        self.assertEqual(outputs.changed, ["XBL__s18.json", "XBL.json"])
+        self.assertEqual(
+            json.loads(self.dir.joinpath("XBL.json").read_text()),
+            {"teams": ["dragons"]},
+        )
+
+    def test_alias(self):
+        self.build({"teams": []}, "2025-01-01 09:00:00")
+        manifest = load_output_manifest(self.dir)["outputs"]
+
+        self.assertEqual(manifest["XBL.json"]["alias_of"], "XBL__s18.json")
+        self.assertEqual(
+            manifest["XBL.json"]["sha256"], manifest["XBL__s18.json"]["sha256"]
+        )
+        self.assertEqual(
+            manifest["XBL.json"]["compressed"]["gzip"]["path"], "XBL.json.gz"
+        )
+        self.assertIsNone(manifest["XBL__s18.json"]["alias_of"])
+        for name in ["XBL.json", "XBL.json.gz"]:
+            with self.subTest(name=name):
+                self.assertTrue(self.dir.joinpath(name).is_symlink(), "not a copy")
+        self.assertEqual(
+            gzip.decompress(self.dir.joinpath("XBL.json.gz").read_bytes()),
+            self.dir.joinpath("XBL.json").read_bytes(),
+        )
+
+    def test_encode_once(self):
+        with mock.patch(
+            "utils.json_writer.iter_keyed_json", wraps=iter_keyed_json
+        ) as encoded:
+            self.build({"teams": []}, "2025-01-01 09:00:00")
+            self.build({"teams": ["dragons"]}, "2025-01-01 09:00:00")
+
+        self.assertEqual(encoded.call_count, 4, "once per output per build")
+
+    def test_content_hash(self):
+        self.assertEqual(
+            content_hash({"a": 1, "last_updated_at": "now"}),
+            content_hash({"a": 1, "last_updated_at": "later"}),
+        )
+        self.assertNotEqual(content_hash({"a": 1}), content_hash({"a": 2}))
@@ -0,0 +1,189 @@
+import json
+from pathlib import Path
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from test_career_tallies import PLAYERS, head_to_head, tables
+
+from main import query_range
+from utils import (
+    TALLY_KEYS,
+    GameCache,
+    GameTable,
+    RangeIndex,
+    Tallies,
+    parse_week,
+    parse_week_range,
+    tally_games,
+)
+
+
+def with_weeks(tab: list, seed: int) -> list:
+    """a Head to Head tab with the games spread over weeks 1 through 4 of every season"""
+    rng = random.Random(seed)
+    rows = [tab[0]]
+    for row in tab[1:]:
+        rows.append([row[0], str(rng.randint(1, 4)), *row[2:]])
+    return rows
+
+
+class TestParseWeekRange(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_week("12"), (12, None))
+        self.assertEqual(parse_week("12:3"), (12, 3))
+        self.assertEqual(parse_week_range("12-18"), ((12, None), (18, None)))
+        self.assertEqual(parse_week_range("10:3-18:5"), ((10, 3), (18, 5)))
+        self.assertEqual(parse_week_range("10-"), ((10, None), None))
+        self.assertEqual(parse_week_range("-18"), (None, (18, None)))
+
+    def test_bad_ranges(self):
+        for text in ["12", "a-b", "12:x-13", "12:1000-13"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_week_range(text)
+
+
+class TestRangeIndex(unittest.TestCase):
+    def setUp(self):
+        # 10 games a season, so seasons 1 through 6
+        self.tabs = [with_weeks(head_to_head(60, seed), seed) for seed in range(3)]
+        self.head_to_head = tables(self.tabs)
+        self.index = RangeIndex.from_games(self.head_to_head)
+
+    def add_up(self, player, first, last, league) -> Tallies | None:
+        """every game in the range, one at a time"""
+        games = GameTable.concat(self.head_to_head)
+        players, _, rows, missing = tally_games(games)
+        symbols = games.symbols
+        total = None
+        for i in range(len(players)):
+            game = i // 2
+            season = int(symbols.seasons.name(games.season[game]))
+            week = (season, int(games.label[game]))
+            if player is not None and symbols.players.name(players[i]) != player:
+                continue
+            if (
+                league is not None
+                and symbols.leagues.name(games.league[game]) != league
+            ):
+                continue
+            if first is not None and week < (first[0], first[1] or 0):
+                continue
+            if last is not None and week > (last[0], last[1] or 1000):
+                continue
+
+            row = Tallies.from_row(rows[i].tolist(), missing[i].tolist())
+            row.add_season(int(games.season[game]))
+            total = Tallies.merge(total, row)
+
+        return total
+
+    def assert_same(self, a: Tallies | None, b: Tallies | None):
+        if a is None or b is None:
+            self.assertIs(a, b)
+            return
+
+        self.assertEqual([a[key] for key in TALLY_KEYS], [b[key] for key in TALLY_KEYS])
+        self.assertEqual(a.season_ids(), b.season_ids())
+
+    def test_ranges(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            player = rng.choice([*PLAYERS, None])
+            league = rng.choice(["XBL", "AAA", "AA", None])
+            first = rng.choice([None, (rng.randint(1, 6), rng.choice([None, 2]))])
+            last = rng.choice([None, (rng.randint(1, 6), rng.choice([None, 3]))])
+            with self.subTest(player=player, league=league, first=first, last=last):
+                self.assert_same(
+                    self.index.tallies(player, first, last, league),
+                    self.add_up(player, first, last, league),
+                )
+
+    def test_everything(self):
+        everything = self.index.tallies(None)
+        self.assertEqual(
+            everything["innings_pitching"],
+            2 * sum([int(row[10]) for tab in self.tabs for row in tab[1:]]),
+        )
+        self.assertEqual(len(everything.season_ids()), 6)
+
+    def test_no_games(self):
+        self.assertIsNone(self.index.tallies("nobody"))
+        self.assertIsNone(self.index.tallies("alice", league="AAAA"))
+        self.assertIsNone(self.index.tallies("alice", (7, None)))
+        self.assertIsNone(self.index.tallies("alice", (4, None), (3, None)))
+
+    def test_playoffs(self):
+        playoffs = GameTable.from_head_to_head(self.tabs[0], "XBL", True)
+        with self.assertRaises(ValueError):
+            RangeIndex.from_games([playoffs])
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("range_index.npz")
+            self.index.save(path, "key")
+            loaded = RangeIndex.load(path, "key")
+
+            self.assertEqual(loaded.owners, self.index.owners)
+            for player in [*PLAYERS, None]:
+                with self.subTest(player=player):
+                    self.assert_same(
+                        loaded.tallies(player, (2, 2), (5, None), "AAA"),
+                        self.index.tallies(player, (2, 2), (5, None), "AAA"),
+                    )
+
+            self.assertIsNone(RangeIndex.load(path, "other games"))
+            with open(path, "wb") as f:
+                f.write(b"not an npz")
+            self.assertIsNone(RangeIndex.load(path, "key"))
+
+
+class TestQueryRange(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.raw = Path(self.tmp.name)
+        self.index_path = self.raw.joinpath("cache", "range_index.npz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_tabs(self, tabs: list):
+        for rows, league in zip(tabs, ["XBL", "AAA", "AA"]):
+            with open(
+                self.raw.joinpath(f"CAREER_STATS__{league}%20Head%20to%20Head.json"),
+                "w",
+            ) as f:
+                json.dump({"values": rows}, f)
+
+    def query(self, *args) -> dict | None:
+        return query_range(self.raw, GameCache(None), *args, index_path=self.index_path)
+
+    def test_saved_index(self):
+        tabs = [with_weeks(head_to_head(40, seed), seed) for seed in range(3)]
+        self.write_tabs(tabs)
+        first = self.query("alice", (2, None), (3, None))
+
+        with mock.patch.object(
+            RangeIndex, "from_games", side_effect=AssertionError("built again")
+        ):
+            self.assertEqual(self.query("alice", (2, None), (3, None)), first)
+
+        tabs[0].append(["4", "1", "alice", "x", "9", "0", "x", "bob", "0", "0", "9"])
+        self.write_tabs(tabs)
+        self.assertNotEqual(
+            self.query("alice", (2, None), (4, None))["rs"],
+            self.query("alice", (2, None), (3, None))["rs"],
+            "built again with the new game",
+        )
+
+    def test_no_innings(self):
+        # games without any stat columns
+        self.write_tabs(
+            [[["Season"], ["1", "1", "alice", "x", "3", "2", "x", "bob"]]] * 3
+        )
+
+        stats = self.query("alice", (1, 1), (1, 1))
+        self.assertEqual(stats["wins"], 3)
+        self.assertIsNone(stats["fip"], "no league ERA to compare against")
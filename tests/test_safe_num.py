@@ -1,8 +1,12 @@
+import copy
 import json
 import math
+import pickle
 import unittest
 
-from utils import SafeEncoder, SafeNum
+import numpy as np
+
+from utils import SafeArray, SafeEncoder, SafeNum
 
 
 class TestSafeNumOperations(unittest.TestCase):
@@ -290,3 +294,166 @@ class TestSafeNumOperations(unittest.TestCase):
         self.assertTrue(b.is_none, "None is None")
 
         self.assertIsNotNone(b, "SafeNum cannot be used with `is None' syntax")
+
+    def test_immutable(self):
+        a = SafeNum(1.23456)
+
+        self.assertEqual(round(a, 2), 1.23)
+        self.assertEqual(a, 1.23456, "round makes a new SafeNum")
+
+        b = a
+        b += 1
+
+        self.assertEqual(a, 1.23456, "+= makes a new SafeNum")
+
+        with self.assertRaises(AttributeError):
+            a._x = 2
+
+        self.assertIs(SafeNum(None), SafeNum("x"), "every None is the same")
+        self.assertIs(SafeNum(3) / 0, SafeNum(None))
+
+    def test_copy_and_pickle(self):
+        stats = {"era": SafeNum(3.5), "whip": SafeNum(None)}
+        for name, copied in [
+            ("copy", {key: copy.copy(value) for (key, value) in stats.items()}),
+            ("deepcopy", copy.deepcopy(stats)),
+            ("pickle", pickle.loads(pickle.dumps(stats))),
+        ]:
+            with self.subTest(name=name):
+                self.assertEqual(copied["era"], 3.5)
+                self.assertIsInstance(copied["era"], SafeNum)
+                self.assertIs(copied["whip"], SafeNum(None), "still the shared None")
+
+    def test_safe_array(self):
+        self.assertEqual(
+            SafeNum(1) + SafeArray([1, None]),
+            [2, None],
+            "SafeArrays do the math with SafeNums",
+        )
+        self.assertEqual(SafeNum(None) * SafeArray([1, 2]), [None, None])
+
+
+class TestSafeArrayOperations(unittest.TestCase):
+    def test_adding(self):
+        x = SafeArray([1, None, 3])
+        y = SafeArray([2, 2, None])
+
+        self.assertEqual(x + y, [3, None, None], "Two SafeArrays")
+        self.assertEqual(1 + y, [3, 3, None], "An int and a SafeArray")
+        self.assertEqual(x + 1.5, [2.5, None, 4.5], "A SafeArray and a float")
+        self.assertEqual(x + SafeNum(1), [2, None, 4], "A SafeArray and a SafeNum")
+        self.assertIsInstance(1 + y, SafeArray, "int + SafeArray = SafeArray")
+
+        z = x
+        z += y
+
+        self.assertEqual(z, [3, None, None], "+= between SafeArrays")
+        self.assertEqual(x, [1, None, 3], "+= makes a new SafeArray")
+
+    def test_subtracting(self):
+        x = SafeArray([1, None])
+        y = SafeArray([2, 2])
+
+        self.assertEqual(x - y, [-1, None], "Two SafeArrays")
+        self.assertEqual(1 - y, [-1, -1], "An int and a SafeArray")
+        self.assertEqual(x - 1.0, [0.0, None], "A SafeArray and a float")
+        self.assertEqual(-x, [-1, None], "negative")
+
+    def test_multiplying(self):
+        x = SafeArray([3, None])
+        y = SafeArray([2, 2])
+
+        self.assertEqual(x * y, [6, None], "Two SafeArrays")
+        self.assertEqual(1.5 * y, [3.0, 3.0], "A float and a SafeArray")
+        self.assertEqual(x**2, [9, None], "squared")
+
+    def test_dividing_float(self):
+        x = SafeArray([3, 4, None])
+        y = SafeArray([2, 0, 2])
+
+        self.assertEqual(x / y, [1.5, None, None], "x / 0 = None")
+        self.assertEqual(1 / y, [0.5, None, 0.5], "An int and a SafeArray")
+        self.assertEqual(x / 2, [1.5, 2.0, None], "A SafeArray and an int")
+        self.assertEqual(x / 0, [None, None, None], "everything / 0 = None")
+
+    def test_dividing_int(self):
+        x = SafeArray([3, 5])
+        y = SafeArray([2, 0])
+
+        self.assertEqual(x // y, [1, None], "x // 0 = None")
+        self.assertEqual(11 // SafeArray([2]), [5], "An int and a SafeArray")
+
+    def test_nones(self):
+        x = SafeArray([3, 4])
+
+        self.assertEqual(x + None, [None, None], "SafeArray + None = None")
+        self.assertEqual(x - None, [None, None], "SafeArray - None = None")
+        self.assertEqual(x * None, [None, None], "SafeArray * None = None")
+        self.assertEqual(x / None, [None, None], "SafeArray / None = None")
+        self.assertEqual(None + x, [None, None], "None + SafeArray = None")
+        self.assertEqual(None / x, [None, None], "None / SafeArray = None")
+        self.assertEqual(
+            x + SafeNum(None), [None, None], "SafeArray + SafeNum(None) = None"
+        )
+
+    def test_series_of_operations(self):
+        a = SafeArray([3, 1])
+        b = SafeArray([4, 1])
+        c = SafeArray([5, 1])
+        d = SafeArray([0, 1])
+
+        self.assertEqual(a + b / 10, [3.4, 1.1], "add and divide")
+        self.assertEqual(
+            (a + b + c / d) / 4,
+            [None, 0.75],
+            "dividing by 0 is None and it turns everything None",
+        )
+
+    def test_same_as_safe_num(self):
+        h = [12, 0, None, 7]
+        ab = [40, 0, 10, 3]
+        x = SafeArray(h) / SafeArray(ab)
+
+        self.assertEqual(
+            x.tolist(),
+            [(SafeNum(a) / SafeNum(b))._x for (a, b) in zip(h, ab)],
+        )
+        self.assertEqual(x[0], SafeNum(12) / SafeNum(40))
+
+    def test_rounding(self):
+        self.assertEqual(round(SafeArray([1.23456, None]), 3), [1.235, None])
+        self.assertEqual(round(SafeArray([3, 4]), 2), [3, 4], "ints stay ints")
+
+        values = np.random.default_rng(0).random(10_000) * 100
+        values = np.concatenate([values, np.arange(-2000, 2000) / 8])
+        for digits in [2, 3]:
+            self.assertEqual(
+                round(SafeArray(values), digits).tolist(),
+                [round(x, digits) for x in values.tolist()],
+                "rounds exactly like python",
+            )
+
+    def test_json_dump(self):
+        dumped = json.dumps({"d": SafeArray([4, None])}, cls=SafeEncoder)
+
+        self.assertEqual(dumped, '{"d": [4, null]}', "ints JSON stringified")
+
+        dumped = json.dumps({"d": SafeArray([4.0, 0.5])}, cls=SafeEncoder)
+
+        self.assertEqual(dumped, '{"d": [4.0, 0.5]}', "floats JSON stringified")
+
+        self.assertEqual(
+            json.dumps((SafeArray([4, None]) / 2).tolist()),
+            "[2.0, null]",
+            "tolist turns into plain numbers and Nones",
+        )
+
+    def test_is_none(self):
+        a = SafeArray([0, None])
+
+        self.assertEqual(a.is_none.tolist(), [False, True], "0 is not None")
+        self.assertEqual(
+            SafeArray(np.array([1, 2]), np.array([True, False])),
+            [1, None],
+            "from a numpy array and which values are valid",
+        )
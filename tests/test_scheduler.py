@@ -0,0 +1,129 @@
+import unittest
+import urllib.error
+
+from fake_sheets import FakeSheetsServer
+from utils import FetchScheduler, TokenBucket, tab_url
+
+SHEETS = {"league-id": {"Standings": [["Rank", "Team"], ["1", "Dragons"]]}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=3, clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0, "bursts don't wait")
+
+        self.assertEqual(clock.sleeps, [], "no waiting during the burst")
+
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=clock.sleep)
+
+        for _ in range(5):
+            bucket.acquire()
+
+        self.assertAlmostEqual(clock.now, 2.0, msg="4 requests past the burst at 2/s")
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire()
+        bucket.acquire()
+        clock.now += 10
+
+        self.assertEqual(bucket.acquire(), 0, "idle time refills the bucket")
+        self.assertEqual(bucket.acquire(), 0, "up to capacity")
+        self.assertGreater(bucket.acquire(), 0, "but not past capacity")
+
+
+class TestFetchScheduler(unittest.TestCase):
+    def scheduler(self, **kwargs) -> tuple[FetchScheduler, FakeClock]:
+        clock = FakeClock()
+        scheduler = FetchScheduler(
+            requests_per_minute=6000,
+            sleep=clock.sleep,
+            jitter=lambda: 1.0,
+            **kwargs,
+        )
+        return scheduler, clock
+
+    def url(self, server: FakeSheetsServer) -> str:
+        return tab_url(server.api_url, "league-id", "Standings", "key")
+
+    def test_backoff(self):
+        scheduler, clock = self.scheduler(backoff=1.0, max_backoff=3.0)
+
+        self.assertEqual(
+            [scheduler.delay(attempt) for attempt in range(4)],
+            [1.0, 2.0, 3.0, 3.0],
+            "exponential up to the max",
+        )
+
+        scheduler._jitter = lambda: 0.5
+        self.assertEqual(scheduler.delay(1), 1.0, "jittered")
+        self.assertEqual(scheduler.delay(1, "2"), 2.0, "Retry-After wins")
+        self.assertEqual(scheduler.delay(1, "60"), 3.0, "but is capped")
+
+    def test_retries_429(self):
+        scheduler, clock = self.scheduler()
+
+        with FakeSheetsServer(SHEETS, errors={"Standings": [429, 503]}) as server:
+            res = scheduler.request(self.url(server), {})
+
+        self.assertEqual(res["status"], 200, "eventually worked")
+        self.assertEqual(len(server.requests), 3, "tried 3 times")
+        self.assertEqual(scheduler.retries, 2)
+        self.assertEqual(clock.sleeps, [1.0, 2.0], "backed off between tries")
+
+    def test_retry_after(self):
+        scheduler, clock = self.scheduler()
+
+        with FakeSheetsServer(
+            SHEETS, errors={"Standings": [429]}, retry_after="7"
+        ) as server:
+            scheduler.request(self.url(server), {})
+
+        self.assertEqual(clock.sleeps, [7.0], "waited as long as we were told")
+
+    def test_gives_up(self):
+        scheduler, clock = self.scheduler(max_retries=2)
+
+        with FakeSheetsServer(SHEETS, errors={"Standings": [429] * 5}) as server:
+            with self.assertRaises(urllib.error.HTTPError):
+                scheduler.request(self.url(server), {})
+
+        self.assertEqual(len(server.requests), 3, "first try plus 2 retries")
+
+    def test_no_retry_on_bad_request(self):
+        scheduler, clock = self.scheduler()
+
+        with FakeSheetsServer(SHEETS, errors={"Standings": [400]}) as server:
+            with self.assertRaises(urllib.error.HTTPError):
+                scheduler.request(self.url(server), {})
+
+        self.assertEqual(len(server.requests), 1, "a 400 won't get better")
+
+    def test_slow_response(self):
+        scheduler, clock = self.scheduler(timeout=0.2)
+
+        with FakeSheetsServer(SHEETS, stalls={"Standings": [1.0]}) as server:
+            res = scheduler.request(self.url(server), {})
+
+        self.assertEqual(res["status"], 200, "retried after timing out")
+        self.assertEqual(scheduler.retries, 1)
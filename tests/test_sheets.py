@@ -0,0 +1,523 @@
+import copy
+import json
+from pathlib import Path
+import tempfile
+import unittest
+import urllib.parse
+
+from fake_sheets import FakeSheetsServer
+from utils import (
+    UNFORMATTED_VALUE,
+    FetchScheduler,
+    fetch_tabs,
+    fetch_tabs_batched,
+    load_manifest,
+    save_manifest,
+    tab_filename,
+    updated_manifest,
+)
+
+SHEETS = {
+    "league-id": {
+        "Standings": [["Rank", "Team"], ["1", "Dragons"]],
+        "Box Scores": [["Week"], ["1", "Dragons", "3", "2", "Knights"]],
+    },
+    "career-id": {
+        f"{league} Head to Head": [["Season"], ["18", "1", league]]
+        for league in ["XBL", "AAA", "AA"]
+    },
+}
+
+TAB_REQUESTS = [
+    {
+        "sheet": "XBL",
+        "spreadsheet_id": "league-id",
+        "tab": "Standings",
+        "append_only": False,
+    },
+    {
+        "sheet": "XBL",
+        "spreadsheet_id": "league-id",
+        "tab": "Box%20Scores",
+        "append_only": False,
+    },
+    *[
+        {
+            "sheet": "CAREER_STATS",
+            "spreadsheet_id": "career-id",
+            "tab": f"{league}%20Head%20to%20Head",
+            "append_only": True,
+        }
+        for league in ["XBL", "AAA", "AA"]
+    ],
+]
+
+
+class TestFetchTabs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_saves_tabs(self):
+        with FakeSheetsServer(SHEETS) as server:
+            results = fetch_tabs(
+                TAB_REQUESTS, self.save_dir, "key", {}, api_url=server.api_url
+            )
+
+        self.assertEqual(len(results), len(TAB_REQUESTS), "one result per tab")
+
+        with open(self.save_dir.joinpath("XBL__Box%20Scores.json")) as f:
+            saved = json.load(f)
+
+        self.assertEqual(
+            saved["values"], SHEETS["league-id"]["Box Scores"], "same naming as before"
+        )
+
+        for result, tab_request in zip(results, TAB_REQUESTS):
+            self.assertEqual(result["tab"], tab_request["tab"], "results are in order")
+            self.assertEqual(
+                result["path"].name,
+                tab_filename(tab_request["sheet"], tab_request["tab"]),
+            )
+            self.assertGreaterEqual(result["seconds"], 0, "timed each tab")
+            self.assertTrue(result["path"].exists())
+
+    def test_concurrent(self):
+        with FakeSheetsServer(SHEETS, delay=0.2) as server:
+            results = fetch_tabs(
+                TAB_REQUESTS,
+                self.save_dir,
+                "key",
+                {},
+                api_url=server.api_url,
+                workers=len(TAB_REQUESTS),
+            )
+
+        self.assertGreater(server.max_active, 1, "tabs were requested at the same time")
+        self.assertEqual(len(server.requests), len(TAB_REQUESTS), "one request per tab")
+        for result in results:
+            self.assertGreaterEqual(result["seconds"], 0.2, "timing includes the wait")
+
+    def test_serial(self):
+        with FakeSheetsServer(SHEETS, delay=0.05) as server:
+            fetch_tabs(
+                TAB_REQUESTS,
+                self.save_dir,
+                "key",
+                {},
+                api_url=server.api_url,
+                workers=1,
+            )
+
+        self.assertEqual(server.max_active, 1, "one worker means one request at a time")
+
+    def test_error(self):
+        with FakeSheetsServer(SHEETS) as server:
+            with self.assertRaises(Exception):
+                fetch_tabs(
+                    [{"sheet": "XBL", "spreadsheet_id": "league-id", "tab": "Nope"}],
+                    self.save_dir,
+                    "key",
+                    {},
+                    api_url=server.api_url,
+                )
+
+
+class TestFetchTabsBatched(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_one_request_per_spreadsheet(self):
+        with FakeSheetsServer(SHEETS) as server:
+            results = fetch_tabs_batched(
+                TAB_REQUESTS,
+                self.save_dir,
+                "key",
+                {},
+                api_url=server.api_url,
+                workers=2,
+            )
+
+        self.assertEqual(len(server.requests), 2, "one request per spreadsheet")
+        self.assertTrue(
+            all(["values:batchGet" in path for path in server.requests]),
+            "used batchGet",
+        )
+
+        for result, tab_request in zip(results, TAB_REQUESTS):
+            self.assertEqual(result["tab"], tab_request["tab"], "results are in order")
+
+    def test_same_files_as_unbatched(self):
+        with FakeSheetsServer(SHEETS) as server:
+            batched = fetch_tabs_batched(
+                TAB_REQUESTS, self.save_dir, "key", {}, api_url=server.api_url
+            )
+            batched_values = [json.loads(r["path"].read_bytes()) for r in batched]
+
+            unbatched = fetch_tabs(
+                TAB_REQUESTS,
+                self.save_dir,
+                "key",
+                {},
+                api_url=server.api_url,
+                manifest=updated_manifest(batched),
+            )
+            unbatched_values = [json.loads(r["path"].read_bytes()) for r in unbatched]
+
+        self.assertEqual(
+            [r["path"] for r in batched],
+            [r["path"] for r in unbatched],
+            "same file names",
+        )
+        self.assertEqual(batched_values, unbatched_values, "same file contents")
+        self.assertEqual(
+            [r["sha256"] for r in batched],
+            [r["sha256"] for r in unbatched],
+            "same bytes, so switching modes doesn't change any tab",
+        )
+        self.assertFalse(any([r["changed"] for r in unbatched]))
+
+    def test_error(self):
+        with FakeSheetsServer(SHEETS) as server:
+            with self.assertRaises(Exception):
+                fetch_tabs_batched(
+                    [
+                        *TAB_REQUESTS,
+                        {"sheet": "XBL", "spreadsheet_id": "league-id", "tab": "Nope"},
+                    ],
+                    self.save_dir,
+                    "key",
+                    {},
+                    api_url=server.api_url,
+                )
+
+
+class TestChangeDetection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.tmp.name)
+        self.sheets = copy.deepcopy(SHEETS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, server: FakeSheetsServer, batch=False):
+        fetch = fetch_tabs_batched if batch else fetch_tabs
+        results = fetch(
+            TAB_REQUESTS,
+            self.save_dir,
+            "key",
+            {},
+            api_url=server.api_url,
+            manifest=load_manifest(self.save_dir),
+        )
+        save_manifest(self.save_dir, updated_manifest(results))
+        return results
+
+    def assert_unchanged(self, batch: bool):
+        with FakeSheetsServer(self.sheets) as server:
+            first = self.fetch(server, batch)
+            second = self.fetch(server, batch)
+
+        self.assertTrue(all([r["changed"] for r in first]), "first download")
+        self.assertFalse(any([r["changed"] for r in second]), "nothing changed")
+        self.assertEqual([r["sha256"] for r in first], [r["sha256"] for r in second])
+
+    def test_unchanged(self):
+        self.assert_unchanged(False)
+
+    def test_unchanged_batched(self):
+        self.assert_unchanged(True)
+
+    def test_changed(self):
+        with FakeSheetsServer(self.sheets) as server:
+            self.fetch(server)
+            self.sheets["league-id"]["Standings"].append(["2", "Knights"])
+            results = self.fetch(server)
+
+        changed = [r["tab"] for r in results if r["changed"]]
+        self.assertEqual(changed, ["Standings"], "only the edited tab changed")
+
+        with open(self.save_dir.joinpath("XBL__Standings.json")) as f:
+            self.assertEqual(len(json.load(f)["values"]), 3, "saved the new version")
+
+    def test_etags(self):
+        with FakeSheetsServer(self.sheets, etags=True) as server:
+            first = self.fetch(server)
+            second = self.fetch(server)
+
+        self.assertTrue(all([r["etag"] is not None for r in first]), "saved etags")
+        self.assertEqual(
+            server.not_modified, len(TAB_REQUESTS), "second download sent nothing back"
+        )
+        self.assertFalse(any([r["changed"] for r in second]))
+        self.assertEqual(
+            [r["size"] for r in first], [r["size"] for r in second], "sizes carry over"
+        )
+
+    def test_lost_file(self):
+        with FakeSheetsServer(self.sheets, etags=True) as server:
+            self.fetch(server)
+            self.save_dir.joinpath("XBL__Standings.json").unlink()
+            results = self.fetch(server)
+
+        self.assertEqual(
+            [r["tab"] for r in results if r["changed"]],
+            ["Standings"],
+            "downloaded the missing file again",
+        )
+        self.assertTrue(self.save_dir.joinpath("XBL__Standings.json").exists())
+
+
+class TestIncrementalFetch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.tmp.name)
+        self.sheets = copy.deepcopy(SHEETS)
+        self.h2h = self.sheets["career-id"]["XBL Head to Head"]
+        self.h2h_path = self.save_dir.joinpath(
+            "CAREER_STATS__XBL%20Head%20to%20Head.json"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, server: FakeSheetsServer, batch=False, full_refresh_every=12):
+        fetch = fetch_tabs_batched if batch else fetch_tabs
+        results = fetch(
+            TAB_REQUESTS,
+            self.save_dir,
+            "key",
+            {},
+            api_url=server.api_url,
+            manifest=load_manifest(self.save_dir),
+            full_refresh_every=full_refresh_every,
+        )
+        save_manifest(self.save_dir, updated_manifest(results))
+        return results
+
+    def h2h_requests(self, server: FakeSheetsServer) -> list[str]:
+        return [
+            urllib.parse.unquote(path)
+            for path in server.requests
+            if "XBL%20Head%20to%20Head" in path
+        ]
+
+    def assert_only_new_rows(self, batch: bool):
+        with FakeSheetsServer(self.sheets) as server:
+            self.fetch(server, batch)
+            self.h2h.append(["18", "2", "new game"])
+            results = self.fetch(server, batch)
+
+        h2h = [r for r in results if r["tab"] == "XBL%20Head%20to%20Head"][0]
+        self.assertEqual(h2h["appended"], 1, "one new row")
+        self.assertIn(
+            "'XBL Head to Head'!A2:ZZ",
+            self.h2h_requests(server)[-1],
+            "started from the last row we had",
+        )
+
+        with open(self.h2h_path) as f:
+            self.assertEqual(json.load(f)["values"], self.h2h, "rows merged")
+
+    def test_only_new_rows(self):
+        self.assert_only_new_rows(False)
+
+    def test_only_new_rows_batched(self):
+        self.assert_only_new_rows(True)
+
+    def test_same_as_full_download(self):
+        with FakeSheetsServer(self.sheets) as server:
+            self.fetch(server)
+            self.h2h.extend([["18", "2", "a"], ["18", "3", "b"]])
+            incremental = self.fetch(server)
+            full = self.fetch(server, full_refresh_every=0)
+
+        self.assertEqual(
+            [r["sha256"] for r in incremental],
+            [r["sha256"] for r in full],
+            "appending gives the same bytes as downloading everything",
+        )
+        self.assertFalse(any([r["changed"] for r in full]))
+
+    def test_full_refresh(self):
+        with FakeSheetsServer(self.sheets) as server:
+            for i in range(4):
+                self.h2h.append(["18", str(i), "game"])
+                self.fetch(server, full_refresh_every=2)
+
+            paths = self.h2h_requests(server)
+
+        self.assertEqual(
+            ["!A" in path for path in paths],
+            [False, True, True, False],
+            "whole tab every 2 incremental downloads",
+        )
+        self.assertEqual(
+            load_manifest(self.save_dir)["tabs"][self.h2h_path.name][
+                "incremental_runs"
+            ],
+            0,
+        )
+
+    def assert_edited_rows(self, batch: bool):
+        with FakeSheetsServer(self.sheets) as server:
+            self.fetch(server, batch)
+            self.h2h[-1] = ["18", "1", "fixed a typo"]
+            self.h2h.append(["18", "2", "new game"])
+            results = self.fetch(server, batch)
+
+        h2h = [r for r in results if r["tab"] == "XBL%20Head%20to%20Head"][0]
+        self.assertIsNone(h2h["appended"], "downloaded the whole tab")
+        with open(self.h2h_path) as f:
+            self.assertEqual(json.load(f)["values"], self.h2h)
+
+    def test_edited_rows(self):
+        self.assert_edited_rows(False)
+
+    def test_edited_rows_batched(self):
+        self.assert_edited_rows(True)
+
+
+class TestUnformatted(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_typed_values(self):
+        for fetch in [fetch_tabs, fetch_tabs_batched]:
+            with self.subTest(fetch=fetch.__name__), FakeSheetsServer(SHEETS) as server:
+                fetch(
+                    TAB_REQUESTS,
+                    self.save_dir,
+                    "key",
+                    {},
+                    api_url=server.api_url,
+                    value_render_option=UNFORMATTED_VALUE,
+                )
+
+            with open(self.save_dir.joinpath("XBL__Box%20Scores.json")) as f:
+                self.assertEqual(
+                    json.load(f)["values"][1],
+                    [1, "Dragons", 3, 2, "Knights"],
+                    "numbers came back as numbers",
+                )
+
+    def test_no_mixing(self):
+        with FakeSheetsServer(SHEETS) as server:
+            results = fetch_tabs(
+                TAB_REQUESTS, self.save_dir, "key", {}, api_url=server.api_url
+            )
+            save_manifest(self.save_dir, updated_manifest(results))
+            results = fetch_tabs(
+                TAB_REQUESTS,
+                self.save_dir,
+                "key",
+                {},
+                api_url=server.api_url,
+                manifest=load_manifest(self.save_dir),
+                full_refresh_every=12,
+                value_render_option=UNFORMATTED_VALUE,
+            )
+
+        self.assertTrue(
+            all([r["appended"] is None for r in results]),
+            "switching to typed values downloads whole tabs",
+        )
+        self.assertFalse(
+            any(["!A" in urllib.parse.unquote(p) for p in server.requests])
+        )
+
+
+class TestFlakyServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.tmp.name)
+        self.scheduler = FetchScheduler(backoff=0.01, timeout=0.5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_retries(self):
+        for fetch in [fetch_tabs, fetch_tabs_batched]:
+            with self.subTest(fetch=fetch.__name__), FakeSheetsServer(
+                SHEETS,
+                errors={"Standings": [429, 500], "career-id:batchGet": [429, 502]},
+                stalls={"XBL Head to Head": [2.0], "league-id:batchGet": [2.0]},
+            ) as server:
+                results = fetch(
+                    TAB_REQUESTS,
+                    self.save_dir,
+                    "key",
+                    {},
+                    api_url=server.api_url,
+                    workers=4,
+                    scheduler=self.scheduler,
+                )
+
+            self.assertEqual(len(results), len(TAB_REQUESTS), "everything came through")
+
+    def test_all_or_nothing(self):
+        with FakeSheetsServer(SHEETS) as server:
+            fetch_tabs(TAB_REQUESTS, self.save_dir, "key", {}, api_url=server.api_url)
+
+        before = {p.name: p.read_bytes() for p in self.save_dir.iterdir()}
+        sheets = copy.deepcopy(SHEETS)
+        sheets["league-id"]["Standings"].append(["2", "Knights"])
+
+        with FakeSheetsServer(
+            sheets, errors={"XBL Head to Head": [429] * 10}
+        ) as server:
+            with self.assertRaises(Exception):
+                fetch_tabs(
+                    TAB_REQUESTS,
+                    self.save_dir,
+                    "key",
+                    {},
+                    api_url=server.api_url,
+                    workers=4,
+                    scheduler=FetchScheduler(max_retries=1, backoff=0.01),
+                )
+
+        after = {p.name: p.read_bytes() for p in self.save_dir.iterdir()}
+        self.assertEqual(before, after, "a failed download leaves the raw dir alone")
+
+    def test_all_or_nothing_batched(self):
+        with FakeSheetsServer(SHEETS) as server:
+            results = fetch_tabs_batched(
+                TAB_REQUESTS, self.save_dir, "key", {}, api_url=server.api_url
+            )
+        save_manifest(self.save_dir, updated_manifest(results))
+
+        before = {p.name: p.read_bytes() for p in self.save_dir.iterdir()}
+        sheets = copy.deepcopy(SHEETS)
+        for league in ["XBL", "AAA", "AA"]:
+            sheets["career-id"][f"{league} Head to Head"].append(["18", "2", "new"])
+        # AA comes last in the batch. editing it means getting the whole tab, which fails
+        sheets["career-id"]["AA Head to Head"][1] = ["18", "1", "fixed a typo"]
+
+        with FakeSheetsServer(sheets, errors={"AA Head to Head": [429] * 10}) as server:
+            with self.assertRaises(Exception):
+                fetch_tabs_batched(
+                    TAB_REQUESTS,
+                    self.save_dir,
+                    "key",
+                    {},
+                    api_url=server.api_url,
+                    manifest=load_manifest(self.save_dir),
+                    scheduler=FetchScheduler(max_retries=1, backoff=0.01),
+                    full_refresh_every=12,
+                )
+
+        after = {p.name: p.read_bytes() for p in self.save_dir.iterdir()}
+        self.assertEqual(before, after, "no staged tabs left behind")
@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from utils import (
+    SnapshotStore,
+    is_snapshot_manifest,
+    raw_tab_hashes,
+    read_raw_tab,
+    save_changed_tabs,
+)
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def blobs(self) -> list[Path]:
+        return [p for p in self.store.blobs_dir.rglob("*") if p.is_file()]
+
+    def test_round_trip(self):
+        data = json.dumps({"values": [["a", "b"]] * 100}).encode()
+        sha256 = self.store.put(data)
+
+        self.assertEqual(self.store.get(sha256), data, "same bytes back")
+        self.assertLess(
+            self.store.blob_path(sha256).stat().st_size, len(data), "compressed"
+        )
+
+    def test_dedupe(self):
+        a = self.store.put(b'{"values": [["a"]]}')
+        b = self.store.put(b'{"values": [["b"]]}')
+        self.store.save_manifest({"A.json": a, "B.json": b}, "build-1")
+
+        a_again = self.store.put(b'{"values": [["a"]]}')
+        self.store.save_manifest({"A.json": a_again, "B.json": b}, "build-2")
+
+        self.assertEqual(a, a_again, "keyed on content")
+        self.assertEqual(len(self.blobs()), 2, "identical tabs take no extra space")
+        self.assertEqual(len(self.store.list_manifests()), 2, "one manifest per build")
+
+    def test_prune(self):
+        a = self.store.put(b'{"values": [["a"]]}')
+        b = self.store.put(b'{"values": [["b"]]}')
+        c = self.store.put(b'{"values": [["c"]]}')
+        self.store.save_manifest({"A.json": a, "B.json": b}, "build-1")
+        self.store.save_manifest({"A.json": a, "B.json": c}, "build-2")
+        self.store.save_manifest({"A.json": a, "B.json": c}, "build-3")
+
+        dropped, blobs = self.store.prune(2)
+
+        self.assertEqual([p.name for p in dropped], ["build-1.json"])
+        self.assertEqual(blobs, 1, "only build-1 used b")
+        self.assertEqual(
+            [p.name for p in self.store.list_manifests()],
+            ["build-2.json", "build-3.json"],
+        )
+        self.assertFalse(self.store.has(b))
+        self.assertTrue(self.store.has(a) and self.store.has(c))
+
+        self.assertEqual(self.store.prune(2), ([], 0), "nothing else to throw out")
+        with self.assertRaises(ValueError):
+            self.store.prune(0)
+
+    def test_missing_blob(self):
+        with self.assertRaises(Exception):
+            self.store.save_manifest({"A.json": "0" * 64})
+
+    def test_read_from_either_source(self):
+        raw_dir = Path(self.tmp.name).joinpath("raw")
+        raw_dir.mkdir()
+        data = b'{"values": [["1", "Dragons"]]}'
+        raw_dir.joinpath("XBL__Standings.json").write_bytes(data)
+        save_changed_tabs(raw_dir, [], {"XBL__Standings.json": self.store.put(data)})
+
+        manifest = self.store.save_manifest(raw_tab_hashes(raw_dir))
+
+        self.assertFalse(is_snapshot_manifest(raw_dir))
+        self.assertTrue(is_snapshot_manifest(manifest))
+        for source in [raw_dir, manifest]:
+            self.assertEqual(read_raw_tab(source, "XBL__Standings.json"), data)
+            self.assertEqual(raw_tab_hashes(source), raw_tab_hashes(raw_dir))
+
+        with self.assertRaises(FileNotFoundError):
+            read_raw_tab(manifest, "XBL__Playoffs.json")
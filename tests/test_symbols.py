@@ -0,0 +1,38 @@
+import unittest
+
+from utils import SymbolTable
+
+
+class TestSymbolTable(unittest.TestCase):
+    def test_intern(self):
+        table = SymbolTable()
+
+        self.assertEqual(table.intern("bob"), 0)
+        self.assertEqual(table.intern("alice"), 1)
+        self.assertEqual(table.intern("bob"), 0, "same name, same ID")
+        self.assertEqual(len(table), 2)
+        self.assertIn("alice", table)
+        self.assertEqual(table.name(1), "alice")
+
+    def test_intern_all(self):
+        table = SymbolTable(["bob"])
+        ids = table.intern_all(["alice", "bob", "alice"])
+
+        self.assertEqual(ids.tolist(), [1, 0, 1])
+        self.assertEqual(table.lookup(ids).tolist(), ["alice", "bob", "alice"])
+
+    def test_sort_order(self):
+        table = SymbolTable(["carol", "alice", "bob"])
+        order = table.sort_order()
+
+        self.assertEqual(order.tolist(), [2, 0, 1])
+        self.assertEqual(
+            sorted(range(len(table)), key=lambda id: order[id]),
+            [1, 2, 0],
+            "IDs sorted by their names",
+        )
+
+    def test_empty(self):
+        table = SymbolTable()
+        self.assertEqual(table.sort_order().tolist(), [])
+        self.assertEqual(table.lookup(table.intern_all([])).tolist(), [])
@@ -0,0 +1,77 @@
+import unittest
+
+from test_game_table import BOX_SCORES
+
+from utils import (
+    TALLY_KEYS,
+    GameTable,
+    Tallies,
+    group_any,
+    group_sum,
+    tally_games,
+)
+
+
+def tallies(**totals) -> Tallies:
+    return Tallies([totals.get(key, 0) for key in TALLY_KEYS])
+
+
+class TestTallies(unittest.TestCase):
+    def test_from_row(self):
+        row = tallies(ab=30, h=12)
+        missing = [key == "h" for key in TALLY_KEYS]
+        t = Tallies.from_row(row.totals, missing)
+
+        self.assertEqual(t["ab"], 30)
+        self.assertIsNone(t["h"], "missing from a game")
+        self.assertEqual(t.raw_stats()["ab"], 30)
+        self.assertNotIn("runs_with_innings", t.raw_stats())
+
+    def test_add(self):
+        a = tallies(ab=3, wins=1)
+        a.add_season(2)
+        b = tallies(ab=4, losses=1)
+        b.missing = 1 << TALLY_KEYS.index("h")
+        b.add_season(0)
+
+        self.assertIs(a.add(b), a, "in place")
+        self.assertEqual((a["ab"], a["wins"], a["losses"]), (7, 1, 1))
+        self.assertIsNone(a["h"])
+        self.assertEqual(a.season_ids(), [0, 2])
+        self.assertEqual(b["ab"], 4, "didn't touch the other one")
+
+    def test_merge(self):
+        a = tallies(ab=3)
+        merged = Tallies.merge(a, None, tallies(ab=4))
+
+        self.assertEqual(merged["ab"], 7)
+        self.assertEqual(a["ab"], 3, "didn't touch the ones merged")
+        self.assertIsNone(Tallies.merge(None, None))
+
+
+class TestTallyGames(unittest.TestCase):
+    def test_box_scores(self):
+        table = GameTable.from_box_scores(BOX_SCORES, "XBL", playoffs=False)
+        team, opponent, rows, missing = tally_games(table)
+
+        self.assertEqual(team.tolist(), [0, 1, 1, 0, 0, 1], "away then home")
+        self.assertEqual(opponent.tolist(), [1, 0, 0, 1, 1, 0])
+
+        dragons, knights = [
+            Tallies.from_row(totals, totals_missing)
+            for (totals, totals_missing) in zip(
+                group_sum(team, rows, 2).tolist(), group_any(team, missing, 2).tolist()
+            )
+        ]
+
+        self.assertEqual(
+            (dragons["wins"], dragons["losses"]), (1, 2), "every game counts"
+        )
+        self.assertEqual(knights["wins_by_run_rule"], 1)
+        self.assertEqual(dragons["games_played"], 2, "not the game without stats")
+        self.assertEqual(dragons["innings_hitting"], 9 + 6)
+        self.assertEqual(knights["innings_pitching"], 9 + 6)
+        self.assertIsNone(dragons["ab"], "the disconnect is missing their stats")
+        self.assertEqual(knights["ab"], 7 + 30)
+        self.assertIsNone(knights["oppab"])
+        self.assertEqual(knights["runs_with_innings"], 8 + 10)
@@ -1 +1,18 @@
+from .career_tallies import *
+from .cells import *
+from .columnar import *
+from .files import *
+from .frozen_seasons import *
+from .game_cache import *
+from .game_table import *
+from .group_by import *
+from .json_writer import *
+from .outputs import *
+from .range_index import *
+from .raw_manifest import *
 from .safe_num import *
+from .scheduler import *
+from .sheets import *
+from .snapshots import *
+from .symbols import *
+from .tallies import *
@@ -0,0 +1,196 @@
+"""
+Career tallies that carry over from one build to the next, so a build only tallies the games that weren't there last time
+"""
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from .files import load_npz, save_npz
+from .game_table import GameTable, local_ids
+from .group_by import group_any, group_ids, group_max, group_min, group_sum
+from .symbols import Symbols, SymbolTable
+from .tallies import TALLY_KEYS, tally_games
+
+KEY_COLUMNS = ["player", "league", "season", "opponent"]
+
+# a position is a tab in the high bits, then a row of tally_games in that tab
+TAB_SHIFT = 40
+
+
+def key_symbols(symbols: Symbols, key: str) -> SymbolTable:
+    """what the IDs in a column of KEY_COLUMNS are IDs of"""
+    return {
+        "player": symbols.players,
+        "league": symbols.leagues,
+        "season": symbols.seasons,
+        "opponent": symbols.players,
+    }[key]
+
+
+class CareerTallies:
+    """
+    Tallies for every (player, league, season, opponent). Every career stat adds these up. `keys' has the IDs in KEY_COLUMNS order and `totals' and `missing' are the summed rows of tally_games
+
+    `first' and `last' are the positions of every group's first and last game, as if every tab's games were stacked one after the other. Groups are sorted by `first', so they come out in the order they were first played, the same as tallying every game at once
+
+    `row_hashes' has a hash of every game already tallied from each tab. Folding in a tab with new games on the end only tallies the new games. If an old game changed or disappeared, the whole tab is tallied again
+    """
+
+    def __init__(
+        self,
+        symbols: Symbols,
+        keys: np.ndarray,
+        totals: np.ndarray,
+        missing: np.ndarray,
+        first: np.ndarray,
+        last: np.ndarray,
+        row_hashes: List[np.ndarray],
+    ):
+        self.symbols = symbols
+        self.keys = keys
+        self.totals = totals
+        self.missing = missing
+        self.first = first
+        self.last = last
+        self.row_hashes = row_hashes
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def empty(cls, symbols: Symbols) -> "CareerTallies":
+        return cls(
+            symbols=symbols,
+            keys=np.zeros((0, len(KEY_COLUMNS)), dtype=np.int64),
+            totals=np.zeros((0, len(TALLY_KEYS)), dtype=np.int64),
+            missing=np.zeros((0, len(TALLY_KEYS)), dtype=bool),
+            first=np.zeros(0, dtype=np.int64),
+            last=np.zeros(0, dtype=np.int64),
+            row_hashes=[],
+        )
+
+    def fold(self, tables: List[GameTable]) -> "CareerTallies":
+        """
+        These tallies plus the games in `tables' that haven't been tallied yet. `tables' has to be the same tabs in the same order every time, and share these tallies' symbols
+        """
+        if any([t.symbols is not self.symbols for t in tables]):
+            raise ValueError("Can't fold in game tables with different symbols")
+
+        keep = np.ones(len(self), dtype=bool)
+        new_games = []
+        positions = []
+        row_hashes = []
+        for tab, table in enumerate(tables):
+            hashes = table.row_hashes()
+            tallied = (
+                self.row_hashes[tab]
+                if tab < len(self.row_hashes)
+                else np.zeros(0, dtype=np.uint64)
+            )
+
+            start = len(tallied)
+            if start > len(hashes) or not np.array_equal(tallied, hashes[:start]):
+                # an old game changed, so we can't tell what to take back out. start this tab over
+                keep &= self.first >> TAB_SHIFT != tab
+                start = 0
+
+            new_games.append(table.take(slice(start, None)))
+            positions.append(
+                (tab << TAB_SHIFT)
+                + np.arange(2 * start, 2 * len(table), dtype=np.int64)
+            )
+            row_hashes.append(hashes)
+
+        games = GameTable.concat(new_games)
+        player, opponent, tallies, missing = tally_games(games)
+        position = np.concatenate(positions)
+
+        # the groups we already had act like rows with their own first and last positions
+        keys = np.concatenate(
+            [
+                self.keys[keep],
+                np.stack(
+                    [
+                        player,
+                        np.repeat(games.league, 2),
+                        np.repeat(games.season, 2),
+                        opponent,
+                    ],
+                    axis=1,
+                ),
+            ]
+        )
+        ids, merged = group_ids(*keys.T)
+        n = len(merged)
+        first = group_min(ids, np.concatenate([self.first[keep], position]), n)
+        order = np.argsort(first, kind="stable")
+
+        return CareerTallies(
+            symbols=self.symbols,
+            keys=merged[order],
+            totals=group_sum(ids, np.concatenate([self.totals[keep], tallies]), n)[
+                order
+            ],
+            missing=group_any(ids, np.concatenate([self.missing[keep], missing]), n)[
+                order
+            ],
+            first=first[order],
+            last=group_max(ids, np.concatenate([self.last[keep], position]), n)[order],
+            row_hashes=row_hashes,
+        )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """everything for np.savez. names are saved as strings instead of IDs"""
+        arrays = {
+            "totals": self.totals,
+            "missing": self.missing,
+            "first": self.first,
+            "last": self.last,
+            "tabs": np.array(len(self.row_hashes)),
+        }
+        for column, key in enumerate(KEY_COLUMNS):
+            arrays[f"{key}_names"], arrays[key] = local_ids(
+                self.keys[:, column], key_symbols(self.symbols, key)
+            )
+        for tab, hashes in enumerate(self.row_hashes):
+            arrays[f"row_hashes_{tab}"] = hashes
+
+        return arrays
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict[str, np.ndarray], symbols: Symbols
+    ) -> "CareerTallies":
+        """the opposite of `to_arrays'. names become IDs in `symbols'"""
+        keys = np.stack(
+            [
+                key_symbols(symbols, key).intern_all(arrays[f"{key}_names"].tolist())[
+                    arrays[key]
+                ]
+                for key in KEY_COLUMNS
+            ],
+            axis=1,
+        ).astype(np.int64)
+
+        return cls(
+            symbols=symbols,
+            keys=keys.reshape((-1, len(KEY_COLUMNS))),
+            totals=arrays["totals"],
+            missing=arrays["missing"],
+            first=arrays["first"],
+            last=arrays["last"],
+            row_hashes=[arrays[f"row_hashes_{tab}"] for tab in range(arrays["tabs"])],
+        )
+
+    @classmethod
+    def load(cls, path: Path, symbols: Symbols, code: str) -> "CareerTallies | None":
+        """None if there aren't any saved tallies, or they were counted by different `code', eg main.code_fingerprint(). that way changing how tallies are counted throws out the old ones"""
+        arrays = load_npz(path, code, "career tallies")
+        if arrays is None:
+            return None
+        return cls.from_arrays(arrays, symbols)
+
+    def save(self, path: Path, code: str):
+        save_npz(path, code, self.to_arrays())
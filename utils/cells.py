@@ -0,0 +1,54 @@
+"""
+Cells from the Sheets API are formatted strings by default, eg "1,234" or ".500". With UNFORMATTED_VALUE they're numbers instead, eg 1234 or 0.5. These read either kind
+"""
+
+import math
+
+Cell = str | int | float | bool
+
+
+def to_int(cell: Cell, thousands: bool = False) -> int:
+    """like int(), but numbers go straight through. `thousands' allows "1,234". raises ValueError like int() does"""
+    # bools are ints too, but a checkbox isn't a stat
+    if type(cell) is int:
+        return cell
+
+    if isinstance(cell, float):
+        if not cell.is_integer():
+            raise ValueError(f"{cell} is not a whole number")
+        return int(cell)
+
+    if isinstance(cell, str):
+        return int(cell.replace(",", "") if thousands else cell)
+
+    raise ValueError(f"{cell!r} is not a number")
+
+
+def to_rounded_int(cell: Cell, thousands: bool = False) -> int:
+    """for columns the sheet works out and shows rounded, like Elo. formatted cells are already rounded, unformatted ones are whatever the formula came to. rounds halves away from zero like Sheets does, not to even like round()"""
+    if isinstance(cell, float):
+        return int(math.copysign(math.floor(abs(cell) + 0.5), cell))
+
+    return to_int(cell, thousands)
+
+
+def to_float(cell: Cell) -> float:
+    """like float(), but numbers go straight through. raises ValueError like float() does"""
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+        return float(cell)
+
+    if isinstance(cell, str):
+        return float(cell)
+
+    raise ValueError(f"{cell!r} is not a number")
+
+
+def to_str(cell: Cell) -> str:
+    """names and labels. a username like 1234 comes back as a number when unformatted"""
+    if isinstance(cell, str):
+        return cell
+
+    if isinstance(cell, bool):
+        return "TRUE" if cell else "FALSE"
+
+    return str(cell)
@@ -0,0 +1,51 @@
+"""
+Lists of dicts in smaller shapes that don't repeat every key for every item, like game results. `table' is {"columns": [...], "rows": [[...], ...]} and `columns' is one list per key
+"""
+
+from typing import Any, List
+
+# how game results can be written. objects is a list of dicts
+GAME_RESULTS_SHAPES = ["objects", "table", "columns"]
+
+
+def keys_of(items: List[dict]) -> List[str]:
+    """every key in `items', in the order they first show up"""
+    keys = {}
+    for item in items:
+        keys |= dict.fromkeys(item.keys())
+    return list(keys.keys())
+
+
+def to_table(items: List[dict]) -> dict[str, list]:
+    """one row per item with a value for every column. None where an item doesn't have a key"""
+    columns = keys_of(items)
+    return {
+        "columns": columns,
+        "rows": [[item.get(key, None) for key in columns] for item in items],
+    }
+
+
+def to_columns(items: List[dict]) -> dict[str, list]:
+    """one list per key, with a value for every item. None where an item doesn't have a key"""
+    return {key: [item.get(key, None) for item in items] for key in keys_of(items)}
+
+
+def from_table(table: dict[str, list]) -> List[dict]:
+    """the opposite of `to_table'. items get every column, even the ones that were None because they were missing"""
+    return [dict(zip(table["columns"], row)) for row in table["rows"]]
+
+
+def from_columns(columns: dict[str, list]) -> List[dict]:
+    """the opposite of `to_columns'. missing keys come back as None, like from_table"""
+    return [dict(zip(columns.keys(), row)) for row in zip(*columns.values())]
+
+
+def reshape(items: List[dict], shape: str) -> Any:
+    """`items' in one of GAME_RESULTS_SHAPES"""
+    if shape == "objects":
+        return items
+    if shape == "table":
+        return to_table(items)
+    if shape == "columns":
+        return to_columns(items)
+    raise ValueError(f"Unknown shape {shape}")
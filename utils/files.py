@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import IO, Any, Callable, Iterator
+import zipfile
+
+import numpy as np
+
+logger = logging.getLogger("stats/files")
+
+
+def write_temp(path: Path, data: bytes) -> Path:
+    """write `data' next to `path' without touching `path'. rename the temp file over `path' when you're ready"""
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # closes `fd' even if the rest fails
+        with os.fdopen(fd, "wb") as f:
+            # temp files are only readable by us. some of these get served, so make them readable like open() would
+            os.chmod(temp, 0o644)
+            f.write(data)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+    return Path(temp)
+
+
+def atomic_write(path: Path, data: bytes | str):
+    """readers see either the old file or the new one, never half of one"""
+    if isinstance(data, str):
+        data = data.encode()
+
+    os.replace(write_temp(path, data), path)
+
+
+@contextmanager
+def atomic_open(
+    path: Path, replace_if: Callable[[], bool] | None = None
+) -> Iterator[IO[str]]:
+    """like atomic_write, for writing a file a piece at a time. the temp file replaces `path' when the block finishes, and is thrown out if the block raises. `replace_if' gets asked once the block finishes. if it says no, the temp file is thrown out and `path' stays as it was"""
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            os.chmod(temp, 0o644)
+            yield f
+        if replace_if is None or replace_if():
+            os.replace(temp, path)
+        else:
+            os.unlink(temp)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def _load_keyed(
+    path: Path, key: str, what: str, read: Callable[[Path], dict]
+) -> dict | None:
+    """what `read' got out of `path', without its key. None if there's nothing there, it was saved with a different `key', or it can't be read"""
+    if not path.exists():
+        return None
+
+    try:
+        saved = read(path)
+        if str(saved.pop("key")) != key:
+            return None
+        return saved
+    except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile) as e:
+        logger.warning(f"Ignoring unreadable {what} {path}: {e}")
+        return None
+
+
+def _read_npz(path: Path) -> dict:
+    with np.load(path, allow_pickle=False) as npz:
+        return dict(npz)
+
+
+def _read_json(path: Path) -> dict:
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def load_npz(path: Path, key: str, what: str) -> dict[str, np.ndarray] | None:
+    """arrays saved with save_npz. `key' says what they were made from, eg hashes of the inputs and the code. `what' is for the warning if they can't be read"""
+    return _load_keyed(path, key, what, _read_npz)
+
+
+def save_npz(path: Path, key: str, arrays: dict[str, np.ndarray]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    buffer = io.BytesIO()
+    np.savez(buffer, key=np.array(key), **arrays)
+    atomic_write(path, buffer.getvalue())
+
+
+def load_keyed_json(path: Path, key: str, what: str) -> dict[str, Any] | None:
+    """like load_npz, for JSON saved with save_keyed_json"""
+    return _load_keyed(path, key, what, _read_json)
+
+
+def save_keyed_json(path: Path, key: str, data: dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps({"key": key, **data}))
@@ -0,0 +1,107 @@
+"""
+Finished stat lines for seasons that are over. A season's games don't change once it's over, so the next build can reuse its stats instead of calculating them again
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Any, List
+from typing_extensions import TypedDict
+
+import numpy as np
+
+from .files import load_keyed_json, save_keyed_json
+from .game_table import GameTable
+from .group_by import first_seen
+
+
+class FrozenSeason(TypedDict):
+    """everything a season adds to career stats"""
+
+    """hash of the season's games in every Head to Head tab"""
+    fingerprint: str
+    """league name: league ERA. only leagues with innings that season"""
+    eras: dict[str, float | None]
+    """player name: the player's stat line for the season"""
+    stats: dict[str, Any]
+
+
+def season_fingerprints(
+    tables: List[GameTable], row_hashes: List[np.ndarray]
+) -> dict[str, str]:
+    """
+    season name: a hash of that season's games, tab by tab in order. `row_hashes' are the tables' GameTable.row_hashes. the hash changes if a game in the season changes, moves, appears or disappears
+    """
+    digests = {}
+    for tab, (table, hashes) in enumerate(zip(tables, row_hashes)):
+        for season_id in first_seen(table.season).tolist():
+            name = table.symbols.seasons.name(season_id)
+            if name not in digests:
+                digests[name] = hashlib.sha256()
+            digests[name].update(f"{tab}:".encode())
+            digests[name].update(hashes[table.season == season_id].tobytes())
+
+    return {name: digest.hexdigest() for (name, digest) in digests.items()}
+
+
+def is_past_season(name: str, season: int) -> bool:
+    """seasons before `season' are over. seasons that aren't numbers never are"""
+    return name.isdigit() and int(name) < season
+
+
+class FrozenSeasons:
+    """
+    Stat lines for seasons that are over, keyed on season name. `fingerprints' has the current fingerprint of every season that's over. A frozen season only counts if it was frozen with the same fingerprint
+    """
+
+    def __init__(
+        self,
+        fingerprints: dict[str, str],
+        seasons: dict[str, FrozenSeason] | None = None,
+    ):
+        self.fingerprints = fingerprints
+        self.seasons = {
+            name: frozen
+            for (name, frozen) in (seasons or {}).items()
+            if fingerprints.get(name, None) == frozen["fingerprint"]
+        }
+
+    @classmethod
+    def past(
+        cls, tables: List[GameTable], row_hashes: List[np.ndarray], season: int
+    ) -> "FrozenSeasons":
+        """nothing frozen yet, but ready to freeze every season before `season'"""
+        return cls(
+            {
+                name: fingerprint
+                for (name, fingerprint) in season_fingerprints(
+                    tables, row_hashes
+                ).items()
+                if is_past_season(name, season)
+            }
+        )
+
+    def get(self, name: str) -> FrozenSeason | None:
+        return self.seasons.get(name, None)
+
+    def can_freeze(self, name: str) -> bool:
+        return name in self.fingerprints and name not in self.seasons
+
+    def freeze(self, name: str, eras: dict[str, float | None], stats: dict[str, Any]):
+        if name not in self.fingerprints:
+            raise ValueError(f"Season {name} isn't over, so it can't be frozen")
+
+        self.seasons[name] = {
+            "fingerprint": self.fingerprints[name],
+            "eras": eras,
+            "stats": stats,
+        }
+
+    def load(self, path: Path, code: str) -> "FrozenSeasons":
+        """these seasons plus the ones frozen at `path' that haven't changed since. seasons frozen by different `code', eg main.code_fingerprint(), could have been calculated differently, so they're thrown out"""
+        saved = load_keyed_json(path, code, "frozen seasons")
+        if saved is None:
+            return self
+        return FrozenSeasons(self.fingerprints, {**saved["seasons"], **self.seasons})
+
+    def save(self, path: Path, code: str):
+        save_keyed_json(path, code, {"seasons": self.seasons})
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+from typing import Callable, List
+
+from .cells import Cell
+from .files import load_npz, save_npz
+from .game_table import PARSER_VERSION, GameTable
+from .raw_manifest import hash_bytes
+from .snapshots import read_raw_tab
+from .symbols import Symbols
+
+
+class GameCache:
+    """
+    Game tables that have already been parsed, so tabs that haven't changed load instead of getting parsed again. One .npz per tab:
+
+        {root}/XBL__Box%20Scores.npz
+
+    Each one remembers the sha256 of the raw tab and the PARSER_VERSION it was parsed with. It's parsed again if either one changed. No root means no cache
+    """
+
+    def __init__(self, root: Path | None):
+        self.root = root
+
+    def path(self, name: str) -> Path:
+        return self.root.joinpath(f"{Path(name).stem}.npz")
+
+    def load(self, name: str, key: str, symbols: Symbols) -> GameTable | None:
+        """None if it isn't cached, or it came from a different tab or parser"""
+        arrays = load_npz(self.path(name), key, "cached games")
+        if arrays is None:
+            return None
+        return GameTable.from_arrays(arrays, symbols)
+
+    def save(self, name: str, key: str, table: GameTable):
+        save_npz(self.path(name), key, table.to_arrays())
+
+    def games(
+        self,
+        source: Path,
+        name: str,
+        parse: Callable[[List[List[Cell]], Symbols], GameTable],
+        symbols: Symbols | None = None,
+    ) -> GameTable:
+        """the games in raw tab `name'. `parse' only runs if the cached games are out of date"""
+        symbols = symbols if symbols is not None else Symbols()
+        raw = read_raw_tab(source, name)
+        if self.root is None:
+            return parse(json.loads(raw)["values"], symbols)
+
+        key = f"{PARSER_VERSION}:{hash_bytes(raw)}"
+        table = self.load(name, key, symbols)
+        if table is not None:
+            return table
+
+        table = parse(json.loads(raw)["values"], symbols)
+        self.save(name, key, table)
+        return table
@@ -0,0 +1,540 @@
+import hashlib
+import logging
+from typing import List
+
+import numpy as np
+
+from .cells import Cell, to_float, to_int, to_str
+from .symbols import Symbols, SymbolTable
+
+logger = logging.getLogger("stats/game_table")
+
+HITTING_KEYS = ["ab", "r", "hits", "hr", "rbi", "bb", "so"]
+
+# per-game stats that aren't always recorded, in the order they show up in game results
+EXTRA_KEYS = [
+    "away_e",
+    "home_e",
+    *[f"away_{key}" for key in HITTING_KEYS],
+    *[f"home_{key}" for key in HITTING_KEYS],
+]
+
+EXTRA_INDEX = {key: i for (i, key) in enumerate(EXTRA_KEYS)}
+
+# bump this whenever parsing changes so that cached tables get parsed again
+PARSER_VERSION = 1
+
+
+def cell_matrix(rows: List[List[Cell]], width: int, required: int) -> np.ndarray:
+    """
+    The first `width' cells of every row as a (rows, width) object array. Cells past the end of a row are None. Every row needs at least `required' cells
+    """
+    short = [row for row in rows if len(row) < required]
+    if len(short) > 0:
+        raise IndexError(f"Expected at least {required} cells in {short[0]}")
+
+    padded = [
+        row[:width] if len(row) >= width else row + [None] * (width - len(row))
+        for row in rows
+    ]
+    cells = np.empty((len(rows), width), dtype=object)
+    if len(rows) > 0:
+        cells[:] = padded
+    return cells
+
+
+def parse_ints(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Whole numbers out of a (games, columns) array of cells, where None means the cell doesn't exist. Returns (values, missing, parsed). A game that has a cell that isn't a whole number isn't parsed
+    """
+    missing = np.equal(cells, None)
+    filled = np.where(missing, 0, cells)
+    values = np.zeros(cells.shape, dtype=np.int64)
+
+    # plain digits (or numbers, with UNFORMATTED_VALUE) convert in one go. anything else goes through to_int
+    simple = np.char.isdigit(filled.astype(str)).all(axis=1)
+    try:
+        values[simple] = filled[simple].astype(np.int64)
+    except ValueError:
+        simple[:] = False
+
+    parsed = simple.copy()
+    for i in np.flatnonzero(~simple).tolist():
+        try:
+            values[i] = [to_int(cell) for cell in filled[i].tolist()]
+            parsed[i] = True
+        except ValueError:
+            pass
+
+    return values, missing, parsed
+
+
+def parse_floats(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """same as `parse_ints', but for one column of decimal numbers"""
+    missing = np.equal(cells, None)
+    values = np.full(cells.shape, np.nan)
+    parsed = np.ones(cells.shape, dtype=bool)
+
+    for i in np.flatnonzero(~missing).tolist():
+        try:
+            values[i] = to_float(cells[i])
+        except ValueError:
+            parsed[i] = False
+
+    return values, missing, parsed
+
+
+def parse_strs(cells: np.ndarray) -> np.ndarray:
+    """labels"""
+    return np.array([to_str(cell) for cell in cells.tolist()], dtype=object).reshape(
+        cells.shape
+    )
+
+
+def parse_ids(cells: np.ndarray, symbols: SymbolTable) -> np.ndarray:
+    """names, as IDs in `symbols'"""
+    return symbols.intern_all([to_str(cell) for cell in cells.tolist()])
+
+
+def local_ids(ids: np.ndarray, symbols: SymbolTable) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (names, IDs into `names') for the names that `ids' uses, in the order they first show up. These still mean something without `symbols'
+    """
+    unique, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+
+    names = np.array(symbols.lookup(unique[order]).tolist(), dtype=str)
+    return names, rank[inverse.reshape(-1)]
+
+
+def name_hashes(names: List[str]) -> np.ndarray:
+    """a 64-bit hash of every name, the same in every build"""
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(name.encode(), digest_size=8).digest(), "little"
+            )
+            for name in names
+        ],
+        dtype=np.uint64,
+    )
+
+
+def mix_hashes(columns: np.ndarray) -> np.ndarray:
+    """one 64-bit hash per row of a (rows, columns) array of uint64s"""
+    h = np.zeros(len(columns), dtype=np.uint64)
+    for column in columns.T:
+        h = h * np.uint64(0x100000001B3) + column
+        # splitmix64's finalizer, so every bit of a column moves every bit of the hash
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94D049BB133111EB)
+        h ^= h >> np.uint64(31)
+    return h
+
+
+class GameTable:
+    """
+    Games as columns instead of one dict per game. Extra stats live in `stats', one column per key in EXTRA_KEYS, and `missing' is True wherever a stat wasn't recorded. Games where the extra stats didn't parse at all have `has_extras' set to False
+
+    Names are IDs in `symbols', which every table in a build should share
+
+    `to_dicts()' turns the table back into the game results that end up in the JSON
+    """
+
+    def __init__(
+        self,
+        symbols: Symbols,
+        career: bool,
+        playoffs: bool,
+        league: np.ndarray,
+        away: np.ndarray,
+        home: np.ndarray,
+        away_score: np.ndarray,
+        home_score: np.ndarray,
+        innings: np.ndarray,
+        innings_missing: np.ndarray,
+        label: np.ndarray,
+        season: np.ndarray | None,
+        has_extras: np.ndarray,
+        stats: np.ndarray,
+        missing: np.ndarray,
+    ):
+        self.symbols = symbols
+        self.career = career
+        self.playoffs = playoffs
+        self.league = league
+        """player IDs for career games, team IDs for season games"""
+        self.away = away
+        self.home = home
+        self.away_score = away_score
+        self.home_score = home_score
+        self.innings = innings
+        self.innings_missing = innings_missing
+        """round names for playoffs, week numbers for the regular season"""
+        self.label = label
+        """only for career games"""
+        self.season = season
+        self.has_extras = has_extras
+        self.stats = stats
+        self.missing = missing
+
+    def __len__(self) -> int:
+        return len(self.away_score)
+
+    @property
+    def side_symbols(self) -> SymbolTable:
+        """what `away' and `home' are IDs of"""
+        return self.symbols.players if self.career else self.symbols.teams
+
+    @property
+    def away_won(self) -> np.ndarray:
+        return self.away_score > self.home_score
+
+    @property
+    def run_rule(self) -> np.ndarray:
+        return ~self.innings_missing & (self.innings <= 8.0)
+
+    def stat(self, key: str) -> np.ndarray:
+        return self.stats[:, EXTRA_INDEX[key]]
+
+    @classmethod
+    def from_cells(
+        cls,
+        symbols: Symbols,
+        career: bool,
+        playoffs: bool,
+        league: str,
+        cells: np.ndarray,
+        columns: dict[str, int | slice],
+    ) -> tuple["GameTable", np.ndarray]:
+        """
+        Parse a tab of games all at once. `columns' says where each stat is in `cells'. Also returns which rows were games. Rows where the scores, innings or week don't parse aren't games
+        """
+        n = len(cells)
+        scores, _, scores_parsed = parse_ints(
+            cells[:, [columns["away_score"], columns["home_score"]]]
+        )
+        innings, innings_missing, innings_parsed = parse_floats(
+            cells[:, columns["innings"]]
+        )
+
+        if playoffs:
+            label = parse_strs(cells[:, columns["label"]])
+            label_parsed = np.ones(n, dtype=bool)
+        else:
+            label, _, label_parsed = parse_ints(cells[:, [columns["label"]]])
+            label = label[:, 0]
+
+        games = scores_parsed & innings_parsed & label_parsed
+
+        if "errors" in columns:
+            errors, errors_missing, errors_parsed = parse_ints(
+                cells[:, columns["errors"]]
+            )
+        else:
+            errors = np.zeros((n, 2), dtype=np.int64)
+            errors_missing = np.ones((n, 2), dtype=bool)
+            errors_parsed = np.ones(n, dtype=bool)
+
+        hitting, hitting_missing, hitting_parsed = parse_ints(
+            cells[:, columns["hitting"]]
+        )
+
+        # a stat that doesn't parse throws out all of that game's extra stats
+        has_extras = errors_parsed & hitting_parsed
+        stats = np.hstack([errors, hitting])
+        missing = np.hstack([errors_missing, hitting_missing])
+        stats[~has_extras] = 0
+        missing[~has_extras] = True
+
+        side_symbols = symbols.players if career else symbols.teams
+        table = cls(
+            symbols=symbols,
+            career=career,
+            playoffs=playoffs,
+            league=np.full(games.sum(), symbols.leagues.intern(league), np.int32),
+            away=parse_ids(cells[games, columns["away"]], side_symbols),
+            home=parse_ids(cells[games, columns["home"]], side_symbols),
+            away_score=scores[games, 0],
+            home_score=scores[games, 1],
+            innings=innings[games],
+            innings_missing=innings_missing[games],
+            label=label[games],
+            season=(
+                parse_ids(cells[games, columns["season"]], symbols.seasons)
+                if career
+                else None
+            ),
+            has_extras=has_extras[games],
+            stats=stats[games],
+            missing=missing[games],
+        )
+        return table, games
+
+    @classmethod
+    def from_box_scores(
+        cls,
+        rows: List[List[Cell]],
+        league: str,
+        playoffs: bool,
+        symbols: Symbols | None = None,
+    ) -> "GameTable":
+        """the Box%20Scores and Playoffs tabs of a league's spreadsheet"""
+        # regular season has errors but playoffs do not
+        get_col = lambda c: c if playoffs else c + 2
+
+        columns = {
+            "label": 0,
+            "away": 1,
+            "away_score": 2,
+            "home_score": 3,
+            "home": 4,
+            "innings": get_col(5),
+            # not all of these are always recorded. missing records are probably from disconnects
+            "hitting": slice(get_col(6), get_col(20)),
+        }
+        if not playoffs:
+            columns["errors"] = slice(5, 7)
+
+        rows = rows[1:]
+        cells = cell_matrix(rows, get_col(20), get_col(5) + 1)
+        symbols = symbols if symbols is not None else Symbols()
+        table, games = cls.from_cells(symbols, False, playoffs, league, cells, columns)
+
+        for i in np.flatnonzero(~games).tolist():
+            print("Something is horribly wrong with this game:")
+            print(rows[i])
+
+        return table
+
+    @classmethod
+    def from_head_to_head(
+        cls,
+        rows: List[List[Cell]],
+        league: str,
+        playoffs: bool,
+        symbols: Symbols | None = None,
+    ) -> "GameTable":
+        """the Head to Head tabs of the all-time stats spreadsheets"""
+        columns = {
+            "season": 0,
+            "label": 1,
+            "away": 2,
+            "away_score": 4,
+            "home_score": 5,
+            "home": 7,
+            "innings": 10,
+            # not all of these are always recorded. missing records are probably from disconnects
+            "hitting": slice(11, 25),
+        }
+        if not playoffs:
+            columns["errors"] = slice(8, 10)
+
+        rows = rows[1:]
+        cells = cell_matrix(rows, 25, 8)
+        symbols = symbols if symbols is not None else Symbols()
+        table, games = cls.from_cells(symbols, True, playoffs, league, cells, columns)
+
+        for i in np.flatnonzero(~games).tolist():
+            # something went horribly wrong. don't count this game
+            logger.warning(
+                f"Missing critical information from the following game. It could not be recorded. {', '.join([to_str(cell) for cell in rows[i]])}"
+            )
+
+        return table
+
+    @classmethod
+    def concat(cls, tables: List["GameTable"]) -> "GameTable":
+        """stack tables from the same kind of tab, eg every league's Head to Head. they have to share symbols"""
+        first = tables[0]
+        if any([t.symbols is not first.symbols for t in tables]):
+            raise ValueError("Can't stack game tables with different symbols")
+
+        return cls(
+            symbols=first.symbols,
+            career=first.career,
+            playoffs=first.playoffs,
+            league=np.concatenate([t.league for t in tables]),
+            away=np.concatenate([t.away for t in tables]),
+            home=np.concatenate([t.home for t in tables]),
+            away_score=np.concatenate([t.away_score for t in tables]),
+            home_score=np.concatenate([t.home_score for t in tables]),
+            innings=np.concatenate([t.innings for t in tables]),
+            innings_missing=np.concatenate([t.innings_missing for t in tables]),
+            label=np.concatenate([t.label for t in tables]),
+            season=(
+                np.concatenate([t.season for t in tables]) if first.career else None
+            ),
+            has_extras=np.concatenate([t.has_extras for t in tables]),
+            stats=np.concatenate([t.stats for t in tables]),
+            missing=np.concatenate([t.missing for t in tables]),
+        )
+
+    def take(self, rows: np.ndarray | slice) -> "GameTable":
+        """some of the games, eg table.take(slice(10, None)) for every game after the first 10"""
+        return GameTable(
+            symbols=self.symbols,
+            career=self.career,
+            playoffs=self.playoffs,
+            league=self.league[rows],
+            away=self.away[rows],
+            home=self.home[rows],
+            away_score=self.away_score[rows],
+            home_score=self.home_score[rows],
+            innings=self.innings[rows],
+            innings_missing=self.innings_missing[rows],
+            label=self.label[rows],
+            season=self.season[rows] if self.career else None,
+            has_extras=self.has_extras[rows],
+            stats=self.stats[rows],
+            missing=self.missing[rows],
+        )
+
+    def row_hashes(self) -> np.ndarray:
+        """a 64-bit hash of every game. names are hashed as strings, so hashes from different builds can be compared"""
+        names = lambda table, ids: name_hashes(table.names)[ids]
+        side = name_hashes(self.side_symbols.names)
+        labels = (
+            name_hashes(self.label.astype(str).tolist())
+            if self.playoffs
+            else self.label.astype(np.uint64)
+        )
+
+        columns = [
+            names(self.symbols.leagues, self.league),
+            side[self.away],
+            side[self.home],
+            self.away_score.astype(np.uint64),
+            self.home_score.astype(np.uint64),
+            np.where(self.innings_missing, 0, self.innings).view(np.uint64),
+            self.innings_missing.astype(np.uint64),
+            labels,
+            self.has_extras.astype(np.uint64),
+            *self.stats.astype(np.uint64).T,
+            *self.missing.astype(np.uint64).T,
+        ]
+        if self.career:
+            columns.append(names(self.symbols.seasons, self.season))
+
+        return mix_hashes(np.stack(columns, axis=1).reshape((len(self), -1)))
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """everything in the table as arrays for np.savez. names are saved as strings instead of IDs"""
+        side_names, side_ids = local_ids(
+            np.concatenate([self.away, self.home]), self.side_symbols
+        )
+        league_names, league_ids = local_ids(self.league, self.symbols.leagues)
+
+        arrays = {
+            "career": np.array(self.career),
+            "playoffs": np.array(self.playoffs),
+            "league_names": league_names,
+            "league": league_ids,
+            "side_names": side_names,
+            "away": side_ids[: len(self)],
+            "home": side_ids[len(self) :],
+            "away_score": self.away_score,
+            "home_score": self.home_score,
+            "innings": self.innings,
+            "innings_missing": self.innings_missing,
+            # round names are objects, which np.load won't read without pickle
+            "label": self.label.astype(str) if self.playoffs else self.label,
+            "has_extras": self.has_extras,
+            "stats": self.stats,
+            "missing": self.missing,
+        }
+        if self.career:
+            arrays["season_names"], arrays["season"] = local_ids(
+                self.season, self.symbols.seasons
+            )
+
+        return arrays
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict[str, np.ndarray], symbols: Symbols
+    ) -> "GameTable":
+        """the opposite of `to_arrays'. names become IDs in `symbols'"""
+        career = bool(arrays["career"])
+        playoffs = bool(arrays["playoffs"])
+        side_symbols = symbols.players if career else symbols.teams
+        intern = lambda table, key: table.intern_all(arrays[f"{key}_names"].tolist())[
+            arrays[key]
+        ]
+
+        # same order as parsing, so names get the same IDs either way
+        league = intern(symbols.leagues, "league")
+        side = side_symbols.intern_all(arrays["side_names"].tolist())
+        return cls(
+            symbols=symbols,
+            career=career,
+            playoffs=playoffs,
+            league=league,
+            away=side[arrays["away"]],
+            home=side[arrays["home"]],
+            away_score=arrays["away_score"],
+            home_score=arrays["home_score"],
+            innings=arrays["innings"],
+            innings_missing=arrays["innings_missing"],
+            label=arrays["label"].astype(object) if playoffs else arrays["label"],
+            season=intern(symbols.seasons, "season") if career else None,
+            has_extras=arrays["has_extras"],
+            stats=arrays["stats"],
+            missing=arrays["missing"],
+        )
+
+    def to_dicts(self) -> List[dict]:
+        """one dict per game, exactly like the game results in the JSON"""
+        side = "player" if self.career else "team"
+        label_key = "round" if self.playoffs else "week"
+
+        seasons = (
+            self.symbols.seasons.lookup(self.season).tolist()
+            if self.career
+            else [None] * len(self)
+        )
+        innings = np.where(self.innings_missing, None, self.innings).tolist()
+        stats = np.where(self.missing, None, self.stats).tolist()
+
+        results = []
+        for row in zip(
+            seasons,
+            self.symbols.leagues.lookup(self.league).tolist(),
+            self.side_symbols.lookup(self.away).tolist(),
+            self.side_symbols.lookup(self.home).tolist(),
+            self.away_score.tolist(),
+            self.home_score.tolist(),
+            innings,
+            self.away_won.tolist(),
+            self.run_rule.tolist(),
+            self.label.tolist(),
+            self.has_extras.tolist(),
+            stats,
+        ):
+            season, league, away, home, away_score, home_score = row[:6]
+            innings_played, away_won, run_rule, label, has_extras, extras = row[6:]
+
+            game = {"season": season, "league": league} if self.career else {}
+            game |= {
+                f"away_{side}": away,
+                f"home_{side}": home,
+                "away_score": away_score,
+                "home_score": home_score,
+                "innings": innings_played,
+                "winner": away if away_won else home,
+                "run_rule": run_rule,
+            }
+            if not self.career:
+                game["league"] = league
+            game[label_key] = label
+
+            if has_extras:
+                game |= zip(EXTRA_KEYS, extras)
+
+            results.append(game)
+
+        return results
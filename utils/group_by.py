@@ -0,0 +1,88 @@
+"""
+Aggregations over columns of games, grouped on small integer IDs like the ones in a SymbolTable. Each one takes `groups', the ID of the group every row belongs to, and does the work in a handful of numpy calls instead of a Python loop
+"""
+
+import numpy as np
+
+
+def first_seen(groups: np.ndarray) -> np.ndarray:
+    """the distinct IDs in `groups', in the order they first show up"""
+    unique, first = np.unique(groups, return_index=True)
+    return unique[np.argsort(first)]
+
+
+def group_ids(*columns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Number every distinct combination of IDs in `columns', in the order they first show up. Returns (the group of every row, each group's IDs as a (groups, columns) array)
+    """
+    keys = np.stack(columns, axis=1).astype(np.int64)
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64), keys
+
+    # one number per combination, so np.unique doesn't have to compare whole rows
+    sizes = keys.max(axis=0) + 1
+    combined = np.zeros(len(keys), dtype=np.int64)
+    for column, size in zip(keys.T, sizes.tolist()):
+        combined = combined * size + column
+
+    _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    return rank[inverse.reshape(-1)], keys[first[order]]
+
+
+def group_last(groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """the index of the last row in every group. -1 for groups without rows"""
+    last = np.full(n_groups, -1, dtype=np.int64)
+    np.maximum.at(last, groups, np.arange(len(groups)))
+    return last
+
+
+def group_min(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """the smallest of `values' in every group. the largest possible value for groups without rows"""
+    smallest = np.full(n_groups, np.iinfo(values.dtype).max, dtype=values.dtype)
+    np.minimum.at(smallest, groups, values)
+    return smallest
+
+
+def group_max(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """the largest of `values' in every group. the smallest possible value for groups without rows"""
+    largest = np.full(n_groups, np.iinfo(values.dtype).min, dtype=values.dtype)
+    np.maximum.at(largest, groups, values)
+    return largest
+
+
+def group_sum(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """totals of `values' for every group. `values' is one value per row, or a (rows, columns) array to total every column at once"""
+    totals = np.zeros((n_groups, *values.shape[1:]), dtype=values.dtype)
+    np.add.at(totals, groups, values)
+    return totals
+
+
+def group_any(groups: np.ndarray, mask: np.ndarray, n_groups: int) -> np.ndarray:
+    """True for every group with a True in `mask'. works on columns like group_sum"""
+    return group_sum(groups, mask.astype(np.int64), n_groups) > 0
+
+
+def group_cumsum(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """the running total of each row's group, up to and including that row"""
+    if len(groups) == 0:
+        return np.zeros(0, dtype=values.dtype)
+
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+    running = np.cumsum(sorted_values)
+
+    # running totals start over at the first row of each group
+    starts = np.flatnonzero(
+        np.concatenate([[True], sorted_groups[1:] != sorted_groups[:-1]])
+    )
+    before = running[starts] - sorted_values[starts]
+    lengths = np.diff(np.append(starts, len(groups)))
+
+    result = np.empty_like(running)
+    result[order] = running - np.repeat(before, lengths)
+    return result
@@ -0,0 +1,102 @@
+"""
+Write JSON straight to a file one section at a time, instead of building the whole string in memory first. The output is exactly what json.dumps(data, cls=SafeEncoder) would give
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Any, Collection, IO, Iterator
+
+from .files import atomic_open
+from .safe_num import SafeArray, SafeEncoder, SafeNum
+
+# how many levels of dicts and lists get written piece by piece. anything deeper is encoded in one go. for careers.json, that's one player at a time
+STREAM_DEPTH = 2
+
+_encoder = SafeEncoder()
+
+
+def iter_json(data: Any, depth: int = STREAM_DEPTH) -> Iterator[str]:
+    """pieces of the JSON for `data'. dicts and lists in the first `depth' levels come out an item at a time"""
+    if isinstance(data, SafeNum):
+        data = data._x
+    elif isinstance(data, SafeArray):
+        data = data.tolist()
+
+    if depth <= 0 or not isinstance(data, (dict, list)) or len(data) == 0:
+        yield _encoder.encode(data)
+    elif isinstance(data, dict):
+        if not all([isinstance(key, str) for key in data.keys()]):
+            # json has its own rules for keys that aren't strings
+            yield _encoder.encode(data)
+            return
+
+        separator = "{"
+        for key, value in data.items():
+            yield f"{separator}{_encoder.encode(key)}: "
+            yield from iter_json(value, depth - 1)
+            separator = ", "
+        yield "}"
+    else:
+        separator = "["
+        for value in data:
+            yield separator
+            yield from iter_json(value, depth - 1)
+            separator = ", "
+        yield "]"
+
+
+def iter_keyed_json(
+    data: Any, depth: int = STREAM_DEPTH
+) -> Iterator[tuple[str | None, str]]:
+    """iter_json's pieces, each with the top-level key it's part of. None for the pieces around the keys, and for everything if `data' isn't a dict that comes out an item at a time"""
+    if (
+        depth <= 0
+        or not isinstance(data, dict)
+        or len(data) == 0
+        or not all([isinstance(key, str) for key in data.keys()])
+    ):
+        for piece in iter_json(data, depth):
+            yield None, piece
+        return
+
+    separator = "{"
+    for key, value in data.items():
+        yield key, f"{separator}{_encoder.encode(key)}: "
+        for piece in iter_json(value, depth - 1):
+            yield key, piece
+        separator = ", "
+    yield None, "}"
+
+
+def hash_json(data: Any, unhashed: Collection[str] = ()) -> str:
+    """sha256 of the JSON for `data', without the top-level keys in `unhashed'. the same as what write_json returns"""
+    digest = hashlib.sha256()
+    for key, piece in iter_keyed_json(data):
+        if key not in unhashed:
+            digest.update(piece.encode())
+    return digest.hexdigest()
+
+
+def dump_json(data: Any, f: IO[str], depth: int = STREAM_DEPTH):
+    for piece in iter_json(data, depth):
+        f.write(piece)
+
+
+def write_json(
+    path: Path,
+    data: Any,
+    depth: int = STREAM_DEPTH,
+    unhashed: Collection[str] = (),
+    unless: str | None = None,
+) -> str:
+    """
+    Write `data' to `path' a section at a time. Readers see the old file until the new one is done. Returns the sha256 of what was written, without the top-level keys in `unhashed', which is hashed along the way instead of encoding everything twice. If it's `unless', `path' is left alone
+    """
+    digest = hashlib.sha256()
+    with atomic_open(path, lambda: digest.hexdigest() != unless) as f:
+        for key, piece in iter_keyed_json(data, depth):
+            f.write(piece)
+            if key not in unhashed:
+                digest.update(piece.encode())
+
+    return digest.hexdigest()
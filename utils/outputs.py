@@ -0,0 +1,300 @@
+"""
+Keeps track of the JSON we serve, with precompressed copies next to each file so that static hosts that serve them, and clients that ask for them, download less
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Any, List
+from typing_extensions import TypedDict
+
+from .files import atomic_write
+from .json_writer import hash_json, write_json
+from .raw_manifest import hash_bytes
+
+try:
+    import brotli
+except ImportError:
+    # brotli is optional. gzip is always there
+    brotli = None
+
+# sizes and hashes of every output and its compressed copies. lives in the save dir
+OUTPUT_MANIFEST_FILE = "outputs.json"
+
+# the file extension for each kind of compressed copy
+ENCODINGS = {"gzip": ".gz", "br": ".br"}
+
+# top-level keys that change every build even when nothing else does. they don't count when checking if an output changed
+VOLATILE_KEYS = ["last_updated_at"]
+
+
+class CompressedOutput(TypedDict):
+    """a compressed copy of an output, next to the output"""
+
+    """relative to the save dir"""
+    path: str
+    size: int
+    sha256: str
+    """gzip level or brotli quality"""
+    level: int
+
+
+class OutputEntry(TypedDict):
+    """an output as it was at the end of the last build"""
+
+    size: int
+    sha256: str
+    """hash of the JSON without VOLATILE_KEYS. None if we don't know it"""
+    content_sha256: str | None
+    """the output this is another name for. a symlink to it where symlinks work. None for real files"""
+    alias_of: str | None
+    """encoding: compressed copy"""
+    compressed: dict[str, CompressedOutput]
+
+
+class OutputManifest(TypedDict):
+    """keyed on paths relative to the save dir"""
+
+    outputs: dict[str, OutputEntry]
+    """outputs that changed in the last build"""
+    changed: List[str]
+
+
+def content_hash(data: Any) -> str:
+    """sha256 of `data' as JSON, without VOLATILE_KEYS"""
+    return hash_json(data, VOLATILE_KEYS)
+
+
+def link(save_dir: Path, name: str, target: str) -> bool:
+    """make `name' a symlink to `target', or a copy of it where symlinks don't work. False if it already was a symlink to `target'"""
+    path = save_dir.joinpath(name)
+    relative = os.path.relpath(save_dir.joinpath(target), path.parent)
+    if path.is_symlink() and os.readlink(path) == relative:
+        return False
+
+    temp = path.with_name(f".{path.name}.link")
+    temp.unlink(missing_ok=True)
+    try:
+        os.symlink(relative, temp)
+    except (OSError, NotImplementedError):
+        shutil.copyfile(save_dir.joinpath(target), temp)
+    os.replace(temp, path)
+    return True
+
+
+def has_brotli() -> bool:
+    return brotli is not None
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 so the same output always compresses to the same bytes
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        if brotli is None:
+            raise Exception("Compressing with brotli needs `pip install brotli'")
+        return brotli.compress(data, quality=level)
+    raise ValueError(f"Unknown encoding {encoding}")
+
+
+def load_output_manifest(save_dir: Path) -> OutputManifest:
+    """an empty manifest if we've never built into `save_dir'"""
+    path = save_dir.joinpath(OUTPUT_MANIFEST_FILE)
+    if not path.exists():
+        return {"outputs": {}}
+
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def save_output_manifest(save_dir: Path, manifest: OutputManifest):
+    atomic_write(
+        save_dir.joinpath(OUTPUT_MANIFEST_FILE),
+        json.dumps(manifest, indent=2, sort_keys=True),
+    )
+
+
+def compress_output(
+    save_dir: Path, name: str, levels: dict[str, int], previous: OutputEntry | None
+) -> OutputEntry:
+    """
+    Compress `name' with every encoding in `levels' (encoding: level), unless the copy from last time is still good. Copies in encodings that aren't in `levels' anymore are removed, so they can't go stale
+    """
+    data = save_dir.joinpath(name).read_bytes()
+    entry: OutputEntry = {
+        "size": len(data),
+        "sha256": hash_bytes(data),
+        "content_sha256": (
+            previous.get("content_sha256", None) if previous is not None else None
+        ),
+        "alias_of": None,
+        "compressed": {},
+    }
+
+    previous_compressed = previous["compressed"] if previous is not None else {}
+    for encoding, old in previous_compressed.items():
+        if encoding not in levels:
+            save_dir.joinpath(old["path"]).unlink(missing_ok=True)
+
+    for encoding, level in levels.items():
+        path = f"{name}{ENCODINGS[encoding]}"
+        old = previous_compressed.get(encoding, None)
+        if (
+            old is not None
+            and previous["sha256"] == entry["sha256"]
+            and old["level"] == level
+            and save_dir.joinpath(path).exists()
+        ):
+            entry["compressed"][encoding] = old
+            continue
+
+        compressed = compress(data, encoding, level)
+        atomic_write(save_dir.joinpath(path), compressed)
+        entry["compressed"][encoding] = {
+            "path": path,
+            "size": len(compressed),
+            "sha256": hash_bytes(compressed),
+            "level": level,
+        }
+
+    return entry
+
+
+def compress_outputs(
+    save_dir: Path,
+    names: List[str],
+    levels: dict[str, int],
+    jobs: int = 1,
+    aliases: dict[str, str] | None = None,
+    content_hashes: dict[str, str] | None = None,
+    changed: List[str] | None = None,
+) -> OutputManifest:
+    """
+    Compressed copies of every output in `names' (relative to `save_dir'), in `jobs' threads at once. zlib and brotli let go of the GIL while they compress, so threads are enough. Returns the new manifest, which is also saved in `save_dir'
+
+    `aliases' (name: target) are other names for outputs in `names'. Their compressed copies are links to the target's. `content_hashes' are the content hashes of outputs written in this build, and `changed' are the outputs that changed
+    """
+    aliases = aliases if aliases is not None else {}
+    content_hashes = content_hashes if content_hashes is not None else {}
+    previous = load_output_manifest(save_dir)["outputs"]
+
+    # outputs that are gone shouldn't leave compressed copies behind
+    for name, entry in previous.items():
+        if name not in names and not save_dir.joinpath(name).exists():
+            for old in entry["compressed"].values():
+                save_dir.joinpath(old["path"]).unlink(missing_ok=True)
+
+    files = [name for name in names if name not in aliases]
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        entries = dict(
+            zip(
+                files,
+                pool.map(
+                    lambda name: compress_output(
+                        save_dir, name, levels, previous.get(name, None)
+                    ),
+                    files,
+                ),
+            )
+        )
+    for name, digest in content_hashes.items():
+        if name in entries:
+            entries[name]["content_sha256"] = digest
+
+    for name in names:
+        if name not in aliases:
+            continue
+
+        target = aliases[name]
+        entries[name] = {
+            **entries[target],
+            "alias_of": target,
+            "compressed": {
+                encoding: {**copy, "path": f"{name}{ENCODINGS[encoding]}"}
+                for (encoding, copy) in entries[target]["compressed"].items()
+            },
+        }
+        for encoding, copy in entries[target]["compressed"].items():
+            link(save_dir, entries[name]["compressed"][encoding]["path"], copy["path"])
+        if name in previous:
+            for encoding, old in previous[name]["compressed"].items():
+                if encoding not in levels:
+                    save_dir.joinpath(old["path"]).unlink(missing_ok=True)
+
+    manifest: OutputManifest = {
+        "outputs": {name: entries[name] for name in names},
+        "changed": changed if changed is not None else [],
+    }
+    save_output_manifest(save_dir, manifest)
+    return manifest
+
+
+class Outputs:
+    """
+    Writes outputs to the save dir for a build, leaving alone the ones that haven't changed since the last build so that anything downstream that caches them stays good. Keeps track of what changed for the manifest
+    """
+
+    def __init__(self, save_dir: Path):
+        self.save_dir = save_dir
+        self.previous = load_output_manifest(save_dir)["outputs"]
+        """content hashes of everything written in this build"""
+        self.content_hashes: dict[str, str] = {}
+        """name: target. aliases from earlier builds stay aliases"""
+        self.aliases: dict[str, str] = {
+            name: entry["alias_of"]
+            for (name, entry) in self.previous.items()
+            if entry.get("alias_of", None) is not None
+        }
+        self.changed: List[str] = []
+
+    def write_json(self, name: str, data: Any) -> bool:
+        """write `data' to `name' unless it's the same as last time, other than VOLATILE_KEYS. True if it was written"""
+        path = self.save_dir.joinpath(name)
+        self.aliases.pop(name, None)
+
+        previous = self.previous.get(name, None)
+        unchanged = (
+            previous.get("content_sha256", None)
+            if previous is not None
+            and previous.get("alias_of", None) is None
+            and path.exists()
+            and not path.is_symlink()
+            else None
+        )
+        # the hash comes out of writing, so the new file is only thrown out after it's written
+        digest = write_json(path, data, unhashed=VOLATILE_KEYS, unless=unchanged)
+        self.content_hashes[name] = digest
+        if digest == unchanged:
+            return False
+
+        self.changed.append(name)
+        return True
+
+    def alias(self, name: str, target: str) -> bool:
+        """make `name' another name for `target'. True if that changes what's at `name'"""
+        self.aliases[name] = target
+        changed = link(self.save_dir, name, target) or target in self.changed
+        if changed:
+            self.changed.append(name)
+        return changed
+
+    def finish(
+        self, names: List[str], levels: dict[str, int], jobs: int = 1
+    ) -> OutputManifest:
+        """compress `names' and save the manifest. see compress_outputs"""
+        return compress_outputs(
+            self.save_dir,
+            names,
+            levels,
+            jobs,
+            {
+                name: target
+                for (name, target) in self.aliases.items()
+                if name in names and target in names
+            },
+            self.content_hashes,
+            self.changed,
+        )
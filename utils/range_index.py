@@ -0,0 +1,241 @@
+"""
+Tallies for any stretch of seasons and weeks, like "seasons 12 through 18" or "XBL since season 10", without adding up every game again
+"""
+
+import logging
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from .files import load_npz, save_npz
+from .game_table import GameTable
+from .group_by import group_ids, group_sum
+from .symbols import Symbols
+from .tallies import TALLY_KEYS, Tallies, tally_games
+
+logger = logging.getLogger("stats/range_index")
+
+# a week is season * WEEK_LIMIT + week, so weeks sort in the order they were played
+WEEK_LIMIT = 1000
+
+# stands in for "every player" or "every league" in an owner
+EVERYONE = -1
+
+# a season and a week. a week of None is the whole season
+Week = tuple[int, int | None]
+
+
+def parse_week(text: str) -> Week:
+    """`12' is all of season 12, `12:3' is week 3 of season 12"""
+    season, _, week = text.partition(":")
+    if week == "":
+        return (int(season), None)
+    if not 0 <= int(week) < WEEK_LIMIT:
+        raise ValueError(f"Week {week} is out of range")
+    return (int(season), int(week))
+
+
+def parse_week_range(text: str) -> tuple[Week | None, Week | None]:
+    """`12-18', `10:3-18:5', `10-' or `-18'. a missing end is open ended"""
+    first, dash, last = text.partition("-")
+    if dash == "":
+        raise ValueError(f"`{text}' isn't a range. Try something like 12-18")
+
+    return (
+        parse_week(first) if first != "" else None,
+        parse_week(last) if last != "" else None,
+    )
+
+
+class RangeIndex:
+    """
+    Running totals of tallies for every owner, week by week. An owner is a (player ID, league ID) pair, where either one can be EVERYONE: a player in one league, a player in every league, everyone in one league, or everyone in every league
+
+    Each owner's weeks are in order and `cumulative' is a running total over every row, so the tallies between two weeks are one row of `cumulative' minus another. `missing' works the same way, counting the games where a stat was missing
+
+    Only regular season games go in, because playoff rounds aren't numbered. Seasons that aren't numbers can't be put in order, so they're left out too
+    """
+
+    def __init__(
+        self,
+        symbols: Symbols,
+        owners: dict[tuple[int, int], tuple[int, int]],
+        week: np.ndarray,
+        season: np.ndarray,
+        cumulative: np.ndarray,
+        missing: np.ndarray,
+    ):
+        self.symbols = symbols
+        """(player ID, league ID): (first row, last row + 1) of that owner's weeks"""
+        self.owners = owners
+        """season * WEEK_LIMIT + week, for every row"""
+        self.week = week
+        """the season ID of every row"""
+        self.season = season
+        """running totals of TALLY_KEYS, with a row of zeros in front"""
+        self.cumulative = cumulative
+        """running counts of games missing each of TALLY_KEYS, with a row of zeros in front"""
+        self.missing = missing
+
+    @classmethod
+    def from_games(cls, tables: List[GameTable]) -> "RangeIndex":
+        """`tables' are regular season Head to Head tabs sharing one set of symbols"""
+        if any([table.playoffs for table in tables]):
+            raise ValueError("Playoff games don't have weeks to put in order")
+
+        games = GameTable.concat(tables)
+        symbols = games.symbols
+        player, _, tallies, missing = tally_games(games)
+
+        season_numbers = np.array(
+            [int(name) if name.isdigit() else -1 for name in symbols.seasons.names],
+            dtype=np.int64,
+        )
+        season = np.repeat(games.season, 2)
+        league = np.repeat(games.league, 2)
+        week = season_numbers[season] * WEEK_LIMIT + np.repeat(games.label, 2)
+
+        numbered = (season_numbers[season] >= 0) & (week >= 0)
+        if not numbered.all():
+            logger.warning(
+                f"Leaving {(~numbered).sum() // 2} games without a numbered season and week out of the range index"
+            )
+
+        # every game goes in once for each kind of owner
+        everyone = np.full(len(player), EVERYONE)
+        owner_player = np.concatenate([player, player, everyone, everyone])
+        owner_league = np.concatenate([league, everyone, league, everyone])
+        rows = np.tile(numbered, 4)
+
+        # + 1 so that EVERYONE has an ID that group_ids can use
+        ids, groups = group_ids(
+            owner_player[rows] + 1,
+            owner_league[rows] + 1,
+            np.tile(week, 4)[rows],
+            np.tile(season, 4)[rows],
+        )
+        totals = group_sum(ids, np.tile(tallies, (4, 1))[rows], len(groups))
+        missing_counts = group_sum(
+            ids, np.tile(missing, (4, 1))[rows].astype(np.int64), len(groups)
+        )
+
+        order = np.lexsort((groups[:, 2], groups[:, 1], groups[:, 0]))
+        groups = groups[order]
+        owner_starts = np.flatnonzero(
+            np.concatenate(
+                [[len(groups) > 0], (groups[1:, :2] != groups[:-1, :2]).any(axis=1)]
+            )
+        )
+        owner_ends = np.append(owner_starts[1:], len(groups))
+        owners = {
+            (player_id - 1, league_id - 1): (start, end)
+            for ((player_id, league_id), start, end) in zip(
+                groups[owner_starts, :2].tolist(),
+                owner_starts.tolist(),
+                owner_ends.tolist(),
+            )
+        }
+
+        zeros = np.zeros((1, len(TALLY_KEYS)), dtype=np.int64)
+        return cls(
+            symbols=symbols,
+            owners=owners,
+            week=groups[:, 2],
+            season=groups[:, 3],
+            cumulative=np.concatenate([zeros, np.cumsum(totals[order], axis=0)]),
+            missing=np.concatenate([zeros, np.cumsum(missing_counts[order], axis=0)]),
+        )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """everything in the index as arrays for np.savez. names are saved as strings instead of IDs"""
+        owners = np.array(
+            [[*owner, *rows] for (owner, rows) in self.owners.items()], dtype=np.int64
+        ).reshape(-1, 4)
+        return {
+            "player_names": np.array(self.symbols.players.names, dtype=str),
+            "league_names": np.array(self.symbols.leagues.names, dtype=str),
+            "season_names": np.array(self.symbols.seasons.names, dtype=str),
+            "owners": owners,
+            "week": self.week,
+            "season": self.season,
+            "cumulative": self.cumulative,
+            "missing": self.missing,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "RangeIndex":
+        """the opposite of `to_arrays'. the index gets its own symbols, with the same IDs as before"""
+        symbols = Symbols()
+        symbols.players.intern_all(arrays["player_names"].tolist())
+        symbols.leagues.intern_all(arrays["league_names"].tolist())
+        symbols.seasons.intern_all(arrays["season_names"].tolist())
+        return cls(
+            symbols=symbols,
+            owners={
+                (player_id, league_id): (start, end)
+                for (player_id, league_id, start, end) in arrays["owners"].tolist()
+            },
+            week=arrays["week"],
+            season=arrays["season"],
+            cumulative=arrays["cumulative"],
+            missing=arrays["missing"],
+        )
+
+    @classmethod
+    def load(cls, path: Path, key: str) -> "RangeIndex | None":
+        """None if there isn't a saved index, or it was built from different games or code"""
+        arrays = load_npz(path, key, "range index")
+        if arrays is None:
+            return None
+        return cls.from_arrays(arrays)
+
+    def save(self, path: Path, key: str):
+        save_npz(path, key, self.to_arrays())
+
+    def tallies(
+        self,
+        player: str | None,
+        first: Week | None = None,
+        last: Week | None = None,
+        league: str | None = None,
+    ) -> Tallies | None:
+        """
+        Tallies from week `first' through week `last', both included. A player of None is everyone, and a league of None is every league. None if there weren't any games
+        """
+        player_id = (
+            EVERYONE if player is None else self.symbols.players.ids.get(player, None)
+        )
+        league_id = (
+            EVERYONE if league is None else self.symbols.leagues.ids.get(league, None)
+        )
+        if (player_id, league_id) not in self.owners:
+            return None
+
+        # the first and last week that count, as they are in `week'
+        first_week = (
+            first[0] * WEEK_LIMIT + (first[1] if first[1] is not None else 0)
+            if first is not None
+            else 0
+        )
+        last_week = (
+            last[0] * WEEK_LIMIT + (last[1] if last[1] is not None else WEEK_LIMIT - 1)
+            if last is not None
+            else np.iinfo(np.int64).max
+        )
+
+        start, end = self.owners[(player_id, league_id)]
+        weeks = self.week[start:end]
+        low = start + int(np.searchsorted(weeks, first_week, side="left"))
+        high = start + int(np.searchsorted(weeks, last_week, side="right"))
+        if high <= low:
+            return None
+
+        range_tallies = Tallies.from_row(
+            (self.cumulative[high] - self.cumulative[low]).tolist(),
+            (self.missing[high] - self.missing[low] > 0).tolist(),
+        )
+        for season_id in np.unique(self.season[low:high]).tolist():
+            range_tallies.add_season(season_id)
+
+        return range_tallies
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+import hashlib
+import json
+from pathlib import Path
+from typing import List
+from typing_extensions import TypedDict
+
+from .files import atomic_write
+
+# what we know about every tab we've downloaded. lives in the raw dir
+MANIFEST_FILE = "manifest.json"
+
+# which tabs changed in the latest download. lives in the raw dir
+CHANGED_TABS_FILE = "changed-tabs.json"
+
+
+class TabManifestEntry(TypedDict):
+    """the last version of a tab we saw"""
+
+    sha256: str
+    size: int
+    etag: str | None
+    last_modified: str | None
+    """only tracked for append-only tabs"""
+    rows: int | None
+    """downloads of only the new rows since the last time we downloaded the whole tab"""
+    incremental_runs: int
+    """how the tab's cells were rendered. FORMATTED_VALUE if missing"""
+    value_render_option: str
+
+
+class RawManifest(TypedDict):
+    """keyed on file names in the raw dir"""
+
+    tabs: dict[str, TabManifestEntry]
+
+
+class ChangedTabs(TypedDict):
+    """report of what changed between the previous download and the latest one"""
+
+    fetched_at: str
+    changed: List[str]
+    unchanged: List[str]
+    """file name: sha256 for every tab in the latest download"""
+    tabs: dict[str, str]
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(raw_dir: Path) -> RawManifest:
+    """an empty manifest if we've never downloaded anything to `raw_dir'"""
+    path = raw_dir.joinpath(MANIFEST_FILE)
+    if not path.exists():
+        return {"tabs": {}}
+
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def save_manifest(raw_dir: Path, manifest: RawManifest):
+    atomic_write(
+        raw_dir.joinpath(MANIFEST_FILE), json.dumps(manifest, indent=2, sort_keys=True)
+    )
+
+
+def load_changed_tabs(raw_dir: Path) -> ChangedTabs | None:
+    """None if there's no report, eg the raw files came from somewhere besides get-sheets.py"""
+    path = raw_dir.joinpath(CHANGED_TABS_FILE)
+    if not path.exists():
+        return None
+
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def save_changed_tabs(raw_dir: Path, changed: List[str], tabs: dict[str, str]):
+    report: ChangedTabs = {
+        "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "changed": sorted(changed),
+        "unchanged": sorted([name for name in tabs if name not in changed]),
+        "tabs": tabs,
+    }
+
+    atomic_write(raw_dir.joinpath(CHANGED_TABS_FILE), json.dumps(report, indent=2))
+
+    return report
@@ -1,27 +1,46 @@
 from json import JSONEncoder
 import numbers
+from typing import Iterable, List
+
+import numpy as np
 
 
 class SafeNum(numbers.Number):
     """
-    Implements a number that has a contagious None. Many columns are missing data. If data from a column is missing, we can't do a calculation accurately. This allows a number to turn into None without freaking out. But any further calculations with None always return SafeNum(None. Also dividing by 0 turns into None. Otherwise, this should behave like a normal )number
+    Implements a number that has a contagious None. Many columns are missing data. If data from a column is missing, we can't do a calculation accurately. This allows a number to turn into None without freaking out. But any further calculations with None always return SafeNum(None). Also dividing by 0 turns into None. Otherwise, this should behave like a normal number
 
     The reason we use None instead of something like NaN or Infinity is because None is JSON serializable, while other non-numeric values are not.
 
-    FYI, this class is not compatible with `is None' syntax
+    SafeNums never change. Every operation returns a new one, and every SafeNum(None) is the same object. FYI, this class is not compatible with `is None' syntax
     """
 
-    def __init__(self, x: float | int | str | None):
+    __slots__ = ("_x",)
+
+    def __new__(cls, x: float | int | str | None = None):
         if x is None:
-            self._x = None
-        elif isinstance(x, str):
+            return _NONE
+
+        if isinstance(x, str):
             try:
-                y = float(x)
-                self._x = y
+                x = float(x)
             except ValueError as e:
-                self._x = None
-        else:
-            self._x = x
+                return _NONE
+
+        return _new(x)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SafeNums can't be changed")
+
+    def __reduce__(self):
+        """pickle by value, so SafeNum(None) unpickles to the shared None"""
+        return (SafeNum, (self._x,))
+
+    def __copy__(self):
+        """SafeNums never change, so a copy can be the same SafeNum"""
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __int__(self):
         if self._x is None:
@@ -48,29 +67,28 @@ class SafeNum(numbers.Number):
 
     def __ne__(self, other):
         """!="""
-        return not self._x == other
+        return not self.__eq__(other)
 
     def __neg__(self):
         """negative"""
         if self._x is None:
             return self
 
-        return self.__mul__(-1)
+        return _new(-self._x)
 
     def __add__(self, other):
         """+"""
-        if self._x is None or other is None:
-            return SafeNum(None)
+        x = self._x
+        if type(other) is int or type(other) is float:
+            return _NONE if x is None else _new(x + other)
 
-        return SafeNum(self._x + other)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if x is None or other is None:
+            return _NONE
 
-    def __iadd__(self, other):
-        """+="""
-        if other is None:
-            return SafeNum(None)
-
-        self._x = self._x + other
-        return self
+        return _new(x + other)
 
     def __radd__(self, other):
         """right side of +"""
@@ -78,40 +96,45 @@ class SafeNum(numbers.Number):
 
     def __sub__(self, other):
         """-"""
-        if self._x is None or other is None:
-            return SafeNum(None)
-
-        return self.__add__(-other)
+        x = self._x
+        if type(other) is int or type(other) is float:
+            return _NONE if x is None else _new(x - other)
 
-    def __isub__(self, other):
-        """-="""
-        if other is None:
-            return SafeNum(None)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if x is None or other is None:
+            return _NONE
 
-        self._x = self._x - other
-        return self
+        return _new(x - other)
 
     def __rsub__(self, other):
         """right side of -"""
-        if other is None:
-            return SafeNum(None)
+        x = self._x
+        if type(other) is int or type(other) is float:
+            return _NONE if x is None else _new(other - x)
+
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if x is None or other is None:
+            return _NONE
 
-        return other - self._x
+        return _new(other - x)
 
     def __mul__(self, other):
         """*"""
-        if self._x is None or other is None:
-            return SafeNum(None)
+        x = self._x
+        if type(other) is int or type(other) is float:
+            return _NONE if x is None else _new(x * other)
 
-        return SafeNum(self._x * other)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if x is None or other is None:
+            return _NONE
 
-    def __imul__(self, other):
-        """*="""
-        if other is None:
-            return SafeNum(None)
-
-        self._x = self._x * other
-        return self
+        return _new(x * other)
 
     def __rmul__(self, other):
         """right side of *"""
@@ -119,70 +142,64 @@ class SafeNum(numbers.Number):
 
     def __floordiv__(self, other):
         """// returns an int"""
-        if other == 0 or other is None:
-            return SafeNum(None)
-
-        return SafeNum(self._x // other)
-
-    def __ifloordiv__(self, other):
-        """//= returns an int"""
-        if other is None:
-            return SafeNum(None)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if self._x is None or other is None or other == 0:
+            return _NONE
 
-        self._x = self._x // other
-        return self
+        return _new(self._x // other)
 
     def __rfloordiv__(self, other):
         """// returns an int"""
-        if self is None or other is None or self._x == 0:
-            return SafeNum(None)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if self._x is None or other is None or self._x == 0:
+            return _NONE
 
-        return SafeNum(other // self._x)
+        return _new(other // self._x)
 
     def __truediv__(self, other):
         """/ returns a float"""
-        if self._x is None or other is None or other == 0:
-            return SafeNum(None)
+        x = self._x
+        if type(other) is int or type(other) is float:
+            return _NONE if x is None or other == 0 else _new(x / other)
 
-        return SafeNum(self._x / other)
-
-    def __itruediv__(self, other):
-        """/= returns a float"""
-        if self._x is None or other is None:
-            return SafeNum(None)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if x is None or other is None or other == 0:
+            return _NONE
 
-        self._x = self._x / other
-        return self
+        return _new(x / other)
 
     def __rtruediv__(self, other):
         """/ returns a float"""
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
         if self._x is None or other is None or self._x == 0:
-            return SafeNum(None)
+            return _NONE
 
-        return SafeNum(other / self._x)
+        return _new(other / self._x)
 
     def __pow__(self, other):
         """**"""
-        if other is None:
-            return SafeNum(None)
-
-        return SafeNum(self._x**other)
-
-    def __ipow__(self, other):
-        """**="""
-        if other is None:
-            return SafeNum(None)
+        other = _unwrap(other)
+        if other is NotImplemented:
+            return other
+        if self._x is None or other is None:
+            return _NONE
 
-        self._x = self._x**other
-        return self
+        return _new(self._x**other)
 
     def __round__(self, *args, **kwargs):
         """round"""
         if self._x is None:
             return self
 
-        self._x = round(self._x, *args, **kwargs)
-        return self
+        return _new(round(self._x, *args, **kwargs))
 
     @property
     def is_none(self):
@@ -190,8 +207,183 @@ class SafeNum(numbers.Number):
         return self._x is None
 
 
+_set_x = SafeNum._x.__set__
+
+
+def _new(x: float | int | None) -> SafeNum:
+    """a SafeNum without checking `x'"""
+    safe_num = object.__new__(SafeNum)
+    _set_x(safe_num, x)
+    return safe_num
+
+
+_NONE = _new(None)
+
+
+def _unwrap(other):
+    """the number in `other'. NotImplemented for SafeArrays, so the SafeArray does the math"""
+    if isinstance(other, SafeNum):
+        return other._x
+    if isinstance(other, SafeArray):
+        return NotImplemented
+    return other
+
+
+class SafeArray:
+    """
+    A whole column of SafeNums at once. `values' holds the numbers and `valid' is False wherever a SafeNum would be None. Like SafeNum, anything invalid stays invalid through any further calculations, dividing by 0 turns invalid, and it JSON encodes with nulls for the invalid values
+
+    Operations never change an array in place. They return a new SafeArray
+    """
+
+    __slots__ = ("values", "valid")
+
+    # numpy arrays defer to us instead of treating a SafeArray like an object to put in an array
+    __array_ufunc__ = None
+
+    def __init__(
+        self,
+        values: Iterable[float | int | None] | np.ndarray,
+        valid: np.ndarray | None = None,
+    ):
+        if not isinstance(values, np.ndarray):
+            values = list(values)
+            if valid is None:
+                valid = np.array([x is not None for x in values], dtype=bool)
+            values = np.array([0 if x is None else x for x in values])
+
+        self.values = values
+        self.valid = np.ones(len(values), dtype=bool) if valid is None else valid
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> SafeNum:
+        return SafeNum(self.values[i].item() if self.valid[i] else None)
+
+    def __repr__(self):
+        """string representation"""
+        return f"SafeArray({self.tolist()})"
+
+    def tolist(self) -> List[int | float | None]:
+        """plain python numbers, with None where it's invalid"""
+        return [
+            x if valid else None
+            for (x, valid) in zip(self.values.tolist(), self.valid.tolist())
+        ]
+
+    def __eq__(self, other):
+        """== compares the whole array"""
+        if isinstance(other, SafeArray):
+            return self.tolist() == other.tolist()
+
+        return self.tolist() == other
+
+    def __ne__(self, other):
+        """!="""
+        return not self == other
+
+    __hash__ = None
+
+    def _operate(self, op, other, divide: bool = False, right: bool = False):
+        """`op' on every value. `right' if this array is on the right side"""
+        if other is None:
+            return SafeArray(
+                np.zeros_like(self.values), np.zeros(len(self), dtype=bool)
+            )
+
+        if isinstance(other, SafeArray):
+            other_values, other_valid = (other.values, other.valid)
+        elif isinstance(other, SafeNum):
+            other_values, other_valid = (
+                (0, False) if other.is_none else (other._x, True)
+            )
+        else:
+            other_values, other_valid = (other, True)
+
+        a, b = (other_values, self.values) if right else (self.values, other_values)
+        valid = self.valid & other_valid
+        if divide:
+            valid = valid & (b != 0)
+            # anything invalid is thrown away, so divide it by 1 instead of 0
+            b = np.where(valid, b, 1)
+
+        return SafeArray(op(a, b), valid)
+
+    def __neg__(self):
+        """negative"""
+        return SafeArray(-self.values, self.valid)
+
+    def __add__(self, other):
+        """+"""
+        return self._operate(np.add, other)
+
+    def __radd__(self, other):
+        """right side of +"""
+        return self._operate(np.add, other, right=True)
+
+    def __sub__(self, other):
+        """-"""
+        return self._operate(np.subtract, other)
+
+    def __rsub__(self, other):
+        """right side of -"""
+        return self._operate(np.subtract, other, right=True)
+
+    def __mul__(self, other):
+        """*"""
+        return self._operate(np.multiply, other)
+
+    def __rmul__(self, other):
+        """right side of *"""
+        return self._operate(np.multiply, other, right=True)
+
+    def __floordiv__(self, other):
+        """// returns ints when both sides are ints"""
+        return self._operate(np.floor_divide, other, divide=True)
+
+    def __rfloordiv__(self, other):
+        """right side of //"""
+        return self._operate(np.floor_divide, other, divide=True, right=True)
+
+    def __truediv__(self, other):
+        """/ returns floats"""
+        return self._operate(np.true_divide, other, divide=True)
+
+    def __rtruediv__(self, other):
+        """right side of /"""
+        return self._operate(np.true_divide, other, divide=True, right=True)
+
+    def __pow__(self, other):
+        """**"""
+        return self._operate(np.power, other)
+
+    def __round__(self, digits: int = 0):
+        """round(x, digits) for every value, the same as python rounds"""
+        if self.values.dtype.kind != "f":
+            return SafeArray(self.values, self.valid)
+
+        scale = 10.0**digits
+        scaled = self.values * scale
+        rounded = np.rint(scaled) / scale
+
+        # scaling isn't exact, so anything close to a half could round the other way. round() those like python does
+        close = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-9 * np.maximum(
+            1.0, np.abs(scaled)
+        )
+        for i in np.flatnonzero(close).tolist():
+            rounded[i] = round(self.values[i].item(), digits)
+
+        return SafeArray(rounded, self.valid)
+
+    @property
+    def is_none(self) -> np.ndarray:
+        """True wherever the value is None"""
+        return ~self.valid
+
+
 class SafeEncoder(JSONEncoder):
-    """JSON encoder that can handle SafeNum, otherwise it's normal"""
+    """JSON encoder that can handle SafeNum and SafeArray, otherwise it's normal"""
 
     def __init__(
         self,
@@ -203,7 +395,7 @@ class SafeEncoder(JSONEncoder):
         sort_keys=False,
         indent=None,
         separators=None,
-        default=None
+        default=None,
     ):
         super().__init__(
             skipkeys=skipkeys,
@@ -219,4 +411,6 @@ class SafeEncoder(JSONEncoder):
     def default(self, obj):
         if isinstance(obj, SafeNum):
             return obj._x
+        if isinstance(obj, SafeArray):
+            return obj.tolist()
         return super().default(obj)
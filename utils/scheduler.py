@@ -0,0 +1,153 @@
+from http.client import HTTPException
+import random
+import threading
+import time
+from typing import Callable
+from typing_extensions import TypedDict
+import urllib.error
+import urllib.request
+
+# statuses that mean "try again later" instead of "you asked for something wrong"
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+class Response(TypedDict):
+    status: int
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+
+
+def request(
+    url: str, headers: dict[str, str], timeout: float | None = None
+) -> Response:
+    """GET a url once. a 304 comes back with an empty body instead of raising"""
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as res:
+            return {
+                "status": res.status,
+                "body": res.read(),
+                "etag": res.headers.get("ETag"),
+                "last_modified": res.headers.get("Last-Modified"),
+            }
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            raise
+        return {
+            "status": 304,
+            "body": b"",
+            "etag": e.headers.get("ETag"),
+            "last_modified": e.headers.get("Last-Modified"),
+        }
+
+
+class TokenBucket:
+    """
+    Allows `rate' requests per second on average, with bursts of up to `capacity' requests. Safe to share between threads
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """block until we're allowed to make a request. returns how long we waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+
+            self._sleep(wait)
+            waited += wait
+
+
+class FetchScheduler:
+    """
+    Sends requests within a budget of `requests_per_minute'. 429s, 5xxs, timeouts and dropped connections are retried up to `max_retries' times with jittered exponential backoff. A Retry-After header wins over the backoff
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 300,
+        burst: int = 60,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 32.0,
+        timeout: float | None = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.bucket = TokenBucket(requests_per_minute / 60, burst, sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.retries = 0
+        self._sleep = sleep
+        self._jitter = jitter
+        self._lock = threading.Lock()
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """how long to wait before the `attempt'th retry (starting at 0)"""
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                # Retry-After can also be a date. fall back to backing off
+                pass
+
+        # "full jitter" keeps a pool of workers from retrying in lockstep
+        return self._jitter() * min(self.max_backoff, self.backoff * 2**attempt)
+
+    def request(self, url: str, headers: dict[str, str]) -> Response:
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+
+            retry_after = None
+            try:
+                return request(url, headers, timeout=self.timeout)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                retry_after = e.headers.get("Retry-After")
+                reason = f"{e.code}"
+            except (
+                urllib.error.URLError,
+                HTTPException,
+                TimeoutError,
+                ConnectionError,
+            ) as e:
+                if attempt >= self.max_retries:
+                    raise
+                reason = type(e).__name__
+
+            wait = self.delay(attempt, retry_after)
+            print(f"retrying {url.split('?')[0]} in {wait:.2f}s ({reason})")
+            with self._lock:
+                self.retries += 1
+            self._sleep(wait)
+            attempt += 1
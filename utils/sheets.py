@@ -0,0 +1,525 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import os
+from pathlib import Path
+import time
+from typing import List
+from typing_extensions import TypedDict
+import urllib.parse
+
+from .files import write_temp
+from .raw_manifest import RawManifest, TabManifestEntry, hash_bytes
+from .scheduler import FetchScheduler
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+
+# cells as they're displayed in the spreadsheet, eg "1,234" or ".500"
+FORMATTED_VALUE = "FORMATTED_VALUE"
+# cells as numbers and strings, eg 1234 or 0.5
+UNFORMATTED_VALUE = "UNFORMATTED_VALUE"
+
+
+class TabRequest(TypedDict):
+    """a single tab to download from a spreadsheet"""
+
+    """the prefix for the saved file, eg XBL or CAREER_STATS"""
+    sheet: str
+    spreadsheet_id: str
+    """url-encoded tab name, eg Box%20Scores"""
+    tab: str
+    """rows are only ever added to the end of the tab, so we can download just the new ones"""
+    append_only: bool
+
+
+class TabResult(TypedDict):
+    """what happened when we downloaded a tab"""
+
+    sheet: str
+    tab: str
+    path: Path
+    size: int
+    seconds: float
+    sha256: str
+    """False if the tab is exactly the same as the last time we downloaded it"""
+    changed: bool
+    etag: str | None
+    last_modified: str | None
+    """where the new version is waiting to be moved to `path'. None if there's nothing to move"""
+    staged: Path | None
+    """rows in the tab. only tracked for append-only tabs"""
+    rows: int | None
+    """how many rows we added to the end of the tab. None if we downloaded all of it"""
+    appended: int | None
+    """downloads of only the new rows since the last time we downloaded all of it"""
+    incremental_runs: int
+    """FORMATTED_VALUE or UNFORMATTED_VALUE"""
+    value_render_option: str
+
+
+def tab_filename(sheet: str, tab: str) -> str:
+    """where a tab is saved inside the raw dir"""
+    return f"{sheet}__{tab}.json"
+
+
+def tab_url(
+    api_url: str,
+    spreadsheet_id: str,
+    tab: str,
+    api_key: str,
+    value_render_option: str = FORMATTED_VALUE,
+) -> str:
+    return f"{api_url}/{spreadsheet_id}/values/{tab}?key={api_key}&valueRenderOption={value_render_option}"
+
+
+def batch_url(
+    api_url: str,
+    spreadsheet_id: str,
+    tabs: List[str],
+    api_key: str,
+    value_render_option: str = FORMATTED_VALUE,
+) -> str:
+    ranges = "".join([f"&ranges={tab}" for tab in tabs])
+    return f"{api_url}/{spreadsheet_id}/values:batchGet?key={api_key}&valueRenderOption={value_render_option}{ranges}"
+
+
+def a1_rows(tab: str, first_row: int) -> str:
+    """url-encoded A1 range for every row of a tab from `first_row' on"""
+    name = urllib.parse.unquote(tab)
+    return urllib.parse.quote(f"'{name}'!A{first_row}:ZZ", safe="")
+
+
+def append_start(
+    tab_request: TabRequest,
+    path: Path,
+    previous: TabManifestEntry | None,
+    full_refresh_every: int,
+    value_render_option: str = FORMATTED_VALUE,
+) -> int | None:
+    """
+    The row to start an incremental download from, or None to download the whole tab. We ask for the last row we already have again so we can check that nothing above it moved. Every `full_refresh_every' incremental downloads, we get the whole tab again to pick up edits to old rows
+    """
+    if not tab_request.get("append_only", False) or full_refresh_every <= 0:
+        return None
+
+    if previous is None or not path.exists():
+        return None
+
+    rows = previous.get("rows", None)
+    if rows is None or rows == 0:
+        return None
+
+    if previous.get("incremental_runs", 0) >= full_refresh_every:
+        return None
+
+    # don't mix formatted and unformatted rows in one tab
+    if previous.get("value_render_option", FORMATTED_VALUE) != value_render_option:
+        return None
+
+    return rows
+
+
+def canonical_tab(value_range: dict) -> bytes:
+    """
+    Tabs get saved in one consistent format so that they come out byte-for-byte the same however they were downloaded: one at a time, in a batch, or appended to
+    """
+    values = value_range.get("values", [])
+    return json.dumps(
+        {
+            # the A1 part of the range depends on what we asked for, so only keep the tab name
+            "range": value_range.get("range", "").split("!")[0],
+            "majorDimension": value_range.get("majorDimension", "ROWS"),
+            "values": values,
+        }
+    ).encode()
+
+
+def append_rows(path: Path, value_range: dict) -> bytes | None:
+    """
+    Add the rows from an incremental download to the saved tab. The first row of `value_range' has to match the last row we saved. If not, rows were edited or deleted and we return None so the caller downloads the whole tab
+    """
+    with open(path, "rb") as f:
+        saved = json.loads(f.read())
+
+    values = saved.get("values", [])
+    new_values = value_range.get("values", [])
+
+    if len(values) == 0 or len(new_values) == 0 or new_values[0] != values[-1]:
+        return None
+
+    saved["values"] = values + new_values[1:]
+    return canonical_tab(saved)
+
+
+def row_count(tab_request: TabRequest, body: bytes) -> int | None:
+    if not tab_request.get("append_only", False):
+        return None
+    return len(json.loads(body).get("values", []))
+
+
+def conditional_headers(previous: TabManifestEntry | None) -> dict[str, str]:
+    """let the server tell us nothing changed instead of sending the whole tab again"""
+    if previous is None:
+        return {}
+
+    headers = {}
+    if previous.get("etag") is not None:
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified") is not None:
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+def stage_tab(
+    path: Path, body: bytes, previous: TabManifestEntry | None
+) -> tuple[str, bool, Path | None]:
+    """write a tab to a temp file next to `path' unless it's identical to what we already have. returns the hash, whether it changed, and the temp file"""
+    sha256 = hash_bytes(body)
+    changed = previous is None or previous["sha256"] != sha256 or not path.exists()
+
+    return sha256, changed, write_temp(path, body) if changed else None
+
+
+def commit_staged(results: List[TabResult]):
+    """move every new tab into place. only call this once every download worked so the raw dir is never half-updated. if a move fails, the tabs that weren't moved yet are thrown out"""
+    try:
+        for result in results:
+            if result["staged"] is not None:
+                os.replace(result["staged"], result["path"])
+                result["staged"] = None
+    finally:
+        discard_staged(results)
+
+
+def discard_staged(results: List[TabResult]):
+    for result in results:
+        if result["staged"] is not None:
+            result["staged"].unlink(missing_ok=True)
+            result["staged"] = None
+
+
+def gather(futures: List[Future]) -> List:
+    """wait for every future. if any failed, throw away what the others staged and raise the first error"""
+    results = []
+    errors = []
+    for future in futures:
+        try:
+            result = future.result()
+            results.extend(result if isinstance(result, list) else [result])
+        except Exception as e:
+            errors.append(e)
+
+    if len(errors) > 0:
+        discard_staged(results)
+        raise errors[0]
+
+    return results
+
+
+def fetch_tab(
+    tab_request: TabRequest,
+    save_dir: Path,
+    api_key: str,
+    headers: dict[str, str],
+    api_url: str = SHEETS_API_URL,
+    previous: TabManifestEntry | None = None,
+    scheduler: FetchScheduler | None = None,
+    full_refresh_every: int = 0,
+    value_render_option: str = FORMATTED_VALUE,
+) -> TabResult:
+    """
+    Download one tab and stage it in the format of `canonical_tab'. `previous' is what the manifest says about the tab, if anything. Append-only tabs only download new rows, unless `full_refresh_every' is 0
+    """
+    scheduler = scheduler if scheduler is not None else FetchScheduler()
+    sheet = tab_request["sheet"]
+    tab = tab_request["tab"]
+    spreadsheet_id = tab_request["spreadsheet_id"]
+    path = save_dir.joinpath(tab_filename(sheet, tab))
+
+    if not path.exists():
+        # can't trust a 304 if we lost the file
+        previous = None
+
+    start = time.perf_counter()
+
+    body = None
+    appended = None
+    incremental_runs = 0
+    first_row = append_start(
+        tab_request, path, previous, full_refresh_every, value_render_option
+    )
+
+    if first_row is not None:
+        url = tab_url(
+            api_url,
+            spreadsheet_id,
+            a1_rows(tab, first_row),
+            api_key,
+            value_render_option,
+        )
+        res = scheduler.request(url, headers)
+        body = append_rows(path, json.loads(res["body"]))
+        if body is not None:
+            appended = row_count(tab_request, body) - previous["rows"]
+            incremental_runs = previous.get("incremental_runs", 0) + 1
+            # validators for part of the tab don't apply to the whole tab
+            res["etag"] = None
+            res["last_modified"] = None
+
+    if body is None:
+        url = tab_url(api_url, spreadsheet_id, tab, api_key, value_render_option)
+        res = scheduler.request(url, headers | conditional_headers(previous))
+
+        if res["status"] == 304:
+            body = path.read_bytes()
+            # servers don't have to repeat validators on a 304
+            res["etag"] = res["etag"] or previous.get("etag")
+            res["last_modified"] = res["last_modified"] or previous.get("last_modified")
+        else:
+            body = canonical_tab(json.loads(res["body"]))
+
+    sha256, changed, staged = stage_tab(path, body, previous)
+
+    return {
+        "sheet": sheet,
+        "tab": tab,
+        "path": path,
+        "size": len(body),
+        "seconds": time.perf_counter() - start,
+        "sha256": sha256,
+        "changed": changed,
+        "etag": res["etag"],
+        "last_modified": res["last_modified"],
+        "staged": staged,
+        "rows": row_count(tab_request, body),
+        "appended": appended,
+        "incremental_runs": incremental_runs,
+        "value_render_option": value_render_option,
+    }
+
+
+def print_result(result: TabResult):
+    status = "saved" if result["changed"] else "unchanged"
+    appended = (
+        f", {result['appended']} new rows" if result["appended"] is not None else ""
+    )
+    print(
+        f"{status} {result['sheet']} {result['tab']} ({result['size']} bytes{appended}) in {result['seconds']:.2f}s"
+    )
+
+
+def fetch_tabs(
+    tab_requests: List[TabRequest],
+    save_dir: Path,
+    api_key: str,
+    headers: dict[str, str],
+    api_url: str = SHEETS_API_URL,
+    workers: int = 1,
+    manifest: RawManifest | None = None,
+    scheduler: FetchScheduler | None = None,
+    full_refresh_every: int = 0,
+    value_render_option: str = FORMATTED_VALUE,
+) -> List[TabResult]:
+    """download tabs with a pool of `workers' threads. results come back in the same order as `tab_requests'. nothing in `save_dir' changes unless every tab downloads"""
+    previous_tabs = manifest["tabs"] if manifest is not None else {}
+    # share one budget between all the workers
+    scheduler = scheduler if scheduler is not None else FetchScheduler()
+
+    def fetch(tab_request: TabRequest) -> TabResult:
+        name = tab_filename(tab_request["sheet"], tab_request["tab"])
+        result = fetch_tab(
+            tab_request,
+            save_dir,
+            api_key,
+            headers,
+            api_url=api_url,
+            previous=previous_tabs.get(name, None),
+            scheduler=scheduler,
+            full_refresh_every=full_refresh_every,
+            value_render_option=value_render_option,
+        )
+        print_result(result)
+        return result
+
+    # urllib blocks while it waits on the network, so threads are plenty here
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = gather([pool.submit(fetch, r) for r in tab_requests])
+
+    commit_staged(results)
+    return results
+
+
+def fetch_spreadsheet(
+    tab_requests: List[TabRequest],
+    save_dir: Path,
+    api_key: str,
+    headers: dict[str, str],
+    api_url: str = SHEETS_API_URL,
+    manifest: RawManifest | None = None,
+    scheduler: FetchScheduler | None = None,
+    full_refresh_every: int = 0,
+    value_render_option: str = FORMATTED_VALUE,
+) -> List[TabResult]:
+    """download every tab of one spreadsheet with a single batchGet, then stage the response as one file per tab"""
+    previous_tabs = manifest["tabs"] if manifest is not None else {}
+    scheduler = scheduler if scheduler is not None else FetchScheduler()
+    spreadsheet_id = tab_requests[0]["spreadsheet_id"]
+
+    paths = [
+        save_dir.joinpath(tab_filename(tab_request["sheet"], tab_request["tab"]))
+        for tab_request in tab_requests
+    ]
+    previouses = [previous_tabs.get(path.name, None) for path in paths]
+    first_rows = [
+        append_start(
+            tab_request, path, previous, full_refresh_every, value_render_option
+        )
+        for (tab_request, path, previous) in zip(tab_requests, paths, previouses)
+    ]
+    ranges = [
+        (
+            tab_request["tab"]
+            if first_row is None
+            else a1_rows(tab_request["tab"], first_row)
+        )
+        for (tab_request, first_row) in zip(tab_requests, first_rows)
+    ]
+    url = batch_url(api_url, spreadsheet_id, ranges, api_key, value_render_option)
+
+    start = time.perf_counter()
+
+    # batchGet doesn't do conditional requests, so we always get everything
+    res = scheduler.request(url, headers)
+    body = json.loads(res["body"])
+
+    # value ranges come back in the same order as the ranges we asked for
+    value_ranges = body["valueRanges"]
+    if len(value_ranges) != len(tab_requests):
+        raise Exception(
+            f"Asked {spreadsheet_id} for {len(tab_requests)} tabs but got {len(value_ranges)}"
+        )
+
+    # every tab in the batch took as long as the batch
+    seconds = time.perf_counter() - start
+
+    results: List[TabResult] = []
+    # if a tab fails partway through, the tabs before it were already staged
+    try:
+        for tab_request, path, previous, first_row, value_range in zip(
+            tab_requests, paths, previouses, first_rows, value_ranges
+        ):
+            data = None
+            appended = None
+            incremental_runs = 0
+
+            if first_row is not None:
+                data = append_rows(path, value_range)
+                if data is None:
+                    # old rows changed. get the whole tab instead
+                    result = fetch_tab(
+                        tab_request,
+                        save_dir,
+                        api_key,
+                        headers,
+                        api_url=api_url,
+                        previous=previous,
+                        scheduler=scheduler,
+                        value_render_option=value_render_option,
+                    )
+                    result["seconds"] += seconds
+                    results.append(result)
+                    continue
+
+                appended = row_count(tab_request, data) - previous["rows"]
+                incremental_runs = previous.get("incremental_runs", 0) + 1
+            else:
+                data = canonical_tab(value_range)
+
+            sha256, changed, staged = stage_tab(path, data, previous)
+            results.append(
+                {
+                    "sheet": tab_request["sheet"],
+                    "tab": tab_request["tab"],
+                    "path": path,
+                    "size": len(data),
+                    "seconds": seconds,
+                    "sha256": sha256,
+                    "changed": changed,
+                    "etag": None,
+                    "last_modified": None,
+                    "staged": staged,
+                    "rows": row_count(tab_request, data),
+                    "appended": appended,
+                    "incremental_runs": incremental_runs,
+                    "value_render_option": value_render_option,
+                }
+            )
+    except BaseException:
+        discard_staged(results)
+        raise
+
+    return results
+
+
+def fetch_tabs_batched(
+    tab_requests: List[TabRequest],
+    save_dir: Path,
+    api_key: str,
+    headers: dict[str, str],
+    api_url: str = SHEETS_API_URL,
+    workers: int = 1,
+    manifest: RawManifest | None = None,
+    scheduler: FetchScheduler | None = None,
+    full_refresh_every: int = 0,
+    value_render_option: str = FORMATTED_VALUE,
+) -> List[TabResult]:
+    """same as `fetch_tabs', but with one request per spreadsheet instead of one request per tab"""
+    scheduler = scheduler if scheduler is not None else FetchScheduler()
+
+    by_spreadsheet: dict[str, List[TabRequest]] = {}
+    for tab_request in tab_requests:
+        by_spreadsheet.setdefault(tab_request["spreadsheet_id"], []).append(tab_request)
+
+    def fetch(batch: List[TabRequest]) -> List[TabResult]:
+        results = fetch_spreadsheet(
+            batch,
+            save_dir,
+            api_key,
+            headers,
+            api_url=api_url,
+            manifest=manifest,
+            scheduler=scheduler,
+            full_refresh_every=full_refresh_every,
+            value_render_option=value_render_option,
+        )
+        changed = len([r for r in results if r["changed"]])
+        print(
+            f"saved {len(results)} {batch[0]['sheet']} tabs ({changed} changed, {sum([r['size'] for r in results])} bytes) in {results[0]['seconds']:.2f}s"
+        )
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = gather([pool.submit(fetch, b) for b in by_spreadsheet.values()])
+
+    commit_staged(results)
+
+    # put results back in the order they were asked for
+    result_by_tab = {(result["sheet"], result["tab"]): result for result in results}
+    return [result_by_tab[(r["sheet"], r["tab"])] for r in tab_requests]
+
+
+def updated_manifest(results: List[TabResult]) -> RawManifest:
+    """what the manifest should look like after a download"""
+    return {
+        "tabs": {
+            result["path"].name: {
+                "sha256": result["sha256"],
+                "size": result["size"],
+                "etag": result["etag"],
+                "last_modified": result["last_modified"],
+                "rows": result["rows"],
+                "incremental_runs": result["incremental_runs"],
+                "value_render_option": result["value_render_option"],
+            }
+            for result in results
+        }
+    }
@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+import functools
+import gzip
+import json
+from pathlib import Path
+from typing_extensions import TypedDict
+
+from .files import atomic_write
+from .raw_manifest import hash_bytes, load_changed_tabs
+
+
+class SnapshotManifest(TypedDict):
+    """which version of every tab made up a download"""
+
+    created_at: str
+    """file name in the raw dir: sha256 of the tab"""
+    tabs: dict[str, str]
+
+
+class SnapshotStore:
+    """
+    Keeps every version of every tab we've downloaded. Tabs are stored once per distinct content, gzipped and keyed on the sha256 of the uncompressed tab:
+
+        {root}/blobs/ab/abcdef....json.gz
+        {root}/manifests/20250101T090000Z.json
+
+    A manifest maps tab file names to blobs, so any past download can be rebuilt exactly
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.blobs_dir = root.joinpath("blobs")
+        self.manifests_dir = root.joinpath("manifests")
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blobs_dir.joinpath(sha256[:2], f"{sha256}.json.gz")
+
+    def has(self, sha256: str) -> bool:
+        return self.blob_path(sha256).exists()
+
+    def put(self, data: bytes) -> str:
+        """save a tab if we haven't seen it before. returns its hash either way"""
+        sha256 = hash_bytes(data)
+        path = self.blob_path(sha256)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # mtime=0 so the same tab always compresses to the same bytes
+            atomic_write(path, gzip.compress(data, compresslevel=9, mtime=0))
+
+        return sha256
+
+    def get(self, sha256: str) -> bytes:
+        with open(self.blob_path(sha256), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def save_manifest(self, tabs: dict[str, str], build_id: str | None = None) -> Path:
+        """record a download. every tab must already be in the store"""
+        missing = [name for (name, sha256) in tabs.items() if not self.has(sha256)]
+        if len(missing) > 0:
+            raise Exception(f"Can't snapshot tabs that aren't stored: {missing}")
+
+        now = datetime.now(timezone.utc)
+        build_id = build_id if build_id is not None else now.strftime("%Y%m%dT%H%M%SZ")
+
+        manifest: SnapshotManifest = {
+            "created_at": now.isoformat(timespec="seconds"),
+            "tabs": tabs,
+        }
+
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        path = self.manifests_dir.joinpath(f"{build_id}.json")
+        atomic_write(path, json.dumps(manifest, indent=2, sort_keys=True))
+
+        return path
+
+    def list_manifests(self) -> list[Path]:
+        """oldest first"""
+        if not self.manifests_dir.exists():
+            return []
+        return sorted(self.manifests_dir.glob("*.json"))
+
+    def prune(self, keep: int) -> tuple[list[Path], int]:
+        """
+        Throw out every manifest but the newest `keep', then every blob that no manifest left uses. Returns the manifests that were thrown out and how many blobs went with them
+        """
+        if keep < 1:
+            raise ValueError("Keep at least one snapshot")
+
+        manifests = self.list_manifests()
+        dropped = manifests[:-keep]
+        for path in dropped:
+            path.unlink()
+
+        used = set()
+        for path in manifests[-keep:]:
+            used.update(load_snapshot_manifest(path)["tabs"].values())
+
+        blobs = 0
+        if self.blobs_dir.exists():
+            for path in self.blobs_dir.glob("*/*.json.gz"):
+                if path.name.removesuffix(".json.gz") not in used:
+                    path.unlink()
+                    blobs += 1
+
+        return dropped, blobs
+
+
+def is_snapshot_manifest(source: Path) -> bool:
+    """raw tabs come from either a directory or a snapshot manifest"""
+    return source.is_file() and source.suffix == ".json"
+
+
+@functools.lru_cache(maxsize=8)
+def load_snapshot_manifest(path: Path) -> SnapshotManifest:
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def snapshot_store_for(manifest_path: Path) -> SnapshotStore:
+    """manifests live in {root}/manifests"""
+    return SnapshotStore(manifest_path.resolve().parent.parent)
+
+
+def read_raw_tab(source: Path, name: str) -> bytes:
+    """the bytes of a raw tab, from a raw dir or from a snapshot manifest"""
+    if not is_snapshot_manifest(source):
+        with open(source.joinpath(name), "rb") as f:
+            return f.read()
+
+    tabs = load_snapshot_manifest(source)["tabs"]
+    if name not in tabs:
+        raise FileNotFoundError(f"{name} isn't in the snapshot {source}")
+
+    return snapshot_store_for(source).get(tabs[name])
+
+
+def raw_tab_hashes(source: Path) -> dict[str, str] | None:
+    """file name: sha256 for every raw tab in `source'. None if we can't tell"""
+    if is_snapshot_manifest(source):
+        return load_snapshot_manifest(source)["tabs"]
+
+    changed_tabs = load_changed_tabs(source)
+    return changed_tabs["tabs"] if changed_tabs is not None else None
@@ -0,0 +1,58 @@
+from typing import Iterable, List
+
+import numpy as np
+
+
+class SymbolTable:
+    """
+    Gives every distinct name a small integer ID, in the order the names were first seen. Aggregations index arrays with the IDs and only turn them back into names for the JSON
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self.ids: dict[str, int] = {}
+        self.intern_all(names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def intern(self, name: str) -> int:
+        """the ID for `name', adding it if it's new"""
+        id = self.ids.get(name, None)
+        if id is None:
+            id = len(self.names)
+            self.ids[name] = id
+            self.names.append(name)
+        return id
+
+    def intern_all(self, names: Iterable[str]) -> np.ndarray:
+        return np.array([self.intern(name) for name in names], dtype=np.int32)
+
+    def name(self, id: int) -> str:
+        return self.names[id]
+
+    def lookup(self, ids: np.ndarray) -> np.ndarray:
+        """names for an array of IDs"""
+        return np.array(self.names, dtype=object)[ids]
+
+    def sort_order(self) -> np.ndarray:
+        """where each ID's name would be if the names were sorted. compare these instead of names"""
+        order = np.empty(len(self.names), dtype=np.int32)
+        order[sorted(range(len(self.names)), key=self.names.__getitem__)] = np.arange(
+            len(self.names), dtype=np.int32
+        )
+        return order
+
+
+class Symbols:
+    """one symbol table for each kind of name, shared by every table of games in a build"""
+
+    def __init__(self):
+        self.players = SymbolTable()
+        self.teams = SymbolTable()
+        self.leagues = SymbolTable()
+        """seasons as they're written in the spreadsheets"""
+        self.seasons = SymbolTable()
@@ -0,0 +1,164 @@
+from typing import List
+
+import numpy as np
+
+from .game_table import EXTRA_INDEX, HITTING_KEYS, GameTable
+
+# per-game tallies that add up to the stats in calc_stats_from_all_games, in the same order
+RAW_STATS_KEYS = [
+    "innings_pitching",
+    "innings_hitting",
+    "wins",
+    "losses",
+    "wins_by_run_rule",
+    "losses_by_run_rule",
+    "ab",
+    "r",
+    "h",
+    "hr",
+    "rbi",
+    "bb",
+    "so",
+    "oppab",
+    "oppr",
+    "opph",
+    "opphr",
+    "opprbi",
+    "oppbb",
+    "oppso",
+    "games_played",
+]
+
+# tallies for every game. RAW_STATS_KEYS, then runs from games where we know the innings, which is what league ERAs use
+TALLY_KEYS = [*RAW_STATS_KEYS, "runs_with_innings"]
+
+TALLY_INDEX = {key: i for (i, key) in enumerate(TALLY_KEYS)}
+
+
+class Tallies:
+    """
+    Running totals for a team or player, with a fixed layout instead of a dict per team or player. `totals' has an int for every key in TALLY_KEYS. `missing' and `seasons' are bitsets: bit i of `missing' is set if TALLY_KEYS[i] was missing from a game, and bit i of `seasons' is set if they played in season ID i
+    """
+
+    __slots__ = ("totals", "missing", "seasons")
+
+    def __init__(
+        self, totals: List[int] | None = None, missing: int = 0, seasons: int = 0
+    ):
+        self.totals = totals if totals is not None else [0] * len(TALLY_KEYS)
+        self.missing = missing
+        self.seasons = seasons
+
+    @classmethod
+    def from_row(cls, totals: List[int], missing: List[bool]) -> "Tallies":
+        """a row of group_sum totals and the matching row of group_any"""
+        return cls(totals, sum([1 << i for (i, m) in enumerate(missing) if m]))
+
+    def __getitem__(self, key: str) -> int | None:
+        """None if it was missing from any game"""
+        i = TALLY_INDEX[key]
+        return None if self.missing >> i & 1 else self.totals[i]
+
+    def raw_stats(self) -> dict[str, int | None]:
+        return {key: self[key] for key in RAW_STATS_KEYS}
+
+    def add(self, other: "Tallies") -> "Tallies":
+        """add `other' to these tallies in place"""
+        for i, total in enumerate(other.totals):
+            self.totals[i] += total
+        self.missing |= other.missing
+        self.seasons |= other.seasons
+        return self
+
+    def add_season(self, season: int):
+        self.seasons |= 1 << season
+
+    def season_ids(self) -> List[int]:
+        return [i for i in range(self.seasons.bit_length()) if self.seasons >> i & 1]
+
+    @classmethod
+    def merge(cls, *tallies: "Tallies | None") -> "Tallies | None":
+        """new tallies that add up all of `tallies', skipping Nones. None if there's nothing to add up"""
+        tallies = [t for t in tallies if t is not None]
+        if len(tallies) == 0:
+            return None
+
+        merged = cls()
+        for t in tallies:
+            merged.add(t)
+        return merged
+
+
+def tally_games(
+    games: GameTable,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn every game into a row for each side: away_0, home_0, away_1, home_1, ... Returns (side, opponent, tallies, missing), where `tallies' and `missing' have a column for every key in TALLY_KEYS
+
+    Games that are missing at bats only count towards records, and innings only count if we know them
+    """
+    sides = lambda away, home: np.stack([away, home], axis=1).reshape(
+        (-1, *away.shape[1:])
+    )
+    away_columns = [EXTRA_INDEX[f"away_{key}"] for key in HITTING_KEYS]
+    home_columns = [EXTRA_INDEX[f"home_{key}"] for key in HITTING_KEYS]
+    runs_column = HITTING_KEYS.index("r")
+
+    won = sides(games.away_won, ~games.away_won)
+    run_rule = np.repeat(games.run_rule, 2)
+    innings = np.where(games.innings_missing, 0.0, games.innings)
+    hitting = sides(games.stats[:, away_columns], games.stats[:, home_columns])
+    hitting_missing = sides(
+        games.missing[:, away_columns], games.missing[:, home_columns]
+    )
+    pitching = sides(games.stats[:, home_columns], games.stats[:, away_columns])
+    pitching_missing = sides(
+        games.missing[:, home_columns], games.missing[:, away_columns]
+    )
+
+    tallies = np.column_stack(
+        [
+            sides(np.floor(innings), np.ceil(innings)).astype(np.int64),
+            sides(np.ceil(innings), np.floor(innings)).astype(np.int64),
+            won,
+            ~won,
+            won & run_rule,
+            ~won & run_rule,
+            hitting,
+            pitching,
+            np.ones(len(won), dtype=np.int64),
+            hitting[:, runs_column],
+        ]
+    ).astype(np.int64)
+    no_missing = np.zeros(len(won), dtype=bool)
+    missing = np.column_stack(
+        [
+            *[no_missing] * 6,
+            hitting_missing,
+            pitching_missing,
+            no_missing,
+            hitting_missing[:, runs_column],
+        ]
+    )
+
+    # which games each tally counts
+    every_game = np.ones(len(won), dtype=bool)
+    has_stats = np.repeat(
+        games.has_extras & ~games.missing[:, EXTRA_INDEX["away_ab"]], 2
+    )
+    has_innings = has_stats & np.repeat(~games.innings_missing, 2)
+    counts = np.column_stack(
+        [
+            *[has_innings] * 2,
+            *[every_game] * 4,
+            *[has_stats] * (2 * len(HITTING_KEYS) + 1),
+            has_innings,
+        ]
+    )
+
+    return (
+        sides(games.away, games.home),
+        sides(games.home, games.away),
+        tallies * counts,
+        missing & counts,
+    )